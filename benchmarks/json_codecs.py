@@ -0,0 +1,42 @@
+"""Times the :class:`twx.botapi.JSONCodec` implementations: decoding a ``getUpdates`` response, decoding and
+parsing it, and encoding an inline keyboard. Libraries that are not installed are skipped.
+
+Run from the root of a checkout, e.g. ``PYTHONPATH=. python benchmarks/json_codecs.py``.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import payload
+from twx.botapi import InlineKeyboardButton, InlineKeyboardMarkup, Update, create_json_codec
+
+
+def best(fn, number):
+    """The fastest of five runs of ``fn``, in microseconds per call"""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(number=2000):
+    raw = payload.response()
+    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton('Button {}{}'.format(row, column),
+                                                           callback_data='action:{}:{}'.format(row, column))
+                                      for column in range(3)] for row in range(4)])
+
+    for name in ('json', 'orjson', 'rapidjson', 'ujson'):
+        try:
+            codec = create_json_codec(name)
+        except ImportError:
+            print('{:<9} not installed'.format(name))
+            continue
+
+        decode = best(lambda: codec.loads(raw), number)
+        decode_parse = best(lambda: Update.from_result(codec.loads(raw)['result']), number)
+        encode = best(lambda: keyboard.serialize(codec), number * 10)
+        print('{:<9} decode {:7.1f} us/batch  decode+parse {:7.1f} us/batch  keyboard encode {:5.2f} us'.format(
+            name, decode, decode_parse, encode))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Times turning a ``getUpdates`` response into :class:`twx.botapi.Update` objects.
+
+Run from the root of a checkout, e.g. ``PYTHONPATH=. python benchmarks/parsers.py``. To compare with another
+version, run it with ``PYTHONPATH`` pointing at a checkout of that version.
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import payload
+from twx.botapi import Update
+
+
+def best(fn, number):
+    """The fastest of five runs of ``fn``, in microseconds per call"""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(number=2000):
+    raw = payload.response()
+    result = json.loads(raw.decode('utf-8'))['result']
+
+    parse = best(lambda: Update.from_result(result), number)
+    decode_parse = best(lambda: Update.from_result(json.loads(raw.decode('utf-8'))['result']), number)
+    print('{} updates, {} bytes'.format(len(result), len(raw)))
+    print('parse         {:8.1f} us/batch {:6.2f} us/update'.format(parse, parse / len(result)))
+    print('decode+parse  {:8.1f} us/batch {:6.2f} us/update'.format(decode_parse, decode_parse / len(result)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""A recorded-style ``getUpdates`` response the benchmarks decode: 100 updates of a mix of commands, plain text,
+replies, photos, new members, callback queries and edits, in private chats and supergroups."""
+import json
+import random
+
+
+def _user(i):
+    return {'id': 1000 + i, 'is_bot': False, 'first_name': 'User{}'.format(i), 'last_name': 'Last',
+            'username': 'user{}'.format(i), 'language_code': 'en'}
+
+
+def _chat(i, chat_type):
+    if chat_type == 'private':
+        return {'id': 1000 + i, 'first_name': 'User{}'.format(i), 'last_name': 'Last', 'username': 'user{}'.format(i),
+                'type': 'private'}
+    return {'id': -100000 - i, 'title': 'Group {}'.format(i), 'type': 'supergroup'}
+
+
+def updates(count=100, seed=1):
+    """The updates, as decoded from JSON"""
+    rng = random.Random(seed)
+    result = []
+    for n in range(count):
+        i = rng.randrange(20)
+        r = rng.random()
+        message = {'message_id': 5000 + n, 'from': _user(i), 'chat': _chat(i, rng.choice(['private', 'supergroup'])),
+                   'date': 1700000000 + n}
+        if r < 0.45:
+            message['text'] = '/start arg{}'.format(n)
+            message['entities'] = [{'offset': 0, 'length': 6, 'type': 'bot_command'}]
+        elif r < 0.7:
+            message['text'] = 'hello there, this is message {} with some text'.format(n)
+            if rng.random() < 0.5:
+                message['reply_to_message'] = {'message_id': 4000 + n, 'from': _user(i + 1), 'chat': message['chat'],
+                                               'date': 1690000000, 'text': 'earlier'}
+        elif r < 0.8:
+            message['photo'] = [{'file_id': 'AgAD{}_{}'.format(n, k), 'file_unique_id': 'u{}'.format(k),
+                                 'file_size': 1000 * k, 'width': 90 * k, 'height': 60 * k} for k in (1, 2, 3)]
+            message['caption'] = 'pic'
+        elif r < 0.85:
+            message['new_chat_members'] = [_user(i + 2)]
+            message['new_chat_member'] = _user(i + 2)
+
+        if 0.85 <= r < 0.97:
+            result.append({'update_id': 900000 + n, 'callback_query': {
+                'id': 'cb{}'.format(n), 'from': _user(i), 'message': message, 'chat_instance': 'ci',
+                'data': 'btn:{}'.format(n)}})
+        elif r >= 0.97:
+            result.append({'update_id': 900000 + n, 'edited_message': dict(message, edit_date=1700000100 + n,
+                                                                          text='edited')})
+        else:
+            result.append({'update_id': 900000 + n, 'message': message})
+    return result
+
+
+def response(count=100, seed=1):
+    """The body of the ``getUpdates`` response holding :func:`updates`"""
+    return json.dumps({'ok': True, 'result': updates(count, seed)}).encode('utf-8')
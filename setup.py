@@ -15,6 +15,9 @@ requirements = ['requests', 'attrs']
 if sys.version_info < (3, 4, 0):
     requirements.append('enum34')
 
+if sys.version_info < (3, 2, 0):
+    requirements.append('futures')
+
 setup(name='twx.botapi',
       packages=['twx', 'twx.botapi'],
       version=__version__,
@@ -27,6 +30,7 @@ setup(name='twx.botapi',
       url='https://github.com/datamachine/twx.botapi',
       download_url=download_url,
       install_requires=requirements,
+      extras_require={'async': ['aiohttp']},
       platforms=['Linux', 'FreeBSD', 'BSD', 'Unix', 'Mac', 'OS X', 'Windows'],
       classifiers=[
           'Development Status :: 5 - Production/Stable',
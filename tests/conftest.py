@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from twx.botapi import botapi
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def load_updates():
+    """The ``getUpdates`` response in ``data/updates.json``, decoded"""
+    with open(os.path.join(DATA, 'updates.json'), 'rb') as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+class Clock(object):
+    """Stands in for ``botapi._monotonic``, moved forward by hand"""
+
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def fail_first(api, method, *failures):
+    """Make the first calls to ``method`` of the fake ``api`` fail, one per ``(error_code, description, parameters)``
+    in ``failures``; later calls are handled as before. Returns the list of parameters of every call"""
+    failures = list(failures)
+    handler = api.methods[method]
+    calls = []
+
+    def handle(token, params, files):
+        calls.append(dict(params))
+        if failures:
+            raise botapi.FakeBotAPI.Failure(*failures.pop(0))
+        return handler(token, params, files)
+
+    api.methods[method] = handle
+    return calls
+
+
+class FailingTransport(botapi.LoopbackTransport):
+    """A loopback transport whose first sends raise ``errors``, one per send"""
+
+    def __init__(self, api, *errors):
+        super(FailingTransport, self).__init__(api)
+        self.errors = list(errors)
+        self.sends = 0
+
+    def send(self, request, timeout=None):
+        self.sends += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return super(FailingTransport, self).send(request, timeout)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(botapi, '_monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def api():
+    return botapi.FakeBotAPI()
+
+
+@pytest.fixture
+def make_bot(api):
+    """Build bots talking to the ``api`` fixture through a :class:`LoopbackTransport`, closed after the test"""
+    bots = []
+
+    def make_bot(**kwargs):
+        kwargs.setdefault('transport', botapi.LoopbackTransport(api))
+        bot = botapi.TelegramBot('1:token', **kwargs)
+        bots.append(bot)
+        return bot
+
+    yield make_bot
+    for bot in bots:
+        bot.close()
@@ -0,0 +1,83 @@
+import random
+import time
+
+import pytest
+
+from twx.botapi import botapi
+
+
+@pytest.fixture
+def jittery_api(api):
+    """Answers ``getChat`` after a random delay, so calls finish out of order"""
+    get_chat = api.methods['getChat']
+
+    def slow_get_chat(token, params, files):
+        time.sleep(random.uniform(0, 0.05))
+        return get_chat(token, params, files)
+
+    api.methods['getChat'] = slow_get_chat
+    return api
+
+
+def test_results_are_in_call_order(jittery_api, make_bot):
+    bot = make_bot()
+    chat_ids = list(range(1, 31))
+    with bot.batch() as batch:
+        for chat_id in chat_ids:
+            batch.get_chat(chat_id)
+
+    assert len(batch) == 30
+    assert [chat.id for chat in batch.results] == chat_ids
+
+
+def test_as_completed_yields_every_request(jittery_api, make_bot):
+    with make_bot().batch() as batch:
+        for chat_id in range(1, 11):
+            batch.get_chat(chat_id)
+    assert sorted(request.result.id for request in batch.as_completed(5)) == list(range(1, 11))
+
+
+def test_errors_take_the_place_of_their_call(api, make_bot):
+    with make_bot().batch() as batch:
+        batch.get_me()
+        batch.get_file('missing')
+        batch.get_chat(3)
+
+    me, error, chat = batch.results
+    assert isinstance(me, botapi.User)
+    assert isinstance(error, botapi.Error) and error.error_code == 400
+    assert chat.id == 3
+
+
+def test_the_batch_is_cancelled_when_the_block_raises(api, make_bot):
+    bot = make_bot(rate_limiter=botapi.RateLimiter(private_limit=(1, 30)))
+    with pytest.raises(RuntimeError):
+        with bot.batch() as batch:
+            for text in ('a', 'b', 'c'):
+                batch.send_message(5, text)
+            time.sleep(0.1)
+            raise RuntimeError()
+
+    assert [params['text'] for params in api.sent] == ['a']
+    assert all(isinstance(result, botapi.RequestCancelled) for result in batch.results[1:])
+
+
+def test_only_api_methods_are_batched(make_bot):
+    batch = make_bot().batch()
+    for name in ('batch', 'close', 'call_many', '_merge_overrides', 'no_such_method'):
+        with pytest.raises(AttributeError):
+            getattr(batch, name)
+
+
+def test_call_many(jittery_api, make_bot):
+    results = make_bot().call_many([('get_chat', (chat_id,)) for chat_id in range(1, 21)] +
+                                   [('send_message', (7, 'hi'), dict(disable_notification=True))], timeout=5)
+
+    assert [chat.id for chat in results[:-1]] == list(range(1, 21))
+    assert results[-1].text == 'hi'
+    assert jittery_api.sent[-1]['disable_notification'] is True
+
+
+def test_call_many_passes_common_arguments(api, make_bot):
+    results = make_bot().call_many([('get_chat', (1,)), ('get_chat', (2,))], result_mode=botapi.ResultMode.RAW)
+    assert results == [dict(id=1, type='private'), dict(id=2, type='private')]
@@ -0,0 +1,134 @@
+import time
+
+import pytest
+
+from twx.botapi import botapi
+from twx.botapi.botapi import CircuitBreaker
+
+from conftest import FailingTransport, fail_first
+
+
+def test_the_circuit_opens_on_failures(clock):
+    breaker = CircuitBreaker(min_calls=4, failure_threshold=0.5)
+    for error in (None, None, RuntimeError()):
+        breaker.record('getMe', error, 0)
+    assert breaker.state('getMe') == CircuitBreaker.CLOSED
+
+    breaker.record('getMe', RuntimeError(), 0)
+    assert breaker.state('getMe') == CircuitBreaker.OPEN
+    assert not breaker.acquire('getMe')
+    assert breaker.state('sendMessage') == CircuitBreaker.CLOSED  # Another method class
+
+
+def test_client_errors_are_not_failures(clock):
+    breaker = CircuitBreaker(min_calls=1)
+    breaker.record('getMe', botapi.Error.from_result(dict(ok=False, error_code=400, description='Bad Request')), 0)
+    assert breaker.state('getMe') == CircuitBreaker.CLOSED
+
+
+def test_slow_calls_open_the_circuit(clock):
+    breaker = CircuitBreaker(min_calls=2, slow_call_duration=1, slow_call_threshold=0.5)
+    breaker.record('getMe', None, 0.1)
+    breaker.record('getMe', None, 2)
+    assert breaker.state('getMe') == CircuitBreaker.OPEN
+
+
+def test_old_calls_leave_the_window(clock):
+    breaker = CircuitBreaker(min_calls=2, window=10)
+    breaker.record('getMe', RuntimeError(), 0)
+    clock.advance(11)
+    breaker.record('getMe', None, 0)
+    breaker.record('getMe', None, 0)
+    breaker.record('getMe', RuntimeError(), 0)
+    assert breaker.state('getMe') == CircuitBreaker.CLOSED  # 1 failure of 3 calls, the first one is forgotten
+
+
+def open_circuit(clock, **kwargs):
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=10, **kwargs)
+    breaker.record('getMe', RuntimeError(), 0)
+    assert breaker.state('getMe') == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_the_circuit_half_opens_and_closes(clock):
+    breaker = open_circuit(clock, probes=2)
+    assert breaker.retry_after('getMe') == pytest.approx(10)
+    clock.advance(10)
+    assert breaker.state('getMe') == CircuitBreaker.HALF_OPEN
+    assert breaker.acquire('getMe') and breaker.acquire('getMe')
+    assert not breaker.acquire('getMe')  # Only the probes are let through
+
+    breaker.record('getMe', None, 0)
+    assert breaker.state('getMe') == CircuitBreaker.HALF_OPEN
+    breaker.record('getMe', None, 0)
+    assert breaker.state('getMe') == CircuitBreaker.CLOSED
+
+
+def test_a_failed_probe_opens_the_circuit_again(clock):
+    breaker = open_circuit(clock)
+    clock.advance(10)
+    assert breaker.acquire('getMe')
+    breaker.record('getMe', RuntimeError(), 0)
+    assert breaker.state('getMe') == CircuitBreaker.OPEN
+    assert breaker.retry_after('getMe') == pytest.approx(10)
+
+
+def test_released_probes_are_given_back(clock):
+    breaker = open_circuit(clock)
+    clock.advance(10)
+    assert breaker.acquire('getMe')
+    assert not breaker.acquire('getMe')
+    breaker.release('getMe')
+    assert breaker.acquire('getMe')
+
+
+def test_lost_probes_are_replaced(clock):
+    breaker = open_circuit(clock)
+    clock.advance(10)
+    assert breaker.acquire('getMe')
+    clock.advance(5)
+    assert not breaker.acquire('getMe')
+    assert breaker.retry_after('getMe') == pytest.approx(5)
+    clock.advance(5)
+    assert breaker.acquire('getMe')  # The first probe never reported back
+
+
+def test_requests_fail_fast_while_open(api, make_bot):
+    calls = fail_first(api, 'getMe', (500, 'Internal Server Error'), (500, 'Internal Server Error'))
+    bot = make_bot(circuit_breaker=CircuitBreaker(min_calls=2, reset_timeout=0.2))
+    assert bot.get_me().wait(5).error_code == 500
+    assert bot.get_me().wait(5).error_code == 500
+
+    error = bot.get_me().wait(5)
+    assert isinstance(error, botapi.CircuitOpen)
+    assert len(calls) == 2  # Not sent
+
+    time.sleep(0.25)
+    assert isinstance(bot.get_me().wait(5), botapi.User)  # The probe
+    assert bot.circuit_breaker.state('getMe') == CircuitBreaker.CLOSED
+
+
+def test_probes_are_not_retried_when_the_circuit_opens(api, make_bot):
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=5)
+    calls = fail_first(api, 'getMe', (500, 'Internal Server Error'), (500, 'Internal Server Error'))
+    bot = make_bot(circuit_breaker=breaker, retry_policy=botapi.RetryPolicy(backoff=0.01))
+    error = bot.get_me().wait(5)
+    assert isinstance(error, botapi.CircuitOpen)  # The retry found the circuit open
+    assert len(calls) == 1
+
+
+class Interrupt(BaseException):
+    pass
+
+
+def test_an_interrupted_probe_is_released(api, clock):
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=10)
+    breaker.record('getMe', RuntimeError(), 0)
+    clock.advance(10)
+
+    request = botapi.get_me(token='1:token', transport=FailingTransport(api, Interrupt()), circuit_breaker=breaker)
+    request._start()
+    with pytest.raises(Interrupt):
+        request._async_call()
+    assert breaker.state('getMe') == CircuitBreaker.HALF_OPEN
+    assert breaker.acquire('getMe')  # The probe was given back
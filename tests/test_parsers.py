@@ -0,0 +1,127 @@
+import io
+import os
+import threading
+
+import pytest
+
+from twx.botapi import botapi
+
+from conftest import DATA, load_updates
+
+
+def expected_reprs():
+    """The updates in ``data/updates.json`` as built by the hand-written ``from_result`` methods the generated
+    parsers replaced"""
+    with io.open(os.path.join(DATA, 'updates.txt'), encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture
+def result():
+    return load_updates()['result']
+
+
+def test_parsers_match_the_old_from_result(result):
+    assert [repr(update) for update in botapi.Update.from_result(result)] == expected_reprs()
+
+
+def test_single_updates(result):
+    assert [botapi.Update.from_dict(update) for update in result] == botapi.Update.from_result(result)
+
+
+def test_legacy_field_shapes(result):
+    updates = botapi.Update.from_result(result)
+    assert isinstance(updates[4].message.new_chat_photo[0], dict)
+    assert isinstance(updates[5].message.chat.pinned_message, dict)
+    assert isinstance(updates[5].message.pinned_message, botapi.Message)
+
+    game = botapi.Game.from_result(dict(title='t', description='d', photo=[],
+                                        entities=[dict(type='bold', offset=0, length=1)]))
+    assert game.text_entities == [botapi.MessageEntity(type='bold', offset=0, length=1, url=None, user=None)]
+
+
+def test_fixed_parsers():
+    assert type(botapi.VideoNote.from_result(dict(file_id='v', length=240, duration=3))) is botapi.VideoNote
+    message = botapi.Message.from_result(dict(message_id=1, date=0, chat=dict(id=1, type='private'),
+                                              connected_website='example.org'))
+    assert message.connected_website == 'example.org'
+
+
+def test_missing_results():
+    assert botapi.Message.from_result(None) is None
+    assert botapi.Update.from_result(None) is None
+
+
+def test_lazy_updates_match(result):
+    typed = botapi.Update.from_result(result)
+    lazy = botapi._lazy_parsers[botapi.Update.from_result](result)
+    for update, expected in zip(lazy, typed):
+        for field in botapi.Update._fields:
+            assert getattr(update, field) == getattr(expected, field)
+
+
+def test_compact_messages_match(result):
+    typed = botapi.Update.from_result(result)
+    assert botapi._compact_parsers[botapi.Update.from_result](result) == typed
+
+
+def test_interned_updates_match(result):
+    table = botapi.InternTable()
+    parse = table._get_parser(botapi.Update.from_result)
+    assert parse(result) == botapi.Update.from_result(result)
+    assert table.misses and table.hits
+
+    again = parse(result)
+    assert again[1].message.reply_to_message.chat is again[2].message.chat  # Shared
+
+
+def test_full_projection_matches(result):
+    projection = botapi.Projection(Message=botapi.Message._fields, User=botapi.User._fields)
+    assert projection._get_parser(botapi.Update.from_result)(result) == botapi.Update.from_result(result)
+
+
+def test_projection_leaves_other_fields_out(result):
+    projection = botapi.Projection(Message=('message_id', 'text', 'chat'), Chat=('id',))
+    updates = projection._get_parser(botapi.Update.from_result)(result)
+    message = updates[1].message
+    assert message.text == 'see https://example.org'
+    assert message.chat == botapi.Chat(-1001, *[None] * (len(botapi.Chat._fields) - 1))
+    assert message.sender is None and message.entities is None and message.reply_to_message is None
+    assert updates[11].callback_query.sender.first_name == 'Ann'  # Types not named are decoded in full
+
+
+def test_interned_projection_matches(result):
+    projection = botapi.Projection(Message=('message_id', 'text', 'chat', 'sender'))
+    table = botapi.InternTable()
+    assert projection._get_parser(botapi.Update.from_result, table)(result) == \
+        projection._get_parser(botapi.Update.from_result)(result)
+
+
+@pytest.mark.parametrize('name', ['json', 'orjson', 'ujson', 'rapidjson'])
+def test_json_codecs_decode_alike(name):
+    try:
+        codec = botapi.create_json_codec(name)
+    except ImportError:
+        pytest.skip('{0} is not installed'.format(name))
+    with io.open(os.path.join(DATA, 'updates.json'), 'rb') as f:
+        content = f.read()
+    result = codec.loads(content)['result']
+    assert [repr(update) for update in botapi.Update.from_result(result)] == expected_reprs()
+
+
+def test_intern_table_counts_concurrent_lookups(result):
+    table = botapi.InternTable(maxsize=5)  # Small enough to keep evicting
+    parse = table._get_parser(botapi.Update.from_result)
+    parse(result)
+    lookups = table.hits + table.misses
+
+    table = botapi.InternTable(maxsize=5)
+    parse = table._get_parser(botapi.Update.from_result)
+    threads = [threading.Thread(target=lambda: [parse(result) for _ in range(50)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert table.hits + table.misses == 400 * lookups
+    assert all(len(objects) <= 5 for objects in table._tables.values())
@@ -0,0 +1,96 @@
+import json
+import logging
+
+from twx.botapi import botapi
+from twx.botapi.botapi import UpdatePrefilter, _prefilter_updates
+
+from conftest import load_updates
+
+
+COMMANDS = UpdatePrefilter(UpdatePrefilter.COMMANDS)
+
+
+def compact(document):
+    return json.dumps(document, separators=(',', ':')).encode('utf-8')
+
+
+def push_chatter_and_commands(api):
+    chat = dict(id=-5, type='supergroup')
+    api.push_update(dict(message=dict(message_id=1, date=0, chat=chat, text='chatter')))
+    api.push_update(dict(message=dict(message_id=2, date=0, chat=chat, text='/go',
+                                      entities=[dict(offset=0, length=3, type='bot_command')])))
+    api.push_update(dict(message=dict(message_id=3, date=0, chat=chat, text='more chatter')))
+
+
+def test_rejected_updates_keep_their_update_id(api, make_bot):
+    push_chatter_and_commands(api)
+    updates = make_bot(prefilter=COMMANDS).get_updates().wait(5)
+
+    assert [update.update_id for update in updates] == [1, 2, 3]
+    assert updates[0].message is None and updates[2].message is None
+    assert updates[1].message.text == '/go'
+
+
+def test_accepted_updates_match_the_unfiltered_ones(api, make_bot):
+    push_chatter_and_commands(api)
+    filtered = make_bot(prefilter=UpdatePrefilter(b'chatter')).get_updates().wait(5)
+    unfiltered = make_bot().get_updates().wait(5)
+    assert filtered[0] == unfiltered[0] and filtered[2] == unfiltered[2]
+
+
+def test_split_of_a_compact_response():
+    document = load_updates()
+    updates = _prefilter_updates(compact(document), lambda data: True, botapi._default_json_codec)
+    assert updates == document['result']
+
+
+def test_empty_response(api, make_bot):
+    assert _prefilter_updates(b'{"ok":true,"result":[]}', COMMANDS, botapi._default_json_codec) == []
+    assert make_bot(prefilter=COMMANDS).get_updates().wait(5) == []
+
+
+class PrettyTransport(botapi.LoopbackTransport):
+    """Answers with indented JSON, which the prefilter cannot split"""
+
+    def send(self, request, timeout=None):
+        resp = super(PrettyTransport, self).send(request, timeout)
+        content = json.dumps(json.loads(resp.content.decode('utf-8')), indent=2).encode('utf-8')
+        return botapi.TransportResponse(resp.status_code, content=content)
+
+
+def test_other_layouts_are_decoded_in_full(api, make_bot, caplog):
+    push_chatter_and_commands(api)
+    bot = make_bot(prefilter=COMMANDS, transport=PrettyTransport(api))
+    with caplog.at_level(logging.DEBUG, logger='twx.botapi'):
+        updates = bot.get_updates().wait(5)
+
+    assert [update.message.text for update in updates] == ['chatter', '/go', 'more chatter']
+    assert 'not laid out compactly' in caplog.text
+
+
+def test_unsplittable_bodies_are_left_to_the_decoder():
+    codec = botapi._default_json_codec
+    for content in (b'{"ok":true,"result":[{"update_id":1,"message":{}}],"x":1}', b'{"result":[],"ok":true}',
+                    b'{"ok":true,"result":[{"message":{},"update_id":1}]}'):
+        assert _prefilter_updates(content, COMMANDS, codec) is None
+
+
+def test_errors_are_not_prefiltered(api, make_bot):
+    def conflict(token, params, files):
+        raise botapi.FakeBotAPI.Failure(409, 'Conflict: terminated by other getUpdates request')
+
+    api.methods['getUpdates'] = conflict
+    error = make_bot(prefilter=COMMANDS).get_updates().wait(5)
+    assert error.error_code == 409
+
+
+def test_webhook_updates():
+    command = compact(dict(update_id=7, message=dict(message_id=1, date=0, chat=dict(id=5, type='private'),
+                                                     text='/go', entities=[dict(offset=0, length=3,
+                                                                                type='bot_command')])))
+    chatter = compact(dict(update_id=8, message=dict(message_id=2, date=0, chat=dict(id=5, type='private'),
+                                                     text='hi')))
+    assert botapi.parse_webhook_update(chatter, prefilter=COMMANDS) is None
+    update = botapi.parse_webhook_update(command, prefilter=COMMANDS)
+    assert update.update_id == 7 and update.message.text == '/go'
+    assert botapi.parse_webhook_update(chatter).message.text == 'hi'
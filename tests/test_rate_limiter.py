@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from twx.botapi import botapi
+from twx.botapi.botapi import Priority, RateLimiter
+
+
+def reserve(limiter, chat_id=None, priority=Priority.NORMAL, method='sendMessage'):
+    params = {} if chat_id is None else {'chat_id': chat_id}
+    return limiter.reserve(method, params, priority)
+
+
+def test_calls_to_one_chat_are_spaced_by_its_limit(clock):
+    limiter = RateLimiter(private_limit=(1, 1))
+    delays = [reserve(limiter, 5) for _ in range(3)]
+    assert delays == pytest.approx([0, 1, 2], abs=1e-6)
+
+
+def test_group_chats_use_the_group_limit(clock):
+    limiter = RateLimiter(group_limit=(20, 60))
+    delays = [reserve(limiter, -100) for _ in range(3)]
+    assert delays == pytest.approx([0, 3, 6], abs=1e-6)
+
+
+def test_other_chats_take_the_free_global_slots(clock):
+    limiter = RateLimiter(global_limit=(30, 1), private_limit=(1, 1))
+    reserve(limiter, 5)
+    reserve(limiter, 5)  # 1 second later
+    assert reserve(limiter, 6) == pytest.approx(1 / 30.0, abs=1e-6)
+    assert reserve(limiter, 7) == pytest.approx(2 / 30.0, abs=1e-6)
+
+
+def test_calls_are_spaced_by_the_global_limit(clock):
+    limiter = RateLimiter(global_limit=(10, 1))
+    delays = [reserve(limiter) for _ in range(5)]
+    assert delays == pytest.approx([0, 0.1, 0.2, 0.3, 0.4], abs=1e-6)
+
+
+def test_global_slots_free_up_as_time_passes(clock):
+    limiter = RateLimiter(global_limit=(10, 1))
+    for _ in range(5):
+        reserve(limiter)
+    clock.advance(1)
+    assert reserve(limiter) == pytest.approx(0, abs=1e-6)
+
+
+def test_bulk_calls_leave_headroom(clock):
+    limiter = RateLimiter(global_limit=(10, 1), bulk_headroom=0.2)  # every 5th slot is kept free
+    bulk = [reserve(limiter, priority=Priority.BULK) for _ in range(8)]
+    slots = [int(round((clock.now + delay) * 10)) for delay in bulk]
+    assert all(slot % 5 for slot in slots)
+    assert len(set(slots)) == 8
+
+    assert reserve(limiter) == pytest.approx(0, abs=1e-6)  # A normal call does not queue behind the broadcast
+
+
+def test_methods_not_posting_messages_are_not_limited(clock):
+    limiter = RateLimiter(private_limit=(1, 60))
+    for method in ('sendChatAction', 'getMe', 'getUpdates', 'answerCallbackQuery'):
+        assert reserve(limiter, 5, method=method) == 0
+        assert reserve(limiter, 5, method=method) == 0
+    assert reserve(limiter, 5, method='forwardMessage') == pytest.approx(0, abs=1e-6)
+    assert reserve(limiter, 5, method='sendPhoto') == pytest.approx(60, abs=1e-6)
+
+
+def test_idle_chats_are_dropped(clock):
+    limiter = RateLimiter(private_limit=(1, 1))
+    for chat_id in range(1, 50):
+        reserve(limiter, chat_id)
+    clock.advance(5)
+    reserve(limiter)
+    assert not limiter._chats
+
+
+def test_requests_are_sent_spaced(api, make_bot):
+    sent = []
+    send_message = api.methods['sendMessage']
+
+    def record(token, params, files):
+        sent.append(time.time())
+        return send_message(token, params, files)
+
+    api.methods['sendMessage'] = record
+    bot = make_bot(rate_limiter=RateLimiter(private_limit=(1, 0.2)))
+    requests = [bot.send_message(5, str(i)) for i in range(3)]
+    for request in requests:
+        assert isinstance(request.wait(5), botapi.Message)
+
+    assert [params['text'] for params in api.sent] == ['0', '1', '2']
+    assert sent[1] - sent[0] >= 0.15
+    assert sent[2] - sent[1] >= 0.15
@@ -0,0 +1,128 @@
+import io
+import threading
+import time
+
+import pytest
+
+from twx.botapi import botapi
+from twx.botapi.botapi import RateLimiter
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+def test_request_timeout(make_bot, api):
+    api.latency = 0.3
+    bot = make_bot(request_timeout=0.05)
+    error = bot.get_me().wait(5)
+    assert isinstance(error, botapi.RequestTimeout)
+
+
+def test_deadline_while_waiting_for_the_rate_limiter(make_bot, api):
+    bot = make_bot(rate_limiter=RateLimiter(private_limit=(1, 0.5)))
+    assert isinstance(bot.send_message(5, 'first').wait(5), botapi.Message)
+
+    error = bot.send_message(5, 'second', deadline=0.1).wait(5)
+    assert isinstance(error, botapi.RequestTimeout)
+    assert [params['text'] for params in api.sent] == ['first']
+
+
+def test_cancel_while_waiting_for_the_rate_limiter(make_bot, api):
+    bot = make_bot(rate_limiter=RateLimiter(private_limit=(1, 30)))
+    bot.send_message(5, 'first').wait(5)
+
+    results = []
+    request = bot.send_message(5, 'second', on_success=results.append, on_error=results.append)
+    assert request._timer_entry in botapi._timer._heap
+    assert request.cancel()
+    assert request._timer_entry not in botapi._timer._heap  # Not kept until it is due
+
+    assert isinstance(request.wait(1), botapi.RequestCancelled)
+    assert request.future.cancelled()
+    assert results == []
+    assert len(api.sent) == 1
+
+
+def test_cancel_while_sending(make_bot, api):
+    api.latency = 0.5
+    bot = make_bot()
+    results = []
+    request = bot.get_me(on_success=results.append)
+    time.sleep(0.1)
+    started = time.time()
+    assert request.cancel()
+    assert isinstance(request.wait(5), botapi.RequestCancelled)
+    assert time.time() - started < 0.3
+    time.sleep(0.6)
+    assert results == []  # The response was discarded
+
+
+def test_timer_shutdown_cancels_far_off_calls():
+    timer = botapi._Timer()
+    ran, cancelled = [], []
+    timer.call_later(0, lambda: ran.append('due'), lambda: cancelled.append('due'))
+    entry = timer.call_later(60, lambda: ran.append('far'), lambda: cancelled.append('far'))
+    timer.call_later(60, lambda: ran.append('dropped'), lambda: cancelled.append('dropped'))
+    timer.cancel(entry)
+
+    started = time.time()
+    timer.shutdown()
+    assert time.time() - started < 1
+    assert ran == ['due']
+    assert cancelled == ['dropped']
+
+    timer.call_later(1, lambda: ran.append('late'), lambda: cancelled.append('late'))
+    assert cancelled == ['dropped', 'late']
+
+
+class _SlowServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _SlowBody(BaseHTTPRequestHandler):
+    """Sends the headers of a large body, then a few bytes every now and then"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(10 ** 6))
+        self.end_headers()
+        try:
+            for _ in range(50):
+                self.wfile.write(b'x' * 10)
+                self.wfile.flush()
+                time.sleep(0.2)
+        except (IOError, OSError):
+            pass  # Aborted by the client
+
+
+@pytest.fixture
+def slow_server():
+    server = _SlowServer(('127.0.0.1', 0), _SlowBody)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:{0}/'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('transport', [botapi.RequestsTransport, botapi.Urllib3Transport])
+def test_cancel_aborts_a_download(slow_server, transport):
+    out = io.BytesIO()
+    request = botapi.TelegramDownloadRequest('file', out, '1:token', transport=transport(),
+                                             download_url_base=slow_server + 'file/bot').run()
+    time.sleep(0.3)
+    assert not request._done.is_set()  # Receiving the body
+
+    assert request.cancel()
+    request.thread.join(2)
+    assert not request.thread.is_alive()  # Not still reading the rest of the body
+    assert isinstance(request.wait(), botapi.RequestCancelled)
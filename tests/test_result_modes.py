@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from twx.botapi import botapi
+from twx.botapi.botapi import ResultMode
+
+
+@pytest.fixture
+def bot(api, make_bot):
+    chat = dict(id=5, type='private')
+    api.push_update(dict(message=dict(message_id=1, date=0, chat=chat, text='hi', **{'from': dict(
+        id=5, is_bot=False, first_name='Ann')})))
+    api.push_update(dict(callback_query=dict(id='cb', chat_instance='ci', data='x', **{'from': dict(
+        id=5, is_bot=False, first_name='Ann'), 'message': dict(message_id=2, date=0, chat=chat, text='pick')})))
+    return make_bot()
+
+
+def test_typed(bot):
+    updates = bot.get_updates(result_mode=ResultMode.TYPED).wait(5)
+    assert all(type(update) is botapi.Update for update in updates)
+    assert type(updates[0].message) is botapi.Message
+    assert type(updates[0].message.sender) is botapi.User
+
+
+def test_lazy(bot):
+    typed = bot.get_updates().wait(5)
+    updates = bot.get_updates(result_mode=ResultMode.LAZY).wait(5)
+    assert all(type(update) is botapi.LazyUpdate for update in updates)
+    assert type(updates[0].message) is botapi.LazyMessage
+    assert updates[0].message == typed[0].message
+    assert updates[1].callback_query == typed[1].callback_query
+
+
+def test_compact(bot):
+    typed = bot.get_updates().wait(5)
+    updates = bot.get_updates(result_mode=ResultMode.COMPACT).wait(5)
+    assert isinstance(updates[0].message, botapi.CompactMessage)
+    assert isinstance(updates[1].callback_query.message, botapi.CompactMessage)
+    assert updates[0].message == typed[0].message
+    assert updates[0].message.photo is None
+
+
+def test_raw(bot, api):
+    updates = bot.get_updates(result_mode=ResultMode.RAW).wait(5)
+    assert updates == [dict(update) for update in api._updates]
+    assert [botapi.Update.from_dict(update) for update in updates] == bot.get_updates().wait(5)
+
+
+def test_bytes(bot, api):
+    content = bot.get_updates(result_mode=ResultMode.BYTES).wait(5)
+    assert isinstance(content, bytes)
+    assert json.loads(content.decode('utf-8')) == dict(ok=True, result=[dict(update) for update in api._updates])
+
+
+def test_bytes_errors_are_decoded(bot):
+    error = bot.get_file('missing', result_mode=ResultMode.BYTES).wait(5)
+    assert isinstance(error, botapi.Error) and error.error_code == 400
+
+
+def test_modes_by_name(bot):
+    assert type(bot.get_me(result_mode='raw').wait(5)) is dict
+    bot.result_mode = ResultMode.LAZY
+    assert type(bot.get_updates().wait(5)[0]) is botapi.LazyUpdate
@@ -0,0 +1,112 @@
+import pytest
+
+from twx.botapi import botapi
+from twx.botapi.botapi import RetryPolicy
+
+from conftest import FailingTransport, fail_first
+
+
+def test_server_errors_are_retried(api, make_bot):
+    calls = fail_first(api, 'sendMessage', (502, 'Bad Gateway'), (500, 'Internal Server Error'))
+    bot = make_bot(retry_policy=RetryPolicy(backoff=0.01))
+    result = bot.send_message(5, 'hi').wait(5)
+    assert isinstance(result, botapi.Message)
+    assert len(calls) == 3
+    assert len(api.sent) == 1
+
+
+def test_client_errors_are_not_retried(api, make_bot):
+    calls = fail_first(api, 'sendMessage', (400, 'Bad Request: chat not found'))
+    bot = make_bot(retry_policy=RetryPolicy(backoff=0.01))
+    error = bot.send_message(5, 'hi').wait(5)
+    assert isinstance(error, botapi.Error)
+    assert error.error_code == 400
+    assert len(calls) == 1
+
+
+def test_attempts_are_limited(api, make_bot):
+    calls = fail_first(api, 'getMe', *[(500, 'Internal Server Error')] * 5)
+    bot = make_bot(retry_policy=RetryPolicy(max_attempts=3, backoff=0.01))
+    error = bot.get_me().wait(5)
+    assert error.error_code == 500
+    assert len(calls) == 3
+
+
+def test_flood_control_waits_retry_after(api, make_bot):
+    calls = fail_first(api, 'sendMessage', (429, 'Too Many Requests: retry after 1', {'retry_after': 1}))
+    bot = make_bot(retry_policy=RetryPolicy(backoff=0.01))
+    request = bot.send_message(5, 'hi')
+    assert request.join(0.5) is request and not request._done.is_set()  # Still waiting out the flood control
+    assert isinstance(request.wait(5), botapi.Message)
+    assert len(calls) == 2
+
+
+def test_retry_after_is_used_as_the_delay():
+    error = botapi.Error.from_result(dict(ok=False, error_code=429, description='Too Many Requests',
+                                          parameters=dict(retry_after=7)))
+    assert RetryPolicy().get_delay(1, error, 0, 'sendMessage') == 7
+
+
+def test_migrated_groups_are_retried_against_the_supergroup(api, make_bot):
+    calls = fail_first(api, 'sendMessage', (400, 'Bad Request: group chat was upgraded to a supergroup chat',
+                                            {'migrate_to_chat_id': -1001234}))
+    bot = make_bot(retry_policy=RetryPolicy(backoff=0.01))
+    message = bot.send_message(-5, 'hi').wait(5)
+    assert message.chat.id == -1001234
+    assert [call['chat_id'] for call in calls] == [-5, -1001234]
+
+
+def test_the_deadline_stops_retries(api, make_bot):
+    calls = fail_first(api, 'getMe', *[(500, 'Internal Server Error')] * 10)
+    bot = make_bot(retry_policy=RetryPolicy(max_attempts=10, backoff=0.2, deadline=0.1))
+    error = bot.get_me().wait(5)
+    assert error.error_code == 500
+    assert len(calls) < 10
+
+
+@pytest.mark.parametrize('error', [botapi.ConnectError('refused'), botapi.ConnectTimeout('connect timed out')])
+def test_connect_errors_are_retried_for_any_method(api, make_bot, error):
+    transport = FailingTransport(api, error)
+    bot = make_bot(transport=transport, retry_policy=RetryPolicy(backoff=0.01))
+    assert isinstance(bot.send_message(5, 'hi').wait(5), botapi.Message)
+    assert transport.sends == 2
+    assert len(api.sent) == 1
+
+
+@pytest.mark.parametrize('error', [botapi.RequestTimeout('read timed out'), IOError('Connection reset by peer')])
+def test_non_idempotent_methods_are_not_sent_twice(api, make_bot, error):
+    transport = FailingTransport(api, error)
+    bot = make_bot(transport=transport, retry_policy=RetryPolicy(backoff=0.01))
+    assert bot.send_message(5, 'hi').wait(5) is error
+    assert transport.sends == 1
+
+
+def test_idempotent_methods_are_retried_after_transport_errors(api, make_bot):
+    transport = FailingTransport(api, botapi.RequestTimeout('read timed out'))
+    bot = make_bot(transport=transport, retry_policy=RetryPolicy(backoff=0.01))
+    assert isinstance(bot.get_me().wait(5), botapi.User)
+    assert transport.sends == 2
+
+
+def test_idempotent_methods_can_be_listed():
+    policy = RetryPolicy(idempotent_methods={'sendChatAction'})
+    timeout = botapi.RequestTimeout('read timed out')
+    assert policy.get_delay(1, timeout, 0, 'sendChatAction') is not None
+    assert policy.get_delay(1, timeout, 0, 'getMe') is None
+
+
+def test_each_retry_reserves_a_rate_limiter_slot(api, make_bot):
+    class Limiter(object):
+        def __init__(self):
+            self.reserved = []
+
+        def reserve(self, api_method, params, priority):
+            self.reserved.append(params.get('chat_id'))
+            return 0
+
+    fail_first(api, 'sendMessage', (500, 'Internal Server Error'),
+               (400, 'Bad Request: group chat was upgraded to a supergroup chat', {'migrate_to_chat_id': -1009}))
+    limiter = Limiter()
+    bot = make_bot(rate_limiter=limiter, retry_policy=RetryPolicy(backoff=0.01))
+    bot.send_message(-5, 'hi').wait(5)
+    assert limiter.reserved == [-5, -5, -1009]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from twx.botapi import botapi
+from twx.botapi.botapi import _JSONArrayStream
+
+from conftest import load_updates
+
+
+def feed_all(chunks):
+    stream = _JSONArrayStream('result')
+    elements = []
+    for chunk in chunks:
+        elements.extend(stream.feed(chunk))
+    elements.extend(stream.feed(b'', final=True))
+    return elements, stream.members
+
+
+DOCUMENT = json.dumps(load_updates(), ensure_ascii=False).encode('utf-8')
+
+
+def test_whole_document():
+    elements, members = feed_all([DOCUMENT])
+    assert elements == load_updates()['result']
+    assert members == {'ok': True}
+
+
+def test_every_split_point():
+    expected = load_updates()['result']
+    for i in range(0, len(DOCUMENT) + 1, 7):
+        assert feed_all([DOCUMENT[:i], DOCUMENT[i:]])[0] == expected
+
+
+def test_split_inside_a_character():
+    document = json.dumps({'ok': True, 'result': [{'text': u'café ☃'}]}, ensure_ascii=False).encode('utf-8')
+    start = document.index(u'☃'.encode('utf-8'))
+    for i in range(start, start + 3):
+        assert feed_all([document[:i], document[i:]])[0] == [{'text': u'café ☃'}]
+
+
+def test_byte_by_byte():
+    document = b' { "ok" : true , "result" : [ {"update_id": 1} ,\n{"update_id": 2} ] , "description": "x" } '
+    elements, members = feed_all([document[i:i + 1] for i in range(len(document))])
+    assert elements == [{'update_id': 1}, {'update_id': 2}]
+    assert members == {'ok': True, 'description': 'x'}
+
+
+def test_elements_are_yielded_as_soon_as_they_are_complete():
+    stream = _JSONArrayStream('result')
+    assert list(stream.feed(b'{"ok":true,"result":[{"update_id":1},{"upd')) == [{'update_id': 1}]
+    assert list(stream.feed(b'ate_id":2}')) == []  # The array might still go on with a comma
+    assert list(stream.feed(b']}')) == [{'update_id': 2}]
+
+
+def test_empty_array():
+    assert feed_all([b'{"ok":true,"result":[]}']) == ([], {'ok': True})
+
+
+def test_error_response():
+    assert feed_all([b'{"ok":false,"error_code":409,"description":"Conflict"}']) == \
+        ([], {'ok': False, 'error_code': 409, 'description': 'Conflict'})
+
+
+@pytest.mark.parametrize('document', [b'{"ok":true,"result":[{"update_id":1}', b'[1, 2]', b'{"ok" true}'])
+def test_invalid_documents(document):
+    with pytest.raises(ValueError):
+        feed_all([document])
+
+
+def push_messages(api, *texts):
+    for i, text in enumerate(texts):
+        api.push_update(dict(message=dict(message_id=i + 1, date=0, chat=dict(id=5, type='private'), text=text)))
+
+
+def test_streamed_updates(api, make_bot):
+    push_messages(api, 'a', 'b', 'c')
+    bot = make_bot()
+    received = []
+    request = bot.get_updates(on_update=received.append)
+    last = request.wait(5)
+
+    assert [update.message.text for update in received] == ['a', 'b', 'c']
+    assert last is received[-1]
+    assert request.params['offset'] == last.update_id + 1
+
+
+def test_streamed_updates_match_the_regular_response(api, make_bot):
+    push_messages(api, 'a', 'b')
+    bot = make_bot()
+    received = []
+    bot.get_updates(on_update=received.append).wait(5)
+    assert received == bot.get_updates().wait(5)
+
+
+def test_streamed_updates_reject_bytes(make_bot):
+    with pytest.raises(ValueError):
+        make_bot().get_updates(on_update=lambda update: None, result_mode=botapi.ResultMode.BYTES)
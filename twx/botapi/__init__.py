@@ -1,2 +1,6 @@
+import sys
+
 from . botapi import *
 
+if sys.version_info >= (3, 5):
+    from . aio import AsyncTelegramBot, UpdatePoller
@@ -0,0 +1,762 @@
+# -*- coding: utf-8 -*-
+"""asyncio client for the Telegram Bot API
+
+The API methods and result types are shared with :mod:`twx.botapi.botapi`; only the transport differs. Requires
+`aiohttp <https://aiohttp.readthedocs.io/>`_ (``pip install twx.botapi[async]``).
+"""
+import os
+import asyncio
+import logging
+import threading
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from . import botapi
+from .botapi import RequestMethod
+
+
+class AsyncTelegramBot(object):
+    """An asyncio counterpart of :class:`twx.botapi.TelegramBot`.
+
+    Every API method returns an awaitable that resolves to the result, or to an :class:`twx.botapi.Error` if the
+    call failed, just like :meth:`twx.botapi.TelegramBotRPCRequest.wait`. Calls do not tie up a thread while in
+    flight, so a single event loop can keep thousands of them going at once. Cancelling the task awaiting a call
+    aborts its HTTP request.
+
+    Attributes:
+        token (str) :The api token generated by BotFather
+        request_method (`RequestMethod` or `str`) :*Optional.* The http method to use
+                                                    (e.g. 'POST' or RequestMethod.POST')
+        session (`aiohttp.ClientSession`) :*Optional.* The session every request of this bot is sent through. Pass
+                                           the same session to several bots to share one connection pool. When
+                                           omitted, a session is created on first use and closed by :meth:`close`
+        limit (int) :*Optional.* The maximum number of simultaneous connections. Ignored if ``session`` is given
+        limit_per_host (int) :*Optional.* The maximum number of simultaneous connections to one host, ``0`` for no
+                              limit. Ignored if ``session`` is given
+        api_url_base (str) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        download_url_base (str) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        local_files (bool) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        rate_limiter (`RateLimiter`) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        retry_policy (`RetryPolicy`) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        request_timeout (float or tuple) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        deadline (float) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        circuit_breaker (`CircuitBreaker`) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        result_mode (`ResultMode`) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        json_codec (`JSONCodec`) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        intern_table (`InternTable`) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        projection (`Projection`) :*Optional.* See :class:`twx.botapi.TelegramBot`
+        prefilter (`UpdatePrefilter`) :*Optional.* See :class:`twx.botapi.TelegramBot`
+
+    :example:
+
+    ::
+
+        async def main():
+            async with AsyncTelegramBot('<API TOKEN>') as bot:
+                await bot.update_bot_info()
+                await asyncio.gather(*(bot.send_message(chat_id, 'hello') for chat_id in chat_ids))
+
+    """
+
+    def __init__(self, token, request_method=RequestMethod.POST, session=None, limit=100, limit_per_host=0,
+                 api_url_base=None, download_url_base=None, local_files=False, rate_limiter=None,
+                 retry_policy=None, request_timeout=None, deadline=None, circuit_breaker=None,
+                 result_mode=botapi.ResultMode.TYPED, json_codec=None, intern_table=None, projection=None,
+                 prefilter=None):
+        if aiohttp is None:
+            raise ImportError('AsyncTelegramBot requires aiohttp')
+
+        self._bot_user = None
+        self._session = session
+        self._owns_session = session is None
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.download_url_base = download_url_base
+        self.local_files = local_files
+
+        self.request_args = dict(
+            token=token,
+            request_method=request_method,
+            api_url_base=api_url_base,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            request_timeout=request_timeout,
+            deadline=deadline,
+            circuit_breaker=circuit_breaker,
+            result_mode=result_mode,
+            json_codec=json_codec,
+            intern_table=intern_table,
+            projection=projection,
+            prefilter=prefilter,
+        )
+
+    def __str__(self):
+        return self.token
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close the session, if it was created by this bot"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _merge_overrides(self, **kwargs):
+        ra = self.request_args.copy()
+        ra.update(kwargs)
+        return ra
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    @staticmethod
+    def _get_form(request):
+        form = aiohttp.FormData()
+        for name, value in botapi._form_fields(request.params):
+            form.add_field(name, value)
+        for input_file in request.files or ():
+            file_info = input_file.file_info
+            form.add_field(input_file.form, file_info.fp, filename=file_info.file_name,
+                           content_type=file_info.mime_type)
+        return form
+
+    @staticmethod
+    def _get_timeout(request):
+        timeout = request._get_timeout()
+        if timeout is None:
+            return aiohttp.ClientTimeout(total=None)
+        total = None if request._deadline is None else max(request._deadline - botapi._monotonic(), 0.001)
+        return aiohttp.ClientTimeout(total=total, sock_connect=timeout[0], sock_read=timeout[1])
+
+    async def _send(self, request):
+        if request.request_method == RequestMethod.GET:
+            context = self._get_session().get(request._get_url(), params=botapi._form_fields(request.params),
+                                              timeout=self._get_timeout(request))
+        else:
+            context = self._get_session().post(request._get_url(), data=self._get_form(request),
+                                               timeout=self._get_timeout(request))
+
+        try:
+            async with context as resp:
+                content = await resp.read()
+        except aiohttp.ConnectionTimeoutError as e:
+            raise botapi.ConnectTimeout(str(e) or 'Connection timed out')
+        except aiohttp.ClientConnectorError as e:
+            raise botapi.ConnectError(str(e))
+        except asyncio.TimeoutError as e:
+            raise botapi.RequestTimeout(str(e) or 'Request timed out')
+
+        request._handle_response(resp.status, content)
+
+    async def _call(self, request):
+        request._start()
+        breaker = request.circuit_breaker
+        if breaker is not None and breaker.state(request.api_method) == botapi.CircuitBreaker.OPEN:
+            delay = None
+            request.error = request._circuit_error()
+        else:
+            delay = request._reserve()
+
+        try:
+            while delay is not None:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                if not request._check_deadline() and request._acquire_circuit():
+                    sent = botapi._monotonic()
+                    try:
+                        await self._send(request)
+                    except Exception as e:
+                        request.error = e
+                    except BaseException:  # Cancelled while sending
+                        request._release_circuit()
+                        raise
+                    request._record_circuit(sent)
+
+                delay = request._retry_delay()
+                if delay is not None:
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    delay = request._reserve()  # Every attempt takes a slot, for the chat it is sent to now
+        except asyncio.CancelledError:
+            request.cancel()  # The task was cancelled, which aborts the HTTP request
+            raise
+
+        request._finish()
+
+        if request.error is not None:
+            return request.error
+        return request.result
+
+    def get_me(self, *args, **kwargs):
+        """See :func:`twx.botapi.get_me`"""
+        return self._call(botapi.get_me(*args, **self._merge_overrides(**kwargs)))
+
+    def answer_inline_query(self, *args, **kwargs):
+        """See :func:`twx.botapi.answer_inline_query`"""
+        return self._call(botapi.answer_inline_query(*args, **self._merge_overrides(**kwargs)))
+
+    def answer_callback_query(self, *args, **kwargs):
+        """See :func:`twx.botapi.answer_callback_query`"""
+        return self._call(botapi.answer_callback_query(*args, **self._merge_overrides(**kwargs)))
+
+    def export_chat_invite_link(self, *args, **kwargs):
+        """See :func:`twx.botapi.export_chat_invite_link`"""
+        return self._call(botapi.export_chat_invite_link(*args, **self._merge_overrides(**kwargs)))
+
+    def set_chat_photo(self, *args, **kwargs):
+        """See :func:`twx.botapi.set_chat_photo`"""
+        return self._call(botapi.set_chat_photo(*args, **self._merge_overrides(**kwargs)))
+
+    def delete_chat_photo(self, *args, **kwargs):
+        """See :func:`twx.botapi.delete_chat_photo`"""
+        return self._call(botapi.delete_chat_photo(*args, **self._merge_overrides(**kwargs)))
+
+    def set_chat_title(self, *args, **kwargs):
+        """See :func:`twx.botapi.set_chat_title`"""
+        return self._call(botapi.set_chat_title(*args, **self._merge_overrides(**kwargs)))
+
+    def set_chat_description(self, *args, **kwargs):
+        """See :func:`twx.botapi.set_chat_description`"""
+        return self._call(botapi.set_chat_description(*args, **self._merge_overrides(**kwargs)))
+
+    def pin_chat_message(self, *args, **kwargs):
+        """See :func:`twx.botapi.pin_chat_message`"""
+        return self._call(botapi.pin_chat_message(*args, **self._merge_overrides(**kwargs)))
+
+    def unpin_chat_message(self, *args, **kwargs):
+        """See :func:`twx.botapi.unpin_chat_message`"""
+        return self._call(botapi.unpin_chat_message(*args, **self._merge_overrides(**kwargs)))
+
+    def send_message(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_message`"""
+        return self._call(botapi.send_message(*args, **self._merge_overrides(**kwargs)))
+
+    def forward_message(self, *args, **kwargs):
+        """See :func:`twx.botapi.forward_message`"""
+        return self._call(botapi.forward_message(*args, **self._merge_overrides(**kwargs)))
+
+    def send_photo(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_photo`"""
+        return self._call(botapi.send_photo(*args, **self._merge_overrides(**kwargs)))
+
+    def send_audio(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_audio`"""
+        return self._call(botapi.send_audio(*args, **self._merge_overrides(**kwargs)))
+
+    def send_document(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_document`"""
+        return self._call(botapi.send_document(*args, **self._merge_overrides(**kwargs)))
+
+    def send_sticker(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_sticker`"""
+        return self._call(botapi.send_sticker(*args, **self._merge_overrides(**kwargs)))
+
+    def send_video(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_video`"""
+        return self._call(botapi.send_video(*args, **self._merge_overrides(**kwargs)))
+
+    def send_video_note(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_video_note`"""
+        return self._call(botapi.send_video_note(*args, **self._merge_overrides(**kwargs)))
+
+    def send_voice(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_voice`"""
+        return self._call(botapi.send_voice(*args, **self._merge_overrides(**kwargs)))
+
+    def send_media_group(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_media_group`"""
+        return self._call(botapi.send_media_group(*args, **self._merge_overrides(**kwargs)))
+
+    def send_location(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_location`"""
+        return self._call(botapi.send_location(*args, **self._merge_overrides(**kwargs)))
+
+    def edit_message_live_location(self, *args, **kwargs):
+        """See :func:`twx.botapi.edit_message_live_location`"""
+        return self._call(botapi.edit_message_live_location(*args, **self._merge_overrides(**kwargs)))
+
+    def stop_message_live_location(self, *args, **kwargs):
+        """See :func:`twx.botapi.stop_message_live_location`"""
+        return self._call(botapi.stop_message_live_location(*args, **self._merge_overrides(**kwargs)))
+
+    def send_venue(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_venue`"""
+        return self._call(botapi.send_venue(*args, **self._merge_overrides(**kwargs)))
+
+    def send_contact(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_contact`"""
+        return self._call(botapi.send_contact(*args, **self._merge_overrides(**kwargs)))
+
+    def send_chat_action(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_chat_action`"""
+        return self._call(botapi.send_chat_action(*args, **self._merge_overrides(**kwargs)))
+
+    def get_user_profile_photos(self, *args, **kwargs):
+        """See :func:`twx.botapi.get_user_profile_photos`"""
+        return self._call(botapi.get_user_profile_photos(*args, **self._merge_overrides(**kwargs)))
+
+    def get_chat_member(self, *args, **kwargs):
+        """See :func:`twx.botapi.get_chat_member`"""
+        return self._call(botapi.get_chat_member(*args, **self._merge_overrides(**kwargs)))
+
+    def get_chat_members_count(self, *args, **kwargs):
+        """See :func:`twx.botapi.get_chat_members_count`"""
+        return self._call(botapi.get_chat_members_count(*args, **self._merge_overrides(**kwargs)))
+
+    def get_chat_administrators(self, *args, **kwargs):
+        """See :func:`twx.botapi.get_chat_administrators`"""
+        return self._call(botapi.get_chat_administrators(*args, **self._merge_overrides(**kwargs)))
+
+    def leave_chat(self, *args, **kwargs):
+        """See :func:`twx.botapi.leave_chat`"""
+        return self._call(botapi.leave_chat(*args, **self._merge_overrides(**kwargs)))
+
+    def get_file(self, *args, **kwargs):
+        """See :func:`twx.botapi.get_file`"""
+        return self._call(botapi.get_file(*args, **self._merge_overrides(**kwargs)))
+
+    def send_game(self, *args, **kwargs):
+        """See :func:`twx.botapi.send_game`"""
+        return self._call(botapi.send_game(*args, **self._merge_overrides(**kwargs)))
+
+    def get_game_high_scores(self, *args, **kwargs):
+        """See :func:`twx.botapi.get_game_high_scores`"""
+        return self._call(botapi.get_game_high_scores(*args, **self._merge_overrides(**kwargs)))
+
+    def delete_message(self, *args, **kwargs):
+        """See :func:`twx.botapi.delete_message`"""
+        return self._call(botapi.delete_message(*args, **self._merge_overrides(**kwargs)))
+
+    def edit_message_text(self, *args, **kwargs):
+        """See :func:`twx.botapi.edit_message_text`"""
+        return self._call(botapi.edit_message_text(*args, **self._merge_overrides(**kwargs)))
+
+    def edit_message_caption(self, *args, **kwargs):
+        """See :func:`twx.botapi.edit_message_caption`"""
+        return self._call(botapi.edit_message_caption(*args, **self._merge_overrides(**kwargs)))
+
+    def kick_chat_member(self, *args, **kwargs):
+        """See :func:`twx.botapi.kick_chat_member`"""
+        return self._call(botapi.kick_chat_member(*args, **self._merge_overrides(**kwargs)))
+
+    def unban_chat_member(self, *args, **kwargs):
+        """See :func:`twx.botapi.unban_chat_member`"""
+        return self._call(botapi.unban_chat_member(*args, **self._merge_overrides(**kwargs)))
+
+    def restrict_chat_member(self, *args, **kwargs):
+        """See :func:`twx.botapi.restrict_chat_member`"""
+        return self._call(botapi.restrict_chat_member(*args, **self._merge_overrides(**kwargs)))
+
+    def promote_chat_member(self, *args, **kwargs):
+        """See :func:`twx.botapi.promote_chat_member`"""
+        return self._call(botapi.promote_chat_member(*args, **self._merge_overrides(**kwargs)))
+
+    def edit_message_reply_markup(self, *args, **kwargs):
+        """See :func:`twx.botapi.edit_message_reply_markup`"""
+        return self._call(botapi.edit_message_reply_markup(*args, **self._merge_overrides(**kwargs)))
+
+    def get_updates(self, *args, **kwargs):
+        """See :func:`twx.botapi.get_updates`"""
+        return self._call(botapi.get_updates(*args, **self._merge_overrides(**kwargs)))
+
+    def set_webhook(self, *args, **kwargs):
+        """See :func:`twx.botapi.set_webhook`"""
+        return self._call(botapi.set_webhook(*args, **self._merge_overrides(**kwargs)))
+
+    def _update_bot_info(self, response):
+        self._bot_user = response
+
+    def update_bot_info(self):
+        """See :func:`twx.botapi.get_me`.
+
+        After awaiting this, you may access
+        :attr:`id`, :attr:`first_name`, :attr:`last_name` and :attr:`username`.
+        """
+        return self.get_me(on_success=self._update_bot_info)
+
+    async def download_file(self, *args, **kwargs):
+        """See :func:`twx.botapi.download_file`"""
+        kwargs.setdefault('download_url_base', self.download_url_base)
+        kwargs.setdefault('local_files', self.local_files)
+        request = botapi.download_file(*args, **self._merge_overrides(**kwargs))
+
+        request._start()
+        if request.local_files and os.path.isabs(request.file_path):
+            request._async_call()  # Local copy, nothing to wait for
+        else:
+            try:
+                async with self._get_session().get(request._get_url(), timeout=self._get_timeout(request)) as resp:
+                    if not resp.status == 200:
+                        request.error = RuntimeError("Bad HTTP Status Code", resp, resp.status)
+                    elif isinstance(request.out_file, str):
+                        with open(request.out_file, 'w+b') as f:
+                            async for chunk in resp.content.iter_chunked(1024):
+                                f.write(chunk)
+
+                    elif hasattr(request.out_file, 'write'):
+                        async for chunk in resp.content.iter_chunked(1024):
+                            request.out_file.write(chunk)
+            except asyncio.TimeoutError as e:
+                request.error = botapi.RequestTimeout(str(e) or 'Request timed out')
+            except Exception as e:  # The connection failed, or writing the file
+                request.error = e
+
+            request._finish()
+
+        if request.error:
+            return request.error
+        return request.out_file
+
+    async def call_many(self, calls, **kwargs):
+        """See :meth:`twx.botapi.TelegramBot.call_many`. The calls run concurrently within the connection limit
+        of the session and the results are returned in the order of ``calls``."""
+        coros = []
+        for call in calls:
+            call_kwargs = dict(kwargs)
+            if len(call) > 2:
+                call_kwargs.update(call[2])
+            coros.append(getattr(self, call[0])(*call[1], **call_kwargs))
+        return await asyncio.gather(*coros)
+
+    @property
+    def token(self):
+        return self.request_args['token']
+
+    @token.setter
+    def token(self, val):
+        self.request_args['token'] = val
+
+    @property
+    def request_method(self):
+        return self.request_args['request_method']
+
+    @request_method.setter
+    def request_method(self, val):
+        self.request_args['request_method'] = val
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def api_url_base(self):
+        return self.request_args['api_url_base']
+
+    @api_url_base.setter
+    def api_url_base(self, val):
+        self.request_args['api_url_base'] = val
+
+    @property
+    def rate_limiter(self):
+        return self.request_args['rate_limiter']
+
+    @rate_limiter.setter
+    def rate_limiter(self, val):
+        self.request_args['rate_limiter'] = val
+
+    @property
+    def retry_policy(self):
+        return self.request_args['retry_policy']
+
+    @retry_policy.setter
+    def retry_policy(self, val):
+        self.request_args['retry_policy'] = val
+
+    @property
+    def request_timeout(self):
+        return self.request_args['request_timeout']
+
+    @request_timeout.setter
+    def request_timeout(self, val):
+        self.request_args['request_timeout'] = val
+
+    @property
+    def deadline(self):
+        return self.request_args['deadline']
+
+    @deadline.setter
+    def deadline(self, val):
+        self.request_args['deadline'] = val
+
+    @property
+    def circuit_breaker(self):
+        return self.request_args['circuit_breaker']
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, val):
+        self.request_args['circuit_breaker'] = val
+
+    @property
+    def result_mode(self):
+        return self.request_args['result_mode']
+
+    @result_mode.setter
+    def result_mode(self, val):
+        self.request_args['result_mode'] = val
+
+    @property
+    def json_codec(self):
+        return self.request_args['json_codec']
+
+    @json_codec.setter
+    def json_codec(self, val):
+        self.request_args['json_codec'] = val
+
+    @property
+    def intern_table(self):
+        return self.request_args['intern_table']
+
+    @intern_table.setter
+    def intern_table(self, val):
+        self.request_args['intern_table'] = val
+
+    @property
+    def projection(self):
+        return self.request_args['projection']
+
+    @projection.setter
+    def projection(self, val):
+        self.request_args['projection'] = val
+
+    @property
+    def prefilter(self):
+        return self.request_args['prefilter']
+
+    @prefilter.setter
+    def prefilter(self, val):
+        self.request_args['prefilter'] = val
+
+    @property
+    def id(self):
+        if self._bot_user is not None:
+            return self._bot_user.id
+
+    @property
+    def first_name(self):
+        if self._bot_user is not None:
+            return self._bot_user.first_name
+
+    @property
+    def last_name(self):
+        if self._bot_user is not None:
+            return self._bot_user.last_name
+
+    @property
+    def username(self):
+        if self._bot_user is not None:
+            return self._bot_user.username
+
+
+# The settings of a bot its polls are made with; the poller sets the timeouts itself
+_poll_args = ('request_method', 'api_url_base', 'rate_limiter', 'retry_policy', 'circuit_breaker', 'result_mode',
+              'json_codec', 'intern_table', 'projection', 'prefilter')
+
+
+class _Poll(object):
+    __slots__ = ('token', 'request_args', 'handler', 'offset', 'task')
+
+    def __init__(self, token, request_args, handler, offset):
+        self.token = token
+        self.request_args = request_args
+        self.handler = handler
+        self.offset = offset
+        self.task = None
+
+
+class UpdatePoller(object):
+    """Long polls ``getUpdates`` for many bots at once from one event loop.
+
+    Every bot has one long polling request in flight at all times, all sharing one connection pool. Each batch of
+    updates is handed to the handler of its bot, and the bot polls again once the handler has returned, so the
+    updates of one bot are handled in order. Failed polls are repeated with exponential backoff (or after
+    ``retry_after`` when flood limited) and logged to the ``twx.botapi`` logger.
+
+    Handlers are called with the list of :class:`twx.botapi.Update` objects (or what the ``result_mode`` of the
+    bot returns instead). Coroutine functions are awaited; other callables run on ``executor`` if one is given,
+    and on the event loop otherwise, in which case they must not block, e.g. on the ``wait()`` or ``join()`` of
+    synchronous API calls, as that stalls the polls of all bots.
+
+    Polls are made with the settings of the bot passed to :meth:`add_bot` (e.g. its ``result_mode``,
+    ``projection``, ``prefilter``, ``retry_policy`` and ``circuit_breaker``), except for the timeouts.
+
+    :param timeout: The long polling timeout in seconds
+    :param limit: The maximum number of updates per batch
+    :param allowed_updates: See :func:`twx.botapi.get_updates`
+    :param request_timeout: Connect and read timeout on top of the long polling timeout, so a stalled connection
+                            does not stall its bot. See :class:`twx.botapi.TelegramBotRPCRequest`
+    :param session: The session to poll through. When omitted one without a connection limit is created
+    :param executor: The executor plain handlers run on
+    :param max_backoff: The longest time to wait between failed polls
+
+    :type timeout: int
+    :type limit: int
+    :type allowed_updates: list
+    :type request_timeout: float or tuple
+    :type session: aiohttp.ClientSession
+    :type executor: concurrent.futures.Executor
+    :type max_backoff: float
+
+    :example:
+
+    ::
+
+        poller = UpdatePoller(executor=ThreadPoolExecutor(max_workers=8))  # UpdateLoop handlers block
+        for bot in bots:
+            poller.add_bot(bot, UpdateLoop(bot, None).new_updates)
+        poller.start()  # or: await poller.run()
+
+    """
+
+    def __init__(self, timeout=60, limit=100, allowed_updates=None, request_timeout=10, session=None,
+                 executor=None, max_backoff=60):
+        if aiohttp is None:
+            raise ImportError('UpdatePoller requires aiohttp')
+
+        self.timeout = timeout
+        self.limit = limit
+        self.allowed_updates = allowed_updates
+        self.request_timeout = request_timeout
+        self.executor = executor
+        self.max_backoff = max_backoff
+
+        self._session = session
+        self._owns_session = session is None
+        self._polls = {}
+        self._loop = None
+        self._stopped = None
+
+    def add_bot(self, bot, handler, offset=None):
+        """Start polling for a bot. May be called from any thread, also while the poller is running
+
+        :param bot: The bot, or its token
+        :param handler: Called with every batch of updates of the bot
+        :param offset: The first update_id to ask for
+
+        :type bot: twx.botapi.TelegramBot or AsyncTelegramBot or str
+        :type handler: callable
+        :type offset: int
+        """
+        if isinstance(bot, str):
+            poll = _Poll(bot, {}, handler, offset)
+        else:
+            request_args = dict((name, bot.request_args[name]) for name in _poll_args if name in bot.request_args)
+            if request_args.get('result_mode') == botapi.ResultMode.BYTES:
+                raise ValueError('Updates cannot be polled with ResultMode.BYTES')
+            poll = _Poll(bot.token, request_args, handler, offset)
+
+        self.remove_bot(poll.token)
+        self._polls[poll.token] = poll
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._start_poll, poll)
+
+    def remove_bot(self, bot):
+        """Stop polling for a bot
+
+        :param bot: The bot, or its token
+        """
+        poll = self._polls.pop(bot if isinstance(bot, str) else bot.token, None)
+        if poll is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop_poll, poll)
+
+    def __len__(self):
+        return len(self._polls)
+
+    def _start_poll(self, poll):
+        if self._polls.get(poll.token) is poll and poll.task is None:
+            poll.task = asyncio.ensure_future(self._poll(poll))
+
+    @staticmethod
+    def _stop_poll(poll):
+        if poll.task is not None:
+            poll.task.cancel()
+
+    async def run(self):
+        """Poll for all bots until :meth:`stop` is called"""
+        self._loop = asyncio.get_event_loop()
+        self._stopped = asyncio.Event()
+        if self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+
+        try:
+            for poll in list(self._polls.values()):
+                self._start_poll(poll)
+            await self._stopped.wait()
+        finally:
+            polls = list(self._polls.values())
+            for poll in polls:
+                self._stop_poll(poll)
+            await asyncio.gather(*(poll.task for poll in polls if poll.task is not None), return_exceptions=True)
+            for poll in polls:
+                poll.task = None
+
+            self._loop = None
+            if self._owns_session:
+                await self._session.close()
+                self._session = None
+
+    def start(self):
+        """Run the poller on a new event loop in a daemon thread
+
+        :rtype: threading.Thread
+        """
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.run())
+            finally:
+                loop.close()
+
+        thread = threading.Thread(target=run, name='twx.botapi-poller')
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop :meth:`run`. May be called from any thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    async def _poll(self, poll):
+        bot = AsyncTelegramBot(poll.token, session=self._session, request_timeout=self.request_timeout,
+                               **poll.request_args)
+        bot_id = poll.token.split(':')[0]  # Keep the secret out of the log
+        failures = 0
+        while True:
+            updates = await bot.get_updates(offset=poll.offset, limit=self.limit, timeout=self.timeout,
+                                            allowed_updates=self.allowed_updates)
+
+            if isinstance(updates, (botapi.Error, Exception)):
+                failures += 1
+                delay = getattr(updates, 'retry_after', None) or min(self.max_backoff, 0.5 * 2 ** failures)
+                logging.getLogger('twx.botapi').warning('Polling bot %s failed, retrying in %s seconds: %r',
+                                                        bot_id, delay, updates)
+                await asyncio.sleep(delay)
+                continue
+
+            failures = 0
+            if updates:
+                last = updates[-1]  # A dict with ResultMode.RAW
+                poll.offset = (last['update_id'] if isinstance(last, dict) else last.update_id) + 1
+                await self._dispatch(poll, updates)
+
+    async def _dispatch(self, poll, updates):
+        try:
+            if asyncio.iscoroutinefunction(poll.handler):
+                await poll.handler(updates)
+            elif self.executor is not None:
+                await self._loop.run_in_executor(self.executor, poll.handler, updates)
+            else:
+                poll.handler(updates)
+        except Exception:
+            logging.getLogger('twx.botapi').exception('Update handler of bot %s failed', poll.token.split(':')[0])
@@ -6,19 +6,57 @@
 
 """
 import os
-
+import socket
+import math
+import time
+import random
+import heapq
+import atexit
+import logging
+import weakref
+import operator
+import itertools
+import codecs
+import re
+
+import urllib3
 from requests import Request, Session
-from collections import namedtuple
+from requests.adapters import HTTPAdapter
+from requests.exceptions import Timeout as RequestsTimeout, ConnectTimeout as RequestsConnectTimeout
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from collections import namedtuple, deque, OrderedDict
+from concurrent.futures import Executor, Future, as_completed
 from abc import ABCMeta, abstractmethod
-from threading import Thread
+from threading import Thread, Event, Condition, Lock, local, current_thread
 from enum import Enum
 import attr
 
 import json
 
+try:
+    from urllib.parse import urlencode, urlparse
+except ImportError:
+    from urllib import urlencode
+    from urlparse import urlparse
+
 """
 Telegram Bot API Types as defined at https://core.telegram.org/bots/api#available-types
+
+Each type declares its fields once, as the namedtuple field list plus a ``_schema`` describing the fields that are not
+plain JSON values. ``from_result`` and ``from_array_result`` are generated from that by :func:`_generate_parsers`.
 """
+_FieldBase = namedtuple('_Field', ['type', 'key', 'depth'])
+
+
+class _Field(_FieldBase):
+    """Schema entry of a field holding an object of the type named ``type`` (``depth`` 0) or ``depth`` nested
+    lists of them, read from the JSON ``key`` (defaults to the field name)"""
+    __slots__ = ()
+
+    def __new__(cls, type, key=None, depth=0):
+        return _FieldBase.__new__(cls, type, key, depth)
+
+
 _UserBase = namedtuple('User', ['id', 'is_bot', 'first_name', 'last_name', 'username', 'language_code'])
 
 
@@ -35,27 +73,6 @@ class User(_UserBase):
     """
     __slots__ = ()
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return User(
-            id=result.get('id'),
-            is_bot=result.get('is_bot'),
-            first_name=result.get('first_name'),
-            last_name=result.get('last_name'),
-            username=result.get('username'),
-            language_code=result.get('language_code'),
-        )
-
-    @staticmethod
-    def from_array_result(result):
-        if result is None:
-            return None
-
-        return [User.from_result(user) for user in result]
-
 
 _ChatMemberBase = namedtuple('ChatMember', ['user', 'status', 'until_date', 'can_be_edited', 'can_change_info',
                                             'can_post_messages', 'can_edit_messages', 'can_delete_messages', 'can_invite_users',
@@ -88,60 +105,7 @@ class ChatMember(_ChatMemberBase):
 
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return ChatMember(
-            user=User.from_result(result.get('user')),
-            status=result.get('status'),
-            until_date=result.get('until_date'),
-            can_be_edited=result.get('can_be_edited'),
-            can_change_info=result.get('can_change_info'),
-            can_post_messages=result.get('can_post_messages'),
-            can_edit_messages=result.get('can_edit_messages'),
-            can_delete_messages=result.get('can_delete_messages'),
-            can_invite_users=result.get('can_invite_users'),
-            can_restrict_members=result.get('can_restrict_members'),
-            can_pin_messages=result.get('can_pin_messages'),
-            can_promote_members=result.get('can_promote_members'),
-            can_send_messages=result.get('can_send_messages'),
-            can_send_media_messages=result.get('can_send_media_messages'),
-            can_send_other_messages=result.get('can_send_other_messages'),
-            can_add_web_page_previews=result.get('can_add_web_page_previews'),
-        )
-
-    @staticmethod
-    def from_result_list(results):
-        if results is None:
-            return None
-
-        ret = []
-        for result in results:
-            ret.append(
-                ChatMember(
-                    user=User.from_result(result.get('user')),
-                    status=result.get('status'),
-                    until_date=result.get('until_date'),
-                    can_be_edited=result.get('can_be_edited'),
-                    can_change_info=result.get('can_change_info'),
-                    can_post_messages=result.get('can_post_messages'),
-                    can_edit_messages=result.get('can_edit_messages'),
-                    can_delete_messages=result.get('can_delete_messages'),
-                    can_invite_users=result.get('can_invite_users'),
-                    can_restrict_members=result.get('can_restrict_members'),
-                    can_pin_messages=result.get('can_pin_messages'),
-                    can_promote_members=result.get('can_promote_members'),
-                    can_send_messages=result.get('can_send_messages'),
-                    can_send_media_messages=result.get('can_send_media_messages'),
-                    can_send_other_messages=result.get('can_send_other_messages'),
-                    can_add_web_page_previews=result.get('can_add_web_page_previews'),
-                )
-            )
-
-        return ret
+    _schema = dict(user=_Field('User'))
 
 
 _ChatPhotoBase = namedtuple('ChatPhoto', ['small_file_id', 'big_file_id'])
@@ -155,16 +119,7 @@ class ChatPhoto(_ChatPhotoBase):
         small_file_id	(str)	:*Optional.* Unique file identifier of small (160x160) chat photo. This file_id can be used only for photo download.
         big_file_id     (str)	:*Optional.* Unique file identifier of big (640x640) chat photo. This file_id can be used only for photo download.
     """
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return ChatPhoto(
-            small_file_id=result.get('small_file_id'),
-            big_file_id=result.get('big_file_id')
-        )
+    __slots__ = ()
 
 
 _ChatBase = namedtuple('Chat', ['id', 'type', 'title', 'username', 'first_name', 'last_name', 'all_members_are_administrators',
@@ -185,33 +140,16 @@ class Chat(_ChatBase):
         description	(str)	:*Optional.* Description, for supergroups and channel chats. Returned only in getChat.
         all_members_are_administrators (bool) :*Optional.* True if a group has ‘All Members Are Admins’ enabled.
         invite_link	(str)	:*Optional.* Chat invite link, for supergroups and channel chats. Returned only in getChat.
-        pinned_message	(Message) 	:*Optional.* Pinned message, for supergroups and channel chats. Returned only in getChat.
+        pinned_message	(dict) 	:*Optional.* Pinned message, for supergroups and channel chats. Returned only in getChat.
+                                 Left as the decoded JSON object.
         sticker_set_name	(str)	:*Optional.* For supergroups, name of group sticker set. Returned only in getChat.
         can_set_sticker_set	(bool)  :*Optional.* True, if the bot can change the group sticker set. Returned only in getChat.
     """
 
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Chat(
-            id=result.get('id'),
-            type=result.get('type'),
-            title=result.get('title'),
-            username=result.get('username'),
-            first_name=result.get('first_name'),
-            last_name=result.get('last_name'),
-            all_members_are_administrators=result.get('all_members_are_administrators'),
-            invite_link=result.get('invite_link'),
-            pinned_message=result.get('pinned_message'),
-            sticker_set_name=result.get('sticker_set_name'),
-            can_set_sticker_set=result.get('can_set_sticker_set'),
-            photo=ChatPhoto.from_result(result.get('photo')),
-            description=result.get('description'),
-        )
+    _schema = dict(
+        photo=_Field('ChatPhoto'),
+    )
 
 
 _MessageBase = namedtuple('Message', [
@@ -268,7 +206,8 @@ class Message(_MessageBase):
         left_chat_member   (User)                       :*Optional.* A member was removed from the group, information about
                                                                      them (this member may be bot itself)
         new_chat_title          (str)                   :*Optional.* A group title was changed to this value
-        new_chat_photo          (Sequence[PhotoSize])   :*Optional.* A group photo was change to this value
+        new_chat_photo          (Sequence[dict])        :*Optional.* A group photo was change to this value. Left as the
+                                                         decoded JSON objects.
         delete_chat_photo       (bool)                  :*Optional.* Informs that the group photo was deleted
         group_chat_created      (bool)                  :*Optional.* Informs that the group has been created
         supergroup_chat_created (bool)                  :*Optional.* Service message: the supergroup has been created
@@ -284,6 +223,28 @@ class Message(_MessageBase):
 
     """
     __slots__ = ()
+    _schema = dict(
+        sender=_Field('User', key='from'),
+        chat=_Field('Chat'),
+        forward_from=_Field('User'),
+        forward_from_chat=_Field('Chat'),
+        reply_to_message=_Field('Message'),
+        entities=_Field('MessageEntity', depth=1),
+        caption_entities=_Field('MessageEntity', depth=1),
+        audio=_Field('Audio'),
+        document=_Field('Document'),
+        photo=_Field('PhotoSize', depth=1),
+        sticker=_Field('Sticker'),
+        video=_Field('Video'),
+        video_note=_Field('VideoNote'),
+        voice=_Field('Voice'),
+        contact=_Field('Contact'),
+        location=_Field('Location'),
+        venue=_Field('Venue'),
+        new_chat_members=_Field('User', depth=1),
+        left_chat_member=_Field('User'),
+        pinned_message=_Field('Message'),
+    )
 
     @property
     def new_chat_member(self):
@@ -295,67 +256,6 @@ class Message(_MessageBase):
         print("DEPRECATED: left_chat_participant is now left_chat_member")
         return self.left_chat_member
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        # photo is a list of PhotoSize
-        photo = result.get('photo')
-        if photo is not None:
-            photo = [PhotoSize.from_result(photo_size) for photo_size in photo]
-
-        # entities is a list of MessageEntity
-        entities = result.get('entities')
-        if entities is not None:
-            entities = [MessageEntity.from_result(entity) for entity in entities]
-
-        caption_entities = result.get('caption_entities')
-        if caption_entities is not None:
-            caption_entities = [MessageEntity.from_result(entity) for entity in caption_entities]
-
-        return Message(
-            message_id=result.get('message_id'),
-            sender=User.from_result(result.get('from')),
-            date=result.get('date'),
-            edit_date=result.get('edit_date'),
-            chat=Chat.from_result(result.get('chat')),
-            forward_from=User.from_result(result.get('forward_from')),
-            forward_from_chat=Chat.from_result(result.get('forward_from_chat')),
-            forward_from_message_id=result.get('forward_from_message_id'),
-            forward_date=result.get('forward_date'),
-            forward_signature=result.get('forward_signature'),
-            author_signature=result.get('author_signature'),
-            media_group_id=result.get('media_group_id'),
-            reply_to_message=Message.from_result(result.get('reply_to_message')),
-            text=result.get('text'),
-            entities=entities,
-            caption_entities=caption_entities,
-            audio=Audio.from_result(result.get('audio')),
-            document=Document.from_result(result.get('document')),
-            photo=photo,
-            sticker=Sticker.from_result(result.get('sticker')),
-            video=Video.from_result(result.get('video')),
-            video_note=VideoNote.from_result(result.get('video_note')),
-            voice=Voice.from_result(result.get('voice')),
-            caption=result.get('caption'),
-            contact=Contact.from_result(result.get('contact')),
-            location=Location.from_result(result.get('location')),
-            venue=Venue.from_result(result.get('venue')),
-            new_chat_members=User.from_array_result(result.get('new_chat_members')),
-            left_chat_member=User.from_result(result.get('left_chat_member')),
-            new_chat_title=result.get('new_chat_title'),
-            new_chat_photo=result.get('new_chat_photo'),
-            delete_chat_photo=result.get('delete_chat_photo'),
-            group_chat_created=result.get('group_chat_created'),
-            supergroup_chat_created=result.get('supergroup_chat_created'),
-            channel_chat_created=result.get('channel_chat_created'),
-            migrate_to_chat_id=result.get('migrate_to_chat_id'),
-            migrate_from_chat_id=result.get('migrate_from_chat_id'),
-            pinned_message=Message.from_result(result.get('pinned_message')),
-            connected_website=Message.from_result(result.get('connected_website')),
-        )
-
 
 _MessageEntityBase = namedtuple('MessageEntity', ['type', 'offset', 'length', 'url', 'user'])
 
@@ -374,19 +274,7 @@ class MessageEntity(_MessageEntityBase):
     """
 
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return MessageEntity(
-            type=result.get('type'),
-            offset=result.get('offset'),
-            length=result.get('length'),
-            url=result.get('url'),
-            user=User.from_result(result.get('user'))
-        )
+    _schema = dict(user=_Field('User'))
 
 
 _PhotoSizeBase = namedtuple('PhotoSize', ['file_id', 'width', 'height', 'file_size'])
@@ -403,18 +291,6 @@ class PhotoSize(_PhotoSizeBase):
     """
     __slots__ = ()
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return PhotoSize(
-            file_id=result.get('file_id'),
-            width=result.get('width'),
-            height=result.get('height'),
-            file_size=result.get('file_size')
-        )
-
 
 _AudioBase = namedtuple('Audio', ['file_id', 'duration', 'performer', 'title', 'mime_type', 'file_size'])
 
@@ -433,20 +309,6 @@ class Audio(_AudioBase):
     """
     __slots__ = ()
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Audio(
-            file_id=result.get('file_id'),
-            duration=result.get('duration'),
-            performer=result.get('performer'),
-            title=result.get('title'),
-            mime_type=result.get('mime_type'),
-            file_size=result.get('file_size')
-        )
-
 
 _DocumentBase = namedtuple('Document', ['file_id', 'thumb', 'file_name', 'mime_type', 'file_size'])
 
@@ -463,19 +325,7 @@ class Document(_DocumentBase):
 
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Document(
-            file_id=result.get('file_id'),
-            thumb=PhotoSize.from_result(result.get('thumb')),
-            file_name=result.get('file_name'),
-            mime_type=result.get('mime_type'),
-            file_size=result.get('file_size')
-        )
+    _schema = dict(thumb=_Field('PhotoSize'))
 
 
 _StickerBase = namedtuple('Sticker', ['file_id', 'width', 'height', 'thumb', 'emoji', 'file_size'])
@@ -494,20 +344,7 @@ class Sticker(_StickerBase):
 
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Sticker(
-            file_id=result.get('file_id'),
-            width=result.get('width'),
-            height=result.get('height'),
-            thumb=PhotoSize.from_result(result.get('thumb')),
-            emoji=result.get('emoji'),
-            file_size=result.get('file_size')
-        )
+    _schema = dict(thumb=_Field('PhotoSize'))
 
 
 _VideoBase = namedtuple('Video', [
@@ -528,21 +365,7 @@ class Video(_VideoBase):
 
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Video(
-            file_id=result.get('file_id'),
-            width=result.get('width'),
-            height=result.get('height'),
-            duration=result.get('duration'),
-            thumb=PhotoSize.from_result(result.get('thumb')),
-            mime_type=result.get('mime_type'),
-            file_size=result.get('file_size')
-        )
+    _schema = dict(thumb=_Field('PhotoSize'))
 
 
 _VideoNoteBase = namedtuple('VideoNote', [
@@ -562,20 +385,7 @@ class VideoNote(_VideoNoteBase):
 
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Video(
-            file_id=result.get('file_id'),
-            width=result.get('width'),
-            height=result.get('height'),
-            duration=result.get('duration'),
-            thumb=PhotoSize.from_result(result.get('thumb')),
-            file_size=result.get('file_size')
-        )
+    _schema = dict(thumb=_Field('PhotoSize'))
 
 
 _VoiceBase = namedtuple('Voice', ['file_id', 'duration', 'mime_type', 'file_size'])
@@ -593,18 +403,6 @@ class Voice(_VoiceBase):
     """
     __slots__ = ()
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Voice(
-            file_id=result.get('file_id'),
-            duration=result.get('duration'),
-            mime_type=result.get('mime_type'),
-            file_size=result.get('file_size')
-        )
-
 
 _ContactBase = namedtuple('Contact', ['phone_number', 'first_name', 'last_name', 'user_id'])
 
@@ -621,18 +419,6 @@ class Contact(_ContactBase):
     """
     __slots__ = ()
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Contact(
-            phone_number=result.get('phone_number'),
-            first_name=result.get('first_name'),
-            last_name=result.get('last_name'),
-            user_id=result.get('user_id')
-        )
-
 
 _LocationBase = namedtuple('Location', ['longitude', 'latitude'])
 
@@ -647,16 +433,6 @@ class Location(_LocationBase):
     """
     __slots__ = ()
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Location(
-            longitude=result.get('longitude'),
-            latitude=result.get('latitude')
-        )
-
 
 _VenueBase = namedtuple('Venue', ['location', 'title', 'address', 'foursquare_id'])
 
@@ -671,18 +447,7 @@ class Venue(_VenueBase):
         foursquare_id  (str)      :*Optional.* Foursquare identifier of the venue
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Venue(
-            location=Location.from_result(result.get('location')),
-            title=result.get('title'),
-            address=result.get('address'),
-            foursquare_id=result.get('foursquare_id'),
-        )
+    _schema = dict(location=_Field('Location'))
 
 
 _GameBase = namedtuple('Game', ['title', 'description', 'photo', 'text', 'text_entities', 'animation'])
@@ -700,33 +465,15 @@ class Game(_GameBase):
                                                               edited to include current high scores for the game when the bot calls setGameScore, or manually
                                                               edited using editMessageText. 0-4096 characters.
         text_entities  (Sequence[MessageEntity]) :*Optional.* Special entities that appear in text, such as usernames, URLs, bot commands, etc.
+                                                  Read from the ``entities`` key.
         animation      (Animation)               :*Optional.* Animation that will be displayed in the game message in chats. Upload via BotFather
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        # photo is a list of PhotoSize
-        photo = result.get('photo')
-        if photo is not None:
-            photo = [PhotoSize.from_result(photo_size) for photo_size in photo]
-
-        # entities is a list of MessageEntity
-        text_entities = result.get('entities')
-        if text_entities is not None:
-            text_entities = [MessageEntity.from_result(entity) for entity in text_entities]
-
-        return Game(
-            title=result.get('title'),
-            description=result.get('description'),
-            photo=photo,
-            text=result.get('text'),
-            text_entities=text_entities,
-            animation=Animation.from_result(result.get('animation')),
-        )
+    _schema = dict(
+        photo=_Field('PhotoSize', depth=1),
+        text_entities=_Field('MessageEntity', key='entities', depth=1),
+        animation=_Field('Animation'),
+    )
 
 
 _AnimationBase = namedtuple('Animation', ['file_id', 'thumb', 'file_name', 'mime_type', 'file_size'])
@@ -744,19 +491,7 @@ class Animation(_AnimationBase):
         file_size  (int)        :*Optional.* File size
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return Animation(
-            file_id=result.get('file_id'),
-            thumb=PhotoSize.from_result(result.get('thumb')),
-            file_name=result.get('file_name'),
-            mime_type=result.get('mime_type'),
-            file_size=result.get('file_size')
-        )
+    _schema = dict(thumb=_Field('PhotoSize'))
 
 
 _GameHighScoreBase = namedtuple('GameHighScore', ['position', 'user', 'score'])
@@ -773,24 +508,7 @@ class GameHighScore(_GameHighScoreBase):
     """
 
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return GameHighScore(
-            position=result.get('position'),
-            user=User.from_result(result.get('user')),
-            score=result.get('score'),
-        )
-
-    @staticmethod
-    def from_array_result(result):
-        if result is None:
-            return None
-
-        return [GameHighScore.from_result(score) for score in result]
+    _schema = dict(user=_Field('User'))
 
 
 _WebhookInfoBase = namedtuple('WebhookInfo', ['url', 'has_custom_certificate', 'pending_update_count', 'last_error_date', 'last_error_message'])
@@ -809,19 +527,6 @@ class WebhookInfo(_WebhookInfoBase):
     """
     __slots__ = ()
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return WebhookInfo(
-            url=result.get('url'),
-            has_custom_certificate=result.get('has_custom_certificate'),
-            pending_update_count=result.get('pending_update_count'),
-            last_error_date=result.get('last_error_date'),
-            last_error_message=result.get('last_error_message'),
-        )
-
 
 _UpdateBase = namedtuple('Update', ['update_id', 'message', 'edited_message', 'channel_post', 'edited_channel_post', 'inline_query', 'chosen_inline_result', 'callback_query'])
 
@@ -845,27 +550,15 @@ class Update(_UpdateBase):
 
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_dict(message_update):
-        if message_update is None:
-            return None
-
-        return Update(message_update.get('update_id'),
-                      Message.from_result(message_update.get('message')),
-                      Message.from_result(message_update.get('edited_message')),
-                      Message.from_result(message_update.get('channel_post')),
-                      Message.from_result(message_update.get('edited_channel_post')),
-                      InlineQuery.from_result(message_update.get('inline_query')),
-                      ChosenInlineResult.from_result(message_update.get('chosen_inline_result')),
-                      CallbackQuery.from_result(message_update.get('callback_query')))
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-        updates = [Update.from_dict(message_update) for message_update in result]
-        return updates
+    _schema = dict(
+        message=_Field('Message'),
+        edited_message=_Field('Message'),
+        channel_post=_Field('Message'),
+        edited_channel_post=_Field('Message'),
+        inline_query=_Field('InlineQuery'),
+        chosen_inline_result=_Field('ChosenInlineResult'),
+        callback_query=_Field('CallbackQuery'),
+    )
 
 
 _InputFileInfoBase = namedtuple('InputFileInfo', ['file_name', 'fp', 'mime_type'])
@@ -977,20 +670,7 @@ class UserProfilePhotos(_UserProfilePhotosBase):
 
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        photos = []
-        for photo_list in result.get('photos'):
-            photos.append([PhotoSize.from_result(photo) for photo in photo_list])
-
-        return UserProfilePhotos(
-            total_count=result.get('total_count'),
-            photos=photos
-        )
+    _schema = dict(photos=_Field('PhotoSize', depth=2))
 
 
 _FileBase = namedtuple('File', ['file_id', 'file_size', 'file_path'])
@@ -1007,24 +687,16 @@ class File(_FileBase):
     """
     __slots__ = ()
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return File(
-            file_id=result.get('file_id'),
-            file_size=result.get('file_size'),
-            file_path=result.get('file_path')
-        )
-
 
 class ReplyMarkup:
     __metaclass__ = ABCMeta
     __slots__ = ()
 
     @abstractmethod
-    def serialize(self):
+    def serialize(self, json_codec=None):
+        """:param json_codec: The :class:`JSONCodec` to encode with, :mod:`json` when omitted
+        :returns: The markup as a JSON document
+        """
         raise NotImplementedError("")
 
 
@@ -1099,7 +771,7 @@ class ReplyKeyboardMarkup(_ReplyKeyboardMarkupBase, ReplyMarkup):
     def create(keyboard, resize_keyboard=None, one_time_keyboard=None, selective=None):
         return ReplyKeyboardMarkup(keyboard, resize_keyboard, one_time_keyboard, selective)
 
-    def serialize(self):
+    def serialize(self, json_codec=None):
         reply_markup = dict(keyboard=self.keyboard)
 
         if self.resize_keyboard is not None:
@@ -1111,7 +783,7 @@ class ReplyKeyboardMarkup(_ReplyKeyboardMarkupBase, ReplyMarkup):
         if self.selective is not None:
             reply_markup['selective'] = bool(self.selective)
 
-        return json.dumps(reply_markup)
+        return (json_codec or _default_json_codec).dumps(reply_markup)
 
 
 class ReplyKeyboardHide():
@@ -1156,7 +828,7 @@ class ReplyKeyboardRemove(_ReplyKeyboardRemoveBase, ReplyMarkup):
     def create(selective=None):
         return ReplyKeyboardRemove(True, selective)
 
-    def serialize(self):
+    def serialize(self, json_codec=None):
         reply_markup = dict(
             hide_keyboard=True
         )
@@ -1164,7 +836,7 @@ class ReplyKeyboardRemove(_ReplyKeyboardRemoveBase, ReplyMarkup):
         if self.selective is not None:
             reply_markup['selective'] = bool(self.selective)
 
-        return json.dumps(reply_markup)
+        return (json_codec or _default_json_codec).dumps(reply_markup)
 
 
 _ForceReplyBase = namedtuple('ForceReply', ['force_reply', 'selective'])
@@ -1202,12 +874,12 @@ class ForceReply(_ForceReplyBase, ReplyMarkup):
     def create(selective=None):
         return ForceReply(True, selective)
 
-    def serialize(self):
+    def serialize(self, json_codec=None):
         reply_markup = dict(force_reply=True)
         if self.selective is not None:
             reply_markup['selective'] = bool(self.selective)
 
-        return json.dumps(reply_markup)
+        return (json_codec or _default_json_codec).dumps(reply_markup)
 
 
 _InlineQueryBase = namedtuple('InlineQuery', ['id', 'sender', 'location', 'query', 'offset'])
@@ -1226,19 +898,10 @@ class InlineQuery(_InlineQueryBase):
 
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return InlineQuery(
-            id=result.get('id'),
-            sender=User.from_result(result.get('from')),
-            location=Location.from_result(result.get('location')),
-            query=result.get('query'),
-            offset=result.get('offset'),
-        )
+    _schema = dict(
+        sender=_Field('User', key='from'),
+        location=_Field('Location'),
+    )
 
 
 _ChosenInlineResultBase = namedtuple('ChosenInlineResult', ['result_id', 'sender', 'query', 'location', 'inline_message_id'])
@@ -1259,19 +922,10 @@ class ChosenInlineResult(_ChosenInlineResultBase):
 
     """
     __slots__ = ()
-
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
-
-        return ChosenInlineResult(
-            result_id=result.get('result_id'),
-            sender=User.from_result(result.get('from')),
-            location=Location.from_result(result.get('location')),
-            inline_message_id=result.get('inline_message_id'),
-            query=result.get('query'),
-        )
+    _schema = dict(
+        sender=_Field('User', key='from'),
+        location=_Field('Location'),
+    )
 
 
 _CallbackQueryBase = namedtuple('CallbackQuery', ['id', 'sender', 'message', 'inline_message_id', 'data'])
@@ -1294,60 +948,596 @@ class CallbackQuery(_CallbackQueryBase):
 
     """
     __slots__ = ()
+    _schema = dict(
+        sender=_Field('User', key='from'),
+        message=_Field('Message'),
+    )
 
-    @staticmethod
-    def from_result(result):
-        if result is None:
-            return None
 
-        return CallbackQuery(
-            id=result.get('id'),
-            sender=User.from_result(result.get('from')),
-            message=Message.from_result(result.get('message')),
-            inline_message_id=result.get('inline_message_id'),
-            data=result.get('data'),
-        )
+_parsers = {}
+_parsed_types = ()
+
+
+def _compile_parsers(types, constructors=None, fields=None):
+    """Generate the parsers of ``types`` from their schemas. Like :func:`collections.namedtuple`, the code is built
+    as source and compiled once: every field is a plain dict lookup, nested objects are only parsed when present and
+    the tuple is built without keyword arguments.
+
+    :param types: The types to generate parsers for, including all the types their schemas refer to
+    :param constructors: Maps type names to a callable building the object from the tuple of its field values,
+                         in place of the namedtuple. See :class:`InternTable` and :class:`CompactMessage`
+    :param fields: Maps type names to the fields that are decoded, the others are left None. See :class:`Projection`
+    :returns: The namespace holding ``_parse_<type>`` and ``_parse_<type>_array`` for every type
+    """
+    constructors = constructors or {}
+    fields = fields or {}
+    names = set(type_.__name__ for type_ in types)
+    namespace = dict(_new=tuple.__new__)
+    source = []
+    for type_ in types:
+        name = type_.__name__
+        schema = getattr(type_, '_schema', {})
+        namespace[name] = type_
+        lines = ['def _parse_{}(_result):'.format(name),
+                 '    if _result is None:',
+                 '        return None',
+                 '    _get = _result.get']
+        values = []
+        kept = fields.get(name, type_._fields)
+        for field in type_._fields:
+            if field not in kept:
+                values.append('None')
+                continue
+            spec = schema.get(field)
+            key = repr(field if spec is None or spec.key is None else spec.key)
+            if spec is None or spec.type is None:
+                values.append('_get({})'.format(key))
+                continue
+            if spec.type not in names:
+                raise ValueError('{}.{} refers to unknown type {}'.format(name, field, spec.type))
+
+            value = '_parse_{}({})'.format(spec.type, 'v0' if spec.depth else field)
+            for level in range(spec.depth):
+                value = '[{} for v{} in {}]'.format(value, level, field if level + 1 == spec.depth else 'v{}'.format(level + 1))
+            lines += ['    {} = _get({})'.format(field, key),
+                      '    if {} is not None:'.format(field),
+                      '        {} = {}'.format(field, value)]
+            values.append(field)
+        if name in constructors:
+            namespace['_construct_' + name] = constructors[name]
+            lines.append('    return _construct_{}(({},))'.format(name, ', '.join(values)))
+        else:
+            lines.append('    return _new({}, ({},))'.format(name, ', '.join(values)))
+        lines += ['',
+                  'def _parse_{}_array(_results):'.format(name),
+                  '    if _results is None:',
+                  '        return None',
+                  '    return [_parse_{}(_result) for _result in _results]'.format(name),
+                  '']
+        source += lines
+
+    exec('\n'.join(source), namespace)
+    return namespace
+
+
+def _generate_parsers(*types):
+    """Generates ``from_result`` (one object) and ``from_array_result`` (a list of them) for each type from its
+    schema, see :func:`_compile_parsers`"""
+    global _parsed_types
+    namespace = _compile_parsers(types)
+    for type_ in types:
+        name = type_.__name__
+        _parsers[name] = namespace['_parse_' + name]
+        type_.from_result = staticmethod(namespace['_parse_' + name])
+        type_.from_array_result = staticmethod(namespace['_parse_{}_array'.format(name)])
+    _parsed_types = types
+
+
+def _parser_variants(namespace):
+    """Map the parsers of the types to their counterparts in ``namespace``, see :func:`_compile_parsers`"""
+    variants = {}
+    for type_ in _parsed_types:
+        name = type_.__name__
+        variants[_parsers[name]] = namespace['_parse_' + name]
+        variants[type_.from_array_result] = namespace['_parse_{}_array'.format(name)]
+    return variants
+
+
+_generate_parsers(User, ChatMember, ChatPhoto, Chat, Message, MessageEntity, PhotoSize, Audio, Document, Sticker, Video,
+                  VideoNote, Voice, Contact, Location, Venue, Game, Animation, GameHighScore, WebhookInfo, Update,
+                  UserProfilePhotos, File, InlineQuery, ChosenInlineResult, CallbackQuery)
+
+# Names predating the generated parsers
+ChatMember.from_result_list = staticmethod(ChatMember.from_array_result)
+Update.from_dict = staticmethod(Update.from_result)
+Update.from_result = staticmethod(Update.from_array_result)
+
+
+class InternTable(object):
+    """A bounded table of parsed :class:`User` and :class:`Chat` objects, so that a user or chat that appears in
+    many messages (as sender, chat, in replies, ...) is a single shared instance instead of a new tuple each time.
+    This cuts allocations in busy chats and memory when a lot of messages are kept, e.g. as history.
+
+    Objects are looked up by their id and only shared when all their other fields are equal too, so a user who
+    changed their name gets a new instance, which replaces the old one in the table. When a table is full, its least
+    recently used entries are dropped.
+
+    Pass the table as ``intern_table`` to :class:`TelegramBot`, or to a single API call. It applies to results
+    decoded with ``ResultMode.TYPED``, the default.
+
+    :param maxsize: The maximum number of objects kept per type
+    :param types: The types to intern, the first field of which must be their id
+
+    :type maxsize: int
+    :type types: tuple
 
+    Attributes:
+        hits    (int) :The number of objects that were found in the table
+        misses  (int) :The number of objects that were added to the table
+    """
+
+    def __init__(self, maxsize=10000, types=(User, Chat)):
+        self.maxsize = maxsize
+        self.types = tuple(types)
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._tables = dict((type_.__name__, OrderedDict()) for type_ in self.types)
+
+        self._interners = dict((type_.__name__, self._interner(type_)) for type_ in self.types)
+        self._parsers = _parser_variants(_compile_parsers(_parsed_types, self._interners))
+
+    def _interner(self, type_):
+        table = self._tables[type_.__name__]
+        new = tuple.__new__
+
+        def intern(values):
+            key = values[0]  # The id
+            with self._lock:
+                obj = table.get(key)
+                if obj is not None and obj == values:
+                    del table[key]  # Mark it most recently used, OrderedDict.move_to_end is not on Python 2
+                    table[key] = obj
+                    self.hits += 1
+                    return obj
+
+                obj = new(type_, values)
+                table[key] = obj  # Replaces an outdated version
+                if len(table) > self.maxsize:
+                    table.popitem(last=False)
+                self.misses += 1
+            return obj
+
+        return intern
+
+    def _get_parser(self, on_result):
+        return self._parsers.get(on_result, on_result)
+
+    def __len__(self):
+        return sum(len(table) for table in self._tables.values())
+
+    def clear(self):
+        """Drop all objects from the table"""
+        with self._lock:
+            for table in self._tables.values():
+                table.clear()
+
+
+class Projection(object):
+    """The fields of the types that are decoded from API results, for bots whose handlers only read a few of them.
+    All other fields are left None and the objects they hold are never built, e.g. a projection keeping only the
+    ``text`` of messages skips their users, chats, entities and media altogether. Types that are not named are
+    decoded in full.
+
+    Pass the projection as ``projection`` to :class:`TelegramBot`, or to a single API call. It applies to results
+    decoded with ``ResultMode.TYPED``, the default, and can be combined with an :class:`InternTable`; with
+    ``ResultMode.COMPACT`` and ``ResultMode.LAZY`` it is ignored. :class:`twx.botapi.helpers.update_loop.UpdateLoop`
+    derives one from the fields its handlers declare when run with ``project=True``.
+
+    :param fields: For each type, by name, the names of its fields to keep
 
-class InlineKeyboardMarkup:
-    """ This object represents an inline keyboard that appears right next to the message it belongs to.
+    :example:
 
-    Attributes:
-        inline_keyboard     (Sequence[Sequence[InlineKeyboardButton]])  :Array of button rows, each represented by an Array of InlineKeyboardButton objects
+    ::
+
+        projection = Projection(Message=('message_id', 'text', 'chat', 'sender', 'entities'),
+                                Chat=('id',), User=('id', 'username'))
+        bot = TelegramBot('<TOKEN>', projection=projection)
     """
 
-    def __init__(self, inline_keyboard):
-        self.inline_keyboard = inline_keyboard
+    def __init__(self, **fields):
+        types = dict((type_.__name__, type_) for type_ in _parsed_types)
+        self.fields = {}
+        for name, kept in fields.items():
+            if name not in types:
+                raise ValueError('Unknown type {!r}'.format(name))
+            unknown = set(kept) - set(types[name]._fields)
+            if unknown:
+                raise ValueError('{} has no fields {}'.format(name, ', '.join(sorted(unknown))))
+            self.fields[name] = frozenset(kept)
 
-    def serialize(self):
-        return json.dumps(self.asdict())
+        self._parsers = _parser_variants(_compile_parsers(_parsed_types, fields=self.fields))
+        self._interned = weakref.WeakKeyDictionary()
 
-    def asdict(self):
-        inline_keyboard = []
+    def _get_parser(self, on_result, intern_table=None):
+        if intern_table is None:
+            return self._parsers.get(on_result, on_result)
 
-        for button_list in self.inline_keyboard:
-            temp_list = []
-            for button in button_list:
-                temp_list.append(button.serialize())
-            inline_keyboard.append(temp_list)
+        parsers = self._interned.get(intern_table)
+        if parsers is None:
+            parsers = _parser_variants(_compile_parsers(_parsed_types, intern_table._interners, self.fields))
+            self._interned[intern_table] = parsers
+        return parsers.get(on_result, on_result)
 
-        return dict(inline_keyboard=inline_keyboard)
+    def __repr__(self):
+        return 'Projection({})'.format(', '.join('{}={!r}'.format(name, tuple(sorted(kept)))
+                                                 for name, kept in sorted(self.fields.items())))
 
 
-class InlineKeyboardButton:
-    """ This object represents one button of an inline keyboard. You must use exactly one of the optional fields.
+class UpdatePrefilter(object):
+    """Rejects updates by scanning their bytes before they are decoded, so that traffic a bot ignores (e.g. group
+    chatter that is neither a command nor a button press) costs neither JSON decoding nor building objects.
 
-    Attributes:
-        text     (str)  :Label text on the button
-        url      (str)  :*Optional.* HTTP url to be opened when button is pressed
-        callback_data (str) :*Optional.* Data to be sent in a callback query to the bot when button is pressed
+    An update is accepted if any of ``needles`` occurs in its JSON encoding. The needles are plain byte strings;
+    as quotes inside JSON strings are always escaped, a quoted needle such as ``b'"callback_query"'`` can only
+    match a key or a whole string value. A needle that also matches some updates the bot ignores only costs
+    decoding them; a needle that misses updates the bot handles loses them.
 
-        switch_inline_query (str) :*Optional.* If set, pressing the button will prompt the user to select
-                                   one of their chats, open that chat and insert the bot‘s username and
-                                   the specified inline query in the input field. Can be empty, in which case just the bot’s username will be inserted.
+    Pass the prefilter (or any callable taking the bytes of an update and returning whether it is accepted) as
+    ``prefilter`` to :class:`TelegramBot`, or to a single :func:`get_updates` call, or to
+    :func:`parse_webhook_update`. :func:`get_updates` returns a rejected update with just its ``update_id``, so the
+    offset can still be moved past it. It can only split responses laid out compactly, as the Bot API sends them;
+    other responses are decoded in full, which is logged at debug level to the ``twx.botapi`` logger.
 
-                                   Note: This offers an easy way for users to start using your bot in inline mode when they are currently in a private
-                                   chat with it. Especially useful when combined with switch_pm… actions – in this case the user will be automatically
+    :param needles: The byte strings of which an accepted update contains at least one
+
+    :type needles: bytes
+
+    :example:
+
+    ::
+
+        bot = TelegramBot('<TOKEN>', prefilter=UpdatePrefilter(UpdatePrefilter.COMMANDS,
+                                                                UpdatePrefilter.CALLBACK_QUERIES))
+    """
+    COMMANDS = b'"bot_command"'  # The type of command entities
+    CALLBACK_QUERIES = b'"callback_query"'
+    INLINE_QUERIES = b'"inline_query"'
+
+    def __init__(self, *needles):
+        self.needles = needles
+
+    def __call__(self, data):
+        for needle in self.needles:
+            if needle in data:
+                return True
+        return False
+
+
+_updates_head = b'{"ok":true,"result":['
+_update_head = b'{"update_id":'
+_update_id = re.compile(br'-?\d+')
+
+
+def _prefilter_updates(content, prefilter, json_codec):
+    """Split the body of a successful ``getUpdates`` response into its updates without decoding it, and decode only
+    the updates accepted by ``prefilter``. Rejected updates are replaced by a dict holding just their ``update_id``.
+
+    Updates are found by their opening ``{"update_id":``, which cannot occur inside a JSON string. This expects the
+    compact layout the Bot API sends, without whitespace between the tokens.
+
+    :returns: The list of updates, or None if ``content`` is laid out differently
+    """
+    pieces = content.strip().split(_update_head)
+    if len(pieces) == 1 and pieces[0] == _updates_head + b']}':
+        return []
+    if len(pieces) < 2 or pieces[0] != _updates_head:
+        return None
+
+    updates = []
+    last = len(pieces) - 1
+    for i in range(1, len(pieces)):
+        piece = pieces[i]
+        update_id = _update_id.match(piece)
+        if update_id is None:
+            return None
+        if i < last and piece.endswith(b'},'):
+            data = _update_head + piece[:-1]
+        elif i == last and piece.endswith(b'}]}'):
+            data = _update_head + piece[:-2]
+        else:
+            return None
+
+        if prefilter(data):
+            updates.append(json_codec.loads(data))
+        else:
+            updates.append({'update_id': int(update_id.group())})
+    return updates
+
+
+def parse_webhook_update(data, prefilter=None, json_codec=None, on_result=None):
+    """Decode the body of a webhook request into an :class:`Update`
+
+    :param data: The body of the request
+    :param prefilter: If given, called with ``data`` before it is decoded, see :class:`UpdatePrefilter`
+    :param json_codec: The :class:`JSONCodec` decoding ``data``. When omitted :mod:`json` is used
+    :param on_result: Builds the update from the decoded dict, e.g. ``LazyUpdate.from_dict``. Defaults to
+                      ``Update.from_dict``
+
+    :type data: bytes
+    :type prefilter: callable
+    :type json_codec: JSONCodec
+    :type on_result: callable
+
+    :returns: The update, or None if ``prefilter`` rejected it
+    :rtype: Update
+    """
+    if prefilter is not None and not prefilter(data):
+        return None
+    result = (json_codec or _default_json_codec).loads(data)
+    return (on_result or Update.from_dict)(result)
+
+
+class _LazyField(object):
+    """A field of a lazy type, decoded from the wrapped dict on first access and cached afterwards"""
+    __slots__ = ('name', 'key', 'parse')
+
+    def __init__(self, name, key, parse):
+        self.name = name
+        self.key = key
+        self.parse = parse
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+
+        if self.parse is None:
+            return obj._result.get(self.key)  # Nothing to build
+
+        cache = obj._cache
+        if self.name in cache:
+            return cache[self.name]
+        value = obj._result.get(self.key)
+        if value is not None:
+            value = self.parse(value)
+        cache[self.name] = value
+        return value
+
+
+class _LazyType(object):
+    """Base of the lazy counterparts of the namedtuple types. They behave like the namedtuple they stand in for
+    (attributes, ``_fields``, ``_asdict()``, iteration and equality), but only decode fields when accessed."""
+    __slots__ = ('_result', '_cache')
+    _type = None
+    _fields = ()
+
+    def __init__(self, result):
+        self._result = result
+        self._cache = {}
+
+    @classmethod
+    def _define(cls, type_, lazy_types):
+        """Sets up the fields from the schema of ``type_``, building the nested types named in ``lazy_types``
+        lazily as well"""
+        cls._type = type_
+        cls._fields = type_._fields
+        schema = getattr(type_, '_schema', {})
+        for name in type_._fields:
+            spec = schema.get(name)
+            key, parse = name, None
+            if spec is not None:
+                key = spec.key or name
+                if spec.type is not None:
+                    parse = lazy_types[spec.type].from_result if spec.type in lazy_types else _parsers[spec.type]
+                    for _ in range(spec.depth):
+                        parse = _parse_list(parse)
+            setattr(cls, name, _LazyField(name, key, parse))
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        return isinstance(other, (tuple, _LazyType)) and tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.materialize())
+
+    def _asdict(self):
+        return OrderedDict(zip(self._fields, self))
+
+    def materialize(self):
+        """Decode every field, including those of nested lazy objects
+
+        :returns: The namedtuple this object stands in for
+        """
+        return self._type(*(value.materialize() if isinstance(value, _LazyType) else value for value in self))
+
+
+def _parse_list(parse):
+    return lambda results: [parse(result) for result in results]
+
+
+class LazyMessage(_LazyType):
+    """A :class:`Message` that is decoded field by field on access, see :class:`LazyUpdate`"""
+    __slots__ = ()
+
+    @staticmethod
+    def from_result(result):
+        if result is None:
+            return None
+        return LazyMessage(result)
+
+
+class LazyUpdate(_LazyType):
+    """An :class:`Update` that keeps the decoded JSON and builds the objects of a field only when it is accessed.
+
+    Handlers that only read e.g. ``update.message.text`` skip building the users, chats, entities and media of the
+    message altogether. Fields are cached once built. Lazy updates are returned by :func:`get_updates` when called
+    with ``result_mode=ResultMode.LAZY``; :meth:`materialize` turns one into a regular :class:`Update`.
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def from_dict(message_update):
+        if message_update is None:
+            return None
+        return LazyUpdate(message_update)
+
+    @staticmethod
+    def from_result(result):
+        if result is None:
+            return None
+        return [LazyUpdate(message_update) for message_update in result]
+
+
+LazyMessage._define(Message, dict(Message=LazyMessage))
+LazyUpdate._define(Update, dict(Message=LazyMessage))
+
+
+class CompactMessage(object):
+    """A :class:`Message` that only stores the fields that are present. Every combination of present fields gets
+    its own subclass with slots for just those fields, the others read as None from the class. A text message takes
+    a fraction of the memory of a :class:`Message`, which holds a slot for each of its many fields, and attribute
+    access is just as fast.
+
+    Compact messages behave like the namedtuple they stand in for: they have ``_fields``, ``_asdict()``, iterate over
+    all fields, compare equal to the :class:`Message` with the same fields and can be pickled. Replied to and pinned
+    messages inside them are compact as well. They are returned by API calls made with
+    ``result_mode=ResultMode.COMPACT``, or converted with :meth:`from_message`; :meth:`materialize` turns one back into
+    a regular :class:`Message`.
+    """
+    __slots__ = ()
+    _fields = Message._fields
+    _layouts = {}
+    _nones = (None,) * len(Message._fields)
+
+    @classmethod
+    def _layout(cls, present):
+        """Create the subclass holding the fields flagged in ``present``, and a function building it"""
+        names = tuple(name for name, flag in zip(cls._fields, present) if flag)
+        layout = type(cls.__name__, (cls,), dict(__slots__=names, __module__=cls.__module__))
+        source = ['def make({}):'.format(', '.join(names)),
+                  '    self = _new(layout)']
+        source += ['    self.{0} = {0}'.format(name) for name in names]
+        source.append('    return self')
+        namespace = dict(_new=object.__new__, layout=layout)
+        exec('\n'.join(source), namespace)
+        return cls._layouts.setdefault(present, namespace['make'])
+
+    @classmethod
+    def _pack(cls, values):
+        present = tuple(map(operator.is_not, values, cls._nones))
+        make = cls._layouts.get(present)
+        if make is None:
+            make = cls._layout(present)
+        return make(*itertools.compress(values, present))
+
+    @staticmethod
+    def from_message(message):
+        """Convert a :class:`Message`, including the messages it contains
+
+        :type message: Message
+        :rtype: CompactMessage
+        """
+        if message is None or isinstance(message, CompactMessage):
+            return message
+        return CompactMessage._pack(tuple(CompactMessage.from_message(value) if isinstance(value, Message) else value
+                                          for value in message))
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        return isinstance(other, (tuple, CompactMessage, _LazyType)) and tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return 'CompactMessage({})'.format(', '.join('{}={!r}'.format(name, getattr(self, name))
+                                                     for name in self.__slots__))
+
+    def __reduce__(self):
+        return CompactMessage._pack, (tuple(self),)
+
+    def _asdict(self):
+        return OrderedDict(zip(self._fields, self))
+
+    def materialize(self):
+        """Convert into a regular :class:`Message`, including the messages it contains
+
+        :rtype: Message
+        """
+        return Message(*(value.materialize() if isinstance(value, CompactMessage) else value for value in self))
+
+
+for _name in Message._fields:
+    setattr(CompactMessage, _name, None)
+del _name
+
+_compact_parsers = _parser_variants(_compile_parsers(_parsed_types, dict(Message=CompactMessage._pack)))
+CompactMessage.from_result = staticmethod(_compact_parsers[Message.from_result])
+
+
+class InlineKeyboardMarkup:
+    """ This object represents an inline keyboard that appears right next to the message it belongs to.
+
+    Attributes:
+        inline_keyboard     (Sequence[Sequence[InlineKeyboardButton]])  :Array of button rows, each represented by an Array of InlineKeyboardButton objects
+    """
+
+    def __init__(self, inline_keyboard):
+        self.inline_keyboard = inline_keyboard
+
+    def serialize(self, json_codec=None):
+        return (json_codec or _default_json_codec).dumps(self.asdict())
+
+    def asdict(self):
+        inline_keyboard = []
+
+        for button_list in self.inline_keyboard:
+            temp_list = []
+            for button in button_list:
+                temp_list.append(button.serialize())
+            inline_keyboard.append(temp_list)
+
+        return dict(inline_keyboard=inline_keyboard)
+
+
+class InlineKeyboardButton:
+    """ This object represents one button of an inline keyboard. You must use exactly one of the optional fields.
+
+    Attributes:
+        text     (str)  :Label text on the button
+        url      (str)  :*Optional.* HTTP url to be opened when button is pressed
+        callback_data (str) :*Optional.* Data to be sent in a callback query to the bot when button is pressed
+
+        switch_inline_query (str) :*Optional.* If set, pressing the button will prompt the user to select
+                                   one of their chats, open that chat and insert the bot‘s username and
+                                   the specified inline query in the input field. Can be empty, in which case just the bot’s username will be inserted.
+
+                                   Note: This offers an easy way for users to start using your bot in inline mode when they are currently in a private
+                                   chat with it. Especially useful when combined with switch_pm… actions – in this case the user will be automatically
                                    returned to the chat they switched from, skipping the chat selection screen.
         switch_inline_query_current_chat (str) :*Optional.* If set, pressing the button will insert the bot‘s username and the specified inline query
                                                 in the current chat's input field. Can be empty, in which case only the bot’s username will be inserted.
@@ -2017,66 +2207,1435 @@ class InputVenueMessageContent(InputMessageContent):
         self.foursquare_id = foursquare_id
 
 
-class InputContactMessageContent(InputMessageContent):
-    """
-    Represents the content of a contact message to be sent as the result of an inline query.
+class InputContactMessageContent(InputMessageContent):
+    """
+    Represents the content of a contact message to be sent as the result of an inline query.
+
+    Attributes:
+        phone_number    (str)     :Contact's phone number
+        first_name      (str)     :Contact's first name
+        last_name       (str)     :*Optional.* Contact's last name
+    """
+
+    def __init__(self, phone_number, first_name, last_name=None):
+        self.phone_number = phone_number
+        self.first_name = first_name
+        self.last_name = last_name
+
+
+"""
+Types added for utility purposes
+"""
+
+_ErrorBase = namedtuple('Error', ['error_code', 'description', 'retry_after', 'migrate_to_chat_id'])
+_ErrorBase.__new__.__defaults__ = (None, None)
+
+
+class Error(_ErrorBase):
+    """The error code and message returned when a request was successfuly but the method call was invalid
+
+    Attributes:
+        error_code  (int)   :An Integer ‘error_code’ field is also returned, but its
+                            contents are subject to change in the future.
+        description (str)   :The description of the error as reported by Telegram
+        retry_after (int)   :*Optional.* In case of exceeding flood control, the number of seconds left to wait
+                            before the request can be repeated
+        migrate_to_chat_id (int) :*Optional.* The group has been migrated to a supergroup with the specified
+                                 identifier
+
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def from_result(result):
+        parameters = result.get('parameters') or {}
+
+        return Error(
+            error_code=result.get('error_code'),
+            description=result.get('description'),
+            retry_after=parameters.get('retry_after'),
+            migrate_to_chat_id=parameters.get('migrate_to_chat_id'),
+        )
+
+
+class TelegramError(Exception):
+    """Raised by the :attr:`TelegramBotRPCRequest.future` of a request the API answered with an :class:`Error`
+
+    Attributes:
+        error (Error) :The error returned by the API
+    """
+
+    def __init__(self, error):
+        super(TelegramError, self).__init__(error.error_code, error.description)
+        self.error = error
+
+
+class RequestTimeout(Exception):
+    """The error of a request that timed out: connecting or reading took longer than its ``request_timeout``, or
+    its ``deadline`` passed before it could finish"""
+
+
+class ConnectError(Exception):
+    """The error of a request that failed while connecting to the Bot API server, before anything was sent. Unlike
+    errors while the request is being sent or answered, this guarantees Telegram did not act on it"""
+
+
+class ConnectTimeout(RequestTimeout, ConnectError):
+    """The error of a request that timed out while connecting"""
+
+
+class RequestCancelled(Exception):
+    """The error of a request that was cancelled with :meth:`TelegramBotRPCRequest.cancel`"""
+
+
+class CircuitOpen(Exception):
+    """The error of a request refused by an open :class:`CircuitBreaker`, without being sent
+
+    Attributes:
+        retry_after (float) :Seconds until the circuit lets probe requests through again
+    """
+
+    def __init__(self, method_class, retry_after):
+        super(CircuitOpen, self).__init__('Circuit for {0} calls is open'.format(method_class), retry_after)
+        self.retry_after = retry_after
+
+
+"""
+RPC Objects
+"""
+
+
+class ResultMode(str, Enum):
+    """Used to specify how the result of an API call is decoded.
+
+    Attributes:
+        TYPED : 'typed', the result is decoded into the types of this module (the default)
+        LAZY: 'lazy', updates and messages are returned as :class:`LazyUpdate` and :class:`LazyMessage`, which
+              only decode the fields that are accessed
+        COMPACT: 'compact', messages, including those inside updates and callback queries, are returned as
+                 :class:`CompactMessage`, which only stores the fields that are present
+        RAW: 'raw', the result is returned as decoded from JSON (dicts and lists), without building any objects.
+             ``Update.from_dict`` (or ``LazyUpdate.from_dict``) turns an update into its type later on
+        BYTES: 'bytes', the body of a successful response is returned as received, without decoding it at all.
+               It still holds the whole API response, e.g. ``{"ok":true,"result":[...]}``
+
+    :example:
+
+    ::
+
+        bot.get_updates(result_mode=ResultMode.LAZY)
+
+    """
+    TYPED = 'typed'
+    LAZY = 'lazy'
+    COMPACT = 'compact'
+    RAW = 'raw'
+    BYTES = 'bytes'
+
+
+class RequestMethod(str, Enum):
+    """Used to specify the HTTP request method.
+
+    Attributes:
+        GET : 'GET'
+        POST: 'POST'
+
+    :example:
+
+    ::
+
+        bot.get_me(request_method=RequestMethod.GET)
+
+    """
+    GET = 'GET'
+    POST = 'POST'
+
+
+class Priority(str, Enum):
+    """Used to specify how urgently a request should be sent, when requests queue up for a bot's workers.
+
+    Attributes:
+        INTERACTIVE : 'interactive', for calls a user is waiting on. Default for ``answerCallbackQuery`` and
+                      ``answerInlineQuery``
+        NORMAL      : 'normal', the default
+        BULK        : 'bulk', for broadcasts and other background traffic
+
+    :example:
+
+    ::
+
+        bot.send_message(chat_id, 'Newsletter', priority=Priority.BULK)
+
+    """
+    INTERACTIVE = 'interactive'
+    NORMAL = 'normal'
+    BULK = 'bulk'
+
+
+_interactive_methods = frozenset(['answerCallbackQuery', 'answerInlineQuery'])
+
+
+class JSONCodec(object):
+    """Decodes API responses and encodes the JSON serialized parameters of requests (``reply_markup``, inline query
+    results, media groups). Pass one as ``json_codec`` to :class:`TelegramBot` to use a faster JSON library than
+    :mod:`json`, see :func:`create_json_codec`.
+    """
+    __metaclass__ = ABCMeta
+
+    name = None
+
+    @abstractmethod
+    def loads(self, data):
+        """Decode a JSON document
+
+        :param data: The UTF-8 encoded document
+        :type data: bytes
+        :returns: The decoded object
+        :raises ValueError: If ``data`` is not valid JSON
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def dumps(self, obj):
+        """Encode an object as JSON
+
+        :returns: The JSON document
+        :rtype: str
+        """
+        raise NotImplementedError
+
+
+class StdlibJSONCodec(JSONCodec):
+    """A :class:`JSONCodec` using the standard library :mod:`json` module"""
+    name = 'json'
+
+    def loads(self, data):
+        return json.loads(data.decode('utf-8'))
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+
+class OrjsonCodec(JSONCodec):
+    """A :class:`JSONCodec` using `orjson <https://github.com/ijl/orjson>`_"""
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._json = orjson
+
+    def loads(self, data):
+        return self._json.loads(data)
+
+    def dumps(self, obj):
+        return self._json.dumps(obj).decode('utf-8')
+
+
+class UjsonCodec(JSONCodec):
+    """A :class:`JSONCodec` using `ujson <https://github.com/ultrajson/ultrajson>`_"""
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._json = ujson
+
+    def loads(self, data):
+        return self._json.loads(data)
+
+    def dumps(self, obj):
+        return self._json.dumps(obj)
+
+
+class RapidjsonCodec(JSONCodec):
+    """A :class:`JSONCodec` using `python-rapidjson <https://github.com/python-rapidjson/python-rapidjson>`_"""
+    name = 'rapidjson'
+
+    def __init__(self):
+        import rapidjson
+        self._json = rapidjson
+
+    def loads(self, data):
+        return self._json.loads(data)
+
+    def dumps(self, obj):
+        return self._json.dumps(obj)
+
+
+_json_codecs = OrderedDict((codec.name, codec) for codec in (OrjsonCodec, RapidjsonCodec, UjsonCodec, StdlibJSONCodec))
+_default_json_codec = StdlibJSONCodec()
+
+
+def create_json_codec(name='auto'):
+    """Create a :class:`JSONCodec` for one of the supported JSON libraries
+
+    :param name: ``'orjson'``, ``'rapidjson'``, ``'ujson'`` or ``'json'``, or ``'auto'`` for the fastest of them
+                 that is installed
+    :type name: str
+    :returns: The codec
+    :rtype: JSONCodec
+    :raises ImportError: If the library is not installed
+    :raises ValueError: If ``name`` is not a supported library
+    """
+    if name == 'auto':
+        for codec in _json_codecs.values():
+            try:
+                return codec()
+            except ImportError:
+                pass
+    if name not in _json_codecs:
+        raise ValueError('Unknown JSON library {!r}, use one of {}'.format(name, ', '.join(_json_codecs)))
+    return _json_codecs[name]()
+
+
+class TransportResponse(object):
+    """The response of a :class:`Transport`, for transports whose HTTP library does not provide a suitable one.
+
+    :param status_code: The HTTP status code
+    :param content: The complete body, if it has already been read
+    :param chunks: An iterable over the body in chunks, used by :meth:`iter_content` when ``content`` is None
+    :param close: Called once the body is no longer needed
+    :param abort: Called from another thread to stop the body from being read, see :meth:`abort`
+
+    :type status_code: int
+    :type content: bytes
+    """
+
+    def __init__(self, status_code, content=None, chunks=None, close=None, abort=None):
+        self.status_code = status_code
+        self._content = content
+        self._chunks = chunks
+        self._close = close
+        self._abort = abort
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = b''.join(self._chunks)
+        return self._content
+
+    def iter_content(self, chunk_size=1024):
+        if self._content is not None:
+            return (self._content[i:i + chunk_size] for i in range(0, len(self._content), chunk_size))
+        return self._chunks
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+
+    def abort(self):
+        """Break off reading the body, waking up the thread blocked reading it. Safe to call from any thread"""
+        if self._abort is not None:
+            self._abort()
+
+
+def _shutdown_connection(raw):
+    """Shut down the socket a :class:`urllib3.response.HTTPResponse` is read from, so a blocked read returns"""
+    sock = getattr(getattr(raw, 'connection', None), 'sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except (OSError, socket.error):
+            pass  # Already closed
+
+
+def _abort_response(resp):
+    """Abort reading a streamed response of any :class:`Transport`"""
+    if hasattr(resp, 'abort'):
+        resp.abort()
+    else:
+        _shutdown_connection(getattr(resp, 'raw', None))  # A requests.Response
+
+
+class Transport(object):
+    """The HTTP layer a request is sent through. Select one per bot with the ``transport`` argument of
+    :class:`TelegramBot`, or per call by passing ``transport`` to any API method.
+
+    A response returned by :meth:`send` or :meth:`stream` provides ``status_code``, ``content``,
+    ``iter_content(chunk_size)`` and ``close()``, the way a :class:`requests.Response` does (see
+    :class:`TransportResponse`). A streamed response may also provide ``abort()``, which is called from another
+    thread when the request is cancelled while its body is being read.
+
+    .. note::
+
+        Cancelling a request can only break off the transfer once the response headers have arrived and the body is
+        streamed, as for downloads and :class:`TelegramUpdateStreamRequest`. Neither :mod:`requests` nor
+        :mod:`urllib3` hands out the connection before that, so a request waiting for the response headers (e.g. a
+        long polling ``getUpdates``) is abandoned instead, and its connection is freed once the response arrives or
+        ``request_timeout`` passes.
+    """
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def prepare(self, method, url, data=None, files=None):
+        """Build a request that can be passed to :meth:`send` or :meth:`stream`
+
+        :param method: The HTTP method
+        :param url: The URL of the API method or file
+        :param data: The parameters of the API method
+        :param files: a list of :class:`InputFile`s to be uploaded
+
+        :type method: RequestMethod
+        :type url: str
+        :type data: dict
+        :type files: `list` of :class:`InputFile`
+        """
+        raise NotImplementedError("")
+
+    @abstractmethod
+    def send(self, request, timeout=None):
+        """Send a prepared request and read the whole response
+
+        :param timeout: ``(connect, read)`` timeouts in seconds, or None to wait forever. When exceeded,
+                        :class:`RequestTimeout` is raised
+        :type timeout: tuple
+        """
+        raise NotImplementedError("")
+
+    @abstractmethod
+    def stream(self, request, timeout=None):
+        """Send a prepared request, leaving the body to be read with ``iter_content``. The response must be closed"""
+        raise NotImplementedError("")
+
+
+def _form_fields(params):
+    """Flatten request parameters into (name, value) pairs the way :mod:`requests` encodes form data"""
+    fields = []
+    for name, value in (params or {}).items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for v in values:
+            if v is not None:
+                fields.append((name, v if isinstance(v, (str, bytes)) else str(v)))
+    return fields
+
+
+class RequestsTransport(Transport):
+    """Sends requests with :mod:`requests`.
+
+    :param session: The session to send requests through, see :func:`create_session`. When omitted a new
+                    (unpooled) session is created
+
+    :type session: requests.Session
+    """
+
+    def __init__(self, session=None):
+        self.session = session if session is not None else _new_session()
+
+    def prepare(self, method, url, data=None, files=None):
+        return Request(method, url, data=data, files=files).prepare()
+
+    def send(self, request, timeout=None):
+        return self._send(request, timeout, False)
+
+    def stream(self, request, timeout=None):
+        return self._send(request, timeout, True)
+
+    def _send(self, request, timeout, stream):
+        try:
+            return self.session.send(request, stream=stream, timeout=timeout)
+        except RequestsConnectTimeout as e:
+            raise ConnectTimeout(str(e))
+        except RequestsTimeout as e:
+            raise RequestTimeout(str(e))
+        except RequestsConnectionError as e:
+            if isinstance(getattr(e.args[0] if e.args else None, 'reason', None),
+                          urllib3.exceptions.NewConnectionError):
+                raise ConnectError(str(e))
+            raise  # e.g. the connection was reset after sending
+
+
+class Urllib3Transport(Transport):
+    """Sends requests with a :class:`urllib3.PoolManager`, skipping the per-request overhead of :mod:`requests`.
+
+    :param pool_manager: The pool manager to send requests through. When omitted one is created from the
+                         remaining arguments
+    :param num_pools: The number of hosts to keep connection pools for
+    :param maxsize: The maximum number of connections kept open per host
+    :param block: If True, requests wait for a free connection instead of opening one beyond ``maxsize``
+
+    :type pool_manager: urllib3.PoolManager
+    :type num_pools: int
+    :type maxsize: int
+    :type block: bool
+    """
+
+    def __init__(self, pool_manager=None, num_pools=10, maxsize=10, block=False):
+        if pool_manager is None:
+            pool_manager = urllib3.PoolManager(num_pools=num_pools, maxsize=maxsize, block=block)
+        self.pool_manager = pool_manager
+
+    def prepare(self, method, url, data=None, files=None):
+        fields = _form_fields(data)
+        if method == RequestMethod.GET:
+            if fields:
+                url = '{}?{}'.format(url, urlencode(fields))
+            return method.value, url, None, {}
+
+        if files:
+            for input_file in files:
+                file_info = input_file.file_info
+                if file_info.mime_type is None:
+                    fields.append((input_file.form, (file_info.file_name, file_info.fp.read())))
+                else:
+                    fields.append((input_file.form, (file_info.file_name, file_info.fp.read(), file_info.mime_type)))
+            body, content_type = urllib3.encode_multipart_formdata(fields)
+        else:
+            body, content_type = urlencode(fields), 'application/x-www-form-urlencoded'
+
+        return method.value, url, body, {'Content-Type': content_type}
+
+    def _urlopen(self, request, timeout, preload_content):
+        method, url, body, headers = request
+        if timeout is not None:
+            timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        try:
+            return self.pool_manager.urlopen(method, url, body=body, headers=headers, retries=False,
+                                             timeout=timeout, preload_content=preload_content)
+        except urllib3.exceptions.NewConnectionError as e:
+            raise ConnectError(str(e))
+        except urllib3.exceptions.ConnectTimeoutError as e:
+            raise ConnectTimeout(str(e))
+        except urllib3.exceptions.TimeoutError as e:
+            raise RequestTimeout(str(e))
+
+    def send(self, request, timeout=None):
+        resp = self._urlopen(request, timeout, True)
+        return TransportResponse(resp.status, content=resp.data)
+
+    def stream(self, request, timeout=None):
+        resp = self._urlopen(request, timeout, False)
+        return TransportResponse(resp.status, chunks=resp.stream(1024), close=resp.release_conn,
+                                 abort=lambda: _shutdown_connection(resp))
+
+
+class LoopbackTransport(Transport):
+    """Dispatches requests in-process to a fake Bot API, such as :class:`FakeBotAPI`, without touching the network.
+
+    Responses are still JSON encoded, so the complete decoding path of the library is exercised. Useful for tests
+    and for benchmarking the library itself. If the ``latency`` of the fake exceeds the read timeout of a request,
+    :class:`RequestTimeout` is raised once the timeout has passed.
+
+    :param api: The fake to dispatch to. It must provide ``handle(token, method, params, files)`` returning the
+                decoded API response, and ``download(token, file_path)`` returning the file contents or None
+
+    :type api: FakeBotAPI
+    """
+
+    def __init__(self, api):
+        self.api = api
+
+    def prepare(self, method, url, data=None, files=None):
+        return url, dict(data or {}), list(files or ())
+
+    def _dispatch(self, request):
+        url, params, files = request
+        segments = urlparse(url).path.split('/')
+        if 'file' in segments:  # .../file/bot<token>/<file_path>
+            i = segments.index('file') + 1
+            content = self.api.download(segments[i][3:], '/'.join(segments[i + 1:]))
+            if content is None:
+                return TransportResponse(404, content=b'')
+            return TransportResponse(200, content=content)
+
+        # .../bot<token>/<method>
+        api_response = self.api.handle(segments[-2][3:], segments[-1], params, files)
+        status_code = 200 if api_response.get('ok') else api_response.get('error_code') or 400
+        content = json.dumps(api_response, separators=(',', ':'))  # Laid out compactly, as the Bot API does
+        return TransportResponse(status_code, content=content.encode('utf-8'))
+
+    def _check_timeout(self, timeout):
+        if timeout is not None and getattr(self.api, 'latency', 0) > timeout[1]:
+            time.sleep(timeout[1])
+            raise RequestTimeout('Read timed out. (read timeout={0})'.format(timeout[1]))
+
+    def send(self, request, timeout=None):
+        self._check_timeout(timeout)
+        return self._dispatch(request)
+
+    def stream(self, request, timeout=None):
+        self._check_timeout(timeout)
+        return self._dispatch(request)
+
+
+class FakeBotAPI(object):
+    """A small in-memory imitation of the Bot API server, to be used with :class:`LoopbackTransport`.
+
+    Messages sent through it are recorded in :attr:`sent`, updates queued with :meth:`push_update` are served by
+    ``getUpdates`` (including long polling) and files added with :meth:`add_file` can be fetched with ``getFile`` and
+    downloaded. Other methods can be added to or replaced in :attr:`methods`, a mapping of API method names to
+    callables taking ``(token, params, files)`` and returning the result, or raising :class:`FakeBotAPI.Failure`.
+    Unknown methods fail the way the real server does.
+
+    :param bot_user: The result of ``getMe``
+    :param latency: Seconds to sleep before answering, to simulate a network round trip
+
+    :type bot_user: dict
+    :type latency: float
+    """
+
+    class Failure(Exception):
+        def __init__(self, error_code, description, parameters=None):
+            super(FakeBotAPI.Failure, self).__init__(error_code, description)
+            self.error_code = error_code
+            self.description = description
+            self.parameters = parameters
+
+    def __init__(self, bot_user=None, latency=0):
+        self.bot_user = bot_user if bot_user is not None else dict(id=1, is_bot=True, first_name='Fake', username='fake_bot')
+        self.latency = latency
+
+        self.sent = []
+        self.files = {}
+
+        self._updates = deque()
+        self._update_id = 0
+        self._message_id = 0
+        self._lock = Lock()
+        self._has_updates = Condition(self._lock)
+
+        self.methods = {
+            'getMe': lambda token, params, files: self.bot_user,
+            'sendMessage': self._send_message,
+            'forwardMessage': self._send_message,
+            'editMessageText': self._send_message,
+            'sendChatAction': lambda token, params, files: True,
+            'deleteMessage': lambda token, params, files: True,
+            'answerCallbackQuery': lambda token, params, files: True,
+            'answerInlineQuery': lambda token, params, files: True,
+            'getChat': lambda token, params, files: self._chat(params.get('chat_id')),
+            'getChatMember': lambda token, params, files: dict(user=dict(id=params.get('user_id'), is_bot=False,
+                                                                         first_name='User'), status='member'),
+            'getFile': self._get_file,
+            'getUpdates': self._get_updates,
+        }
+
+    def push_update(self, update):
+        """Queue an update (as a dict, without ``update_id``) to be returned by ``getUpdates``
+
+        :returns: The update_id assigned to the update
+        :rtype: int
+        """
+        with self._lock:
+            self._update_id += 1
+            update = OrderedDict([('update_id', self._update_id)] + list(update.items()))  # First, as in the Bot API
+            self._updates.append(update)
+            self._has_updates.notify_all()
+            return self._update_id
+
+    def add_file(self, file_path, content):
+        """Make ``content`` downloadable as ``file_path``, and fetchable with ``getFile`` using the same id"""
+        self.files[file_path] = content
+
+    def handle(self, token, method, params, files):
+        if self.latency:
+            time.sleep(self.latency)
+
+        handler = self.methods.get(method)
+        if handler is None:
+            return dict(ok=False, error_code=404, description='Not Found: method not found')
+
+        try:
+            return dict(ok=True, result=handler(token, params, files))
+        except FakeBotAPI.Failure as e:
+            api_response = dict(ok=False, error_code=e.error_code, description=e.description)
+            if e.parameters is not None:
+                api_response['parameters'] = e.parameters
+            return api_response
+
+    def download(self, token, file_path):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.files.get(file_path)
+
+    @staticmethod
+    def _chat(chat_id):
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            return dict(id=-1, type='channel', username=str(chat_id).lstrip('@'))
+        return dict(id=chat_id, type='private' if chat_id > 0 else 'supergroup')
+
+    def _send_message(self, token, params, files):
+        with self._lock:
+            self._message_id += 1
+            message = dict(message_id=self._message_id, date=int(time.time()), chat=self._chat(params.get('chat_id')),
+                           **{'from': self.bot_user})
+        if params.get('text') is not None:
+            message['text'] = params['text']
+        self.sent.append(dict(params))
+        return message
+
+    def _get_file(self, token, params, files):
+        file_id = params.get('file_id')
+        if file_id not in self.files:
+            raise FakeBotAPI.Failure(400, 'Bad Request: invalid file id')
+        return dict(file_id=file_id, file_size=len(self.files[file_id]), file_path=file_id)
+
+    def _get_updates(self, token, params, files):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        deadline = time.time() + float(params.get('timeout') or 0)
+        with self._lock:
+            while self._updates and self._updates[0]['update_id'] < offset:
+                self._updates.popleft()
+            while not self._updates and time.time() < deadline:
+                self._has_updates.wait(deadline - time.time())
+            return [update for update in self._updates if update['update_id'] >= offset][:limit]
+
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+_executors = weakref.WeakSet()
+
+
+def _shutdown_executors():
+    _timer.shutdown()
+    for executor in list(_executors):
+        executor.shutdown(wait=True)
+
+
+atexit.register(_shutdown_executors)  # Let queued requests finish, as the old per-request threads did; the
+# ones still waiting for the rate limiter or a retry are cancelled
+
+
+class BoundedExecutor(Executor):
+    """An executor that runs calls on at most ``max_workers`` threads and queues at most ``queue_size`` pending calls
+    per :class:`Priority`.
+
+    Waiting calls are picked up by priority, so interactive calls overtake queued bulk traffic. A class that has
+    been passed over ``starvation_limit`` times in a row while it had calls waiting is served next, so bulk traffic
+    keeps moving even when higher classes are saturated.
+
+    When the queue of a class is full, :meth:`submit` blocks until a worker picks up one of its calls, pushing back
+    on the caller instead of growing without bounds. Calls submitted from one of the executor's own workers (e.g. an
+    ``on_success`` callback sending a reply) are never blocked. A worker waiting for a request with
+    :meth:`TelegramBotRPCRequest.wait` or :meth:`TelegramBotRPCRequest.join` runs the request itself if it is still
+    queued, and otherwise does not count towards ``max_workers`` while it waits, so callbacks cannot deadlock the
+    pool.
+
+    Several clients can share one executor fairly through :meth:`lane`: each lane has queues of its own, and within
+    a priority class the lanes with calls waiting take turns, so one busy lane cannot starve the others.
+
+    :param max_workers: The maximum number of worker threads, started on demand
+    :param queue_size: The maximum number of calls of one priority (and lane) waiting for a worker. ``0`` means no
+                       limit
+    :param starvation_limit: How many times in a row a waiting priority class may be passed over
+    :param idle_timeout: Seconds a worker waits for calls before it exits, or None to keep workers until
+                         :meth:`shutdown`
+
+    :type max_workers: int
+    :type queue_size: int
+    :type starvation_limit: int
+    :type idle_timeout: float
+    """
+
+    def __init__(self, max_workers=16, queue_size=1000, starvation_limit=10, idle_timeout=60):
+        if max_workers <= 0:
+            raise ValueError('max_workers must be greater than 0')
+
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.starvation_limit = starvation_limit
+        self.idle_timeout = idle_timeout
+
+        # priority -> lane -> calls, priorities in order of precedence, lanes in turn order
+        self._pending = OrderedDict((priority, OrderedDict()) for priority in Priority)
+        self._skipped = dict((priority, 0) for priority in Priority)
+        self._count = 0
+        self._lock = Lock()
+        self._not_empty = Condition(self._lock)
+        self._not_full = Condition(self._lock)
+        self._threads = []
+        self._idle = 0
+        self._blocked = 0
+        self._shutdown = False
+        self._local = local()
+
+        _executors.add(self)
+
+    def submit(self, fn, *args, **kwargs):
+        return self.submit_with_priority(Priority.NORMAL, fn, *args, **kwargs)
+
+    def submit_with_priority(self, priority, fn, *args, **kwargs):
+        """Like :meth:`submit`, queuing the call under the given :class:`Priority`"""
+        return self._enqueue(priority, None, fn, args, kwargs)
+
+    def lane(self, key):
+        """An executor submitting to this one, queued separately from other lanes and served in turn with them
+
+        :param key: Identifies the lane, e.g. a bot token
+        :rtype: concurrent.futures.Executor
+        """
+        return _ExecutorLane(self, key)
+
+    def _enqueue(self, priority, lane, fn, args, kwargs):
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+
+            lanes = self._pending[Priority(priority)]
+            if not self._is_worker():
+                while self.queue_size and len(lanes.get(lane, ())) >= self.queue_size:
+                    self._not_full.wait()
+                    if self._shutdown:
+                        raise RuntimeError('cannot schedule new futures after shutdown')
+
+            queue = lanes.get(lane)
+            if queue is None:
+                queue = lanes[lane] = deque()
+            queue.append((future, fn, args, kwargs))
+            self._count += 1
+            if self._count > self._idle and len(self._threads) < self.max_workers + self._blocked:
+                self._start_worker()
+            self._not_empty.notify()
+
+        return future
+
+    def _is_worker(self):
+        return getattr(self._local, 'worker', False)
+
+    def _wait(self, event, timeout=None):
+        """Wait for ``event`` on one of the workers, which does not count towards ``max_workers`` meanwhile: if
+        calls are waiting, another worker is started to run them"""
+        with self._lock:
+            self._blocked += 1
+            if self._count > self._idle and len(self._threads) < self.max_workers + self._blocked:
+                self._start_worker()
+        try:
+            return event.wait(timeout)
+        finally:
+            with self._lock:
+                self._blocked -= 1
+
+    def _pop(self):
+        """Take the next call to run. Must be called with the lock held and calls pending"""
+        waiting = [priority for priority, lanes in self._pending.items() if lanes]
+        starved = [priority for priority in waiting if self._skipped[priority] >= self.starvation_limit]
+        chosen = (starved or waiting)[0]
+        for priority in waiting:
+            self._skipped[priority] = 0 if priority is chosen else self._skipped[priority] + 1
+
+        lanes = self._pending[chosen]
+        lane, queue = next(iter(lanes.items()))
+        del lanes[lane]
+        if len(queue) > 1:
+            lanes[lane] = queue  # Its next call waits for the other lanes' turns
+
+        self._count -= 1
+        return queue.popleft()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._shutdown = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+            threads = list(self._threads)
+
+        if wait:
+            for thread in threads:
+                if thread is not current_thread():  # Shut down from a call it is running
+                    thread.join()
+
+    def _start_worker(self):
+        thread = Thread(target=self._work, name='twx.botapi-worker-{}'.format(len(self._threads)))
+        thread.daemon = True
+        self._threads.append(thread)
+        thread.start()
+
+    def _work(self):
+        self._local.worker = True
+        while True:
+            with self._lock:
+                while not self._count and not self._shutdown:
+                    self._idle += 1
+                    notified = self._not_empty.wait(self.idle_timeout)
+                    self._idle -= 1
+                    if not notified and not self._count:
+                        self._threads.remove(current_thread())  # Idle for too long
+                        return
+
+                if not self._count:
+                    return  # shut down and drained
+
+                future, fn, args, kwargs = self._pop()
+                self._not_full.notify_all()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+class _ExecutorLane(Executor):
+    """A lane of a :class:`BoundedExecutor`, see :meth:`BoundedExecutor.lane`"""
+
+    def __init__(self, executor, key):
+        self.executor = executor
+        self.key = key
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor._enqueue(Priority.NORMAL, self.key, fn, args, kwargs)
+
+    def submit_with_priority(self, priority, fn, *args, **kwargs):
+        return self.executor._enqueue(priority, self.key, fn, args, kwargs)
+
+    def shutdown(self, wait=True):
+        pass  # The executor is shared with the other lanes
+
+
+class _Timer(object):
+    """Runs callables after a delay, all on one background thread, so delayed requests do not hold a worker"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = Condition()
+        self._thread = None
+        self._running = False
+        self._closed = False
+
+    def call_later(self, delay, fn, on_cancel=None):
+        """Call ``fn`` in ``delay`` seconds, or ``on_cancel`` if the timer is shut down before then
+
+        :returns: The entry, to pass to :meth:`cancel`
+        """
+        with self._cond:
+            if not self._closed:
+                entry = [_monotonic() + delay, next(self._counter), fn, on_cancel]
+                heapq.heappush(self._heap, entry)
+                if self._thread is None:
+                    self._thread = Thread(target=self._run, name='twx.botapi-timer')
+                    self._thread.daemon = True
+                    self._thread.start()
+                self._cond.notify_all()
+                return entry
+
+        if on_cancel is not None:
+            on_cancel()
+        return None
+
+    def cancel(self, entry):
+        """Drop an entry returned by :meth:`call_later`, unless it already ran"""
+        with self._cond:
+            try:
+                self._heap.remove(entry)
+            except ValueError:
+                return
+            heapq.heapify(self._heap)
+            self._cond.notify_all()
+
+    def shutdown(self, grace=1):
+        """Run the calls that are due within ``grace`` seconds, and cancel the others instead of waiting for them"""
+        with self._cond:
+            self._closed = True
+            due = _monotonic() + grace
+            pending = [entry for entry in self._heap if entry[0] > due]
+            self._heap = [entry for entry in self._heap if entry[0] <= due]
+            heapq.heapify(self._heap)
+            while self._heap or self._running:
+                self._cond.wait()
+
+        for _, _, _, on_cancel in sorted(pending):
+            if on_cancel is not None:
+                on_cancel()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+                while True:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    remaining = self._heap[0][0] - _monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                _, _, fn, _ = heapq.heappop(self._heap)
+                self._running = True
+
+            try:
+                fn()
+            except Exception:
+                logging.getLogger('twx.botapi').exception('Delayed call failed')
+
+
+_timer = _Timer()
+_claim_lock = Lock()
 
-    Attributes:
-        phone_number    (str)     :Contact's phone number
-        first_name      (str)     :Contact's first name
-        last_name       (str)     :*Optional.* Contact's last name
-    """
 
-    def __init__(self, phone_number, first_name, last_name=None):
-        self.phone_number = phone_number
-        self.first_name = first_name
-        self.last_name = last_name
+def _call_soon(executor, fn):
+    """Run ``fn`` on ``executor``, which is a :class:`concurrent.futures.Executor` or an asyncio event loop"""
+    def call():
+        try:
+            fn()
+        except Exception:
+            logging.getLogger('twx.botapi').exception('Callback failed')
 
+    if hasattr(executor, 'call_soon_threadsafe'):
+        executor.call_soon_threadsafe(call)
+    else:
+        executor.submit(call)
 
-"""
-Types added for utility purposes
-"""
 
-_ErrorBase = namedtuple('Error', ['error_code', 'description'])
+class RateLimiter(object):
+    """Schedules outgoing calls so they stay within Telegram's flood limits, instead of bursting and running into
+    ``429 Too Many Requests``.
 
+    Each call is checked against a global schedule and a bucket for its chat, both per method class (see
+    :meth:`method_class`), and delayed until both allow it. Calls are spaced evenly, so a limit of 20 per minute
+    lets one call through every 3 seconds. A backlog for one chat does not hold back calls to other chats: they
+    take the free global slots in between. Buckets of chats that have been idle long enough to be full again are
+    dropped.
 
-class Error(_ErrorBase):
-    """The error code and message returned when a request was successfuly but the method call was invalid
+    :param global_limit: ``(calls, seconds)`` allowed over all chats
+    :param private_limit: ``(calls, seconds)`` allowed per private chat
+    :param group_limit: ``(calls, seconds)`` allowed per group, supergroup or channel
+    :param bulk_headroom: The share of global slots :attr:`Priority.BULK` calls may not take, so other calls do not
+                          queue up behind a broadcast
 
-    Attributes:
-        error_code  (int)   :An Integer ‘error_code’ field is also returned, but its
-                            contents are subject to change in the future.
-        description (str)   :The description of the error as reported by Telegram
+    :type global_limit: tuple
+    :type private_limit: tuple
+    :type group_limit: tuple
+    :type bulk_headroom: float
+
+    :example:
+
+    ::
+
+        bot = TelegramBot('<API TOKEN>', rate_limiter=RateLimiter())
 
     """
-    __slots__ = ()
 
-    @staticmethod
-    def from_result(result):
-        return Error(error_code=result.get('error_code'), description=result.get('description'))
+    def __init__(self, global_limit=(30, 1), private_limit=(1, 1), group_limit=(20, 60), bulk_headroom=0.2):
+        self.global_interval = float(global_limit[1]) / global_limit[0]
+        self.private_interval = float(private_limit[1]) / private_limit[0]
+        self.group_interval = float(group_limit[1]) / group_limit[0]
+        self.bulk_stride = int(round(1 / bulk_headroom)) if bulk_headroom else 0  # every n-th slot is kept free
 
+        self._lock = Lock()
+        self._slots = {}  # method class -> reserved global slots at or after the frontier
+        self._frontiers = {}  # method class -> first global slot that may still be free
+        self._prune_size = 1024
+        self._chats = OrderedDict()  # least recently used first
 
-"""
-RPC Objects
-"""
+    def method_class(self, api_method):
+        """The class an API method is rate limited under, or None if calls to it are not limited.
+        By default only methods posting messages (``send*`` except ``sendChatAction``, ``forwardMessage``) are"""
+        if api_method == 'forwardMessage' or api_method.startswith('send') and api_method != 'sendChatAction':
+            return 'message'
+        return None
 
+    def _chat_interval(self, chat_id):
+        try:
+            return self.private_interval if int(chat_id) > 0 else self.group_interval
+        except (TypeError, ValueError):
+            return self.group_interval  # @channelusername
 
-class RequestMethod(str, Enum):
-    """Used to specify the HTTP request method.
+    def reserve(self, api_method, params, priority=Priority.NORMAL):
+        """Reserve a slot for a call
 
-    Attributes:
-        GET : 'GET'
-        POST: 'POST'
+        :returns: The number of seconds the call has to wait before it may be sent
+        :rtype: float
+        """
+        method_class = self.method_class(api_method)
+        if method_class is None:
+            return 0
+
+        chat_id = params.get('chat_id') if params else None
+        now = _monotonic()
+        with self._lock:
+            at = now
+            if chat_id is not None:
+                key = (method_class, chat_id)
+                at = max(at, self._chats.pop(key, now))
+
+            at = self._reserve_slot(method_class, at, now, Priority(priority) == Priority.BULK)
+
+            if chat_id is not None:
+                self._chats[key] = at + self._chat_interval(chat_id)
+
+            while self._chats:
+                key = next(iter(self._chats))
+                if self._chats[key] > now:
+                    break
+                del self._chats[key]
+
+        return at - now
+
+    def _reserve_slot(self, method_class, at, now, bulk):
+        """Take the first free global slot at or after ``at`` and return its time"""
+        slots = self._slots.setdefault(method_class, set())
+        frontier = max(self._frontiers.get(method_class, 0), int(math.ceil(now / self.global_interval)))
+
+        slot = max(frontier, int(math.ceil(at / self.global_interval)))
+        while slot in slots or bulk and self.bulk_stride and slot % self.bulk_stride == 0:
+            slot += 1
+        slots.add(slot)
+
+        while frontier in slots:
+            slots.remove(frontier)
+            frontier += 1
+        self._frontiers[method_class] = frontier
+
+        if len(slots) > self._prune_size:  # drop slots the frontier skipped over as time passed
+            slots = self._slots[method_class] = set(s for s in slots if s >= frontier)
+            self._prune_size = max(1024, 2 * len(slots))
+
+        return slot * self.global_interval
+
+
+class RetryPolicy(object):
+    """Decides whether, and after how long, a failed request is sent again.
+
+    * Flood control errors (429) are retried after exactly the ``retry_after`` Telegram asks for.
+    * Errors telling that a group was migrated to a supergroup are retried at once, against the new chat.
+    * Server errors (``retry_codes``) are retried with exponential backoff and full jitter.
+    * Transport errors are retried the same way if the request cannot have reached Telegram (a
+      :class:`ConnectError`, e.g. a refused connection or a connect timeout), or if the method is in
+      ``idempotent_methods``. Other methods are not sent again after e.g. a read timeout, as Telegram may already
+      have acted on them and a resent message would be delivered twice.
+    * Other errors are not retried.
+
+    :param max_attempts: The maximum number of attempts, including the first one
+    :param backoff: The backoff before the second attempt, in seconds. It doubles with every attempt
+    :param max_backoff: The upper bound of the backoff, in seconds
+    :param deadline: Seconds after the first attempt by which the request must have succeeded. No attempt is
+                     scheduled beyond it. ``None`` for no deadline
+    :param retry_codes: The error codes that are retried with backoff
+    :param idempotent_methods: The API methods that are safe to send twice, retried after any transport error.
+                               ``None`` for the read-only ``get*`` methods
+
+    :type max_attempts: int
+    :type backoff: float
+    :type max_backoff: float
+    :type deadline: float
+    :type retry_codes: `set` of int
+    :type idempotent_methods: `set` of str
+    """
+
+    def __init__(self, max_attempts=5, backoff=0.5, max_backoff=30, deadline=None,
+                 retry_codes=frozenset([500, 502, 503, 504]), idempotent_methods=None):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.retry_codes = retry_codes
+        self.idempotent_methods = idempotent_methods
+
+    def is_idempotent(self, api_method):
+        """Whether ``api_method`` may be sent again after a transport error that left its outcome unknown"""
+        if self.idempotent_methods is None:
+            return api_method is not None and api_method.startswith('get')
+        return api_method in self.idempotent_methods
+
+    def get_delay(self, attempt, error, elapsed, api_method=None):
+        """
+        :param attempt: The number of attempts made so far
+        :param error: The error of the last attempt, an :class:`Error` or an exception
+        :param elapsed: Seconds since the first attempt
+        :param api_method: The API method of the request, e.g. ``'sendMessage'``
 
-    :example:
+        :returns: The number of seconds to wait before the next attempt, or None to give up
+        :rtype: float
+        """
+        if attempt >= self.max_attempts:
+            return None
 
-    ::
+        if isinstance(error, Error):
+            if error.migrate_to_chat_id is not None:
+                delay = 0
+            elif error.retry_after is not None:
+                delay = error.retry_after
+            elif error.error_code in self.retry_codes:
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+            else:
+                return None
+        elif isinstance(error, CircuitOpen):
+            return None  # Retrying would defeat failing fast
+        elif isinstance(error, Exception):
+            if not isinstance(error, ConnectError) and not self.is_idempotent(api_method):
+                return None  # It may have been delivered already
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        else:
+            return None
 
-        bot.get_me(request_method=RequestMethod.GET)
+        if self.deadline is not None and elapsed + delay > self.deadline:
+            return None
+        return delay
+
+
+class _Circuit(object):
+    __slots__ = ('state', 'calls', 'failures', 'slow_calls', 'opened_at', 'probes', 'probe_successes', 'probed_at')
+
+    def __init__(self):
+        self.state = CircuitBreaker.CLOSED
+        self.calls = deque()  # (time, failed, slow) of the calls in the window
+        self.failures = 0
+        self.slow_calls = 0
+        self.opened_at = None
+        self.probes = 0
+        self.probe_successes = 0
+        self.probed_at = None
+
+
+class CircuitBreaker(object):
+    """Stops sending requests while the Bot API is failing, so callers fail fast instead of piling up on slow,
+    failing calls.
+
+    Calls are tracked separately per method class (see :meth:`method_class`). A circuit opens when, within the
+    last ``window`` seconds and over at least ``min_calls`` calls, the share of failed calls reaches
+    ``failure_threshold`` or the share of slow calls reaches ``slow_call_threshold``. Failures are exceptions
+    (including timeouts) and server errors (error codes of 500 and above); other API errors are the caller's
+    fault and count as successes. While a circuit is open, requests fail with :class:`CircuitOpen` without being
+    queued. After ``reset_timeout`` seconds it half-opens and lets ``probes`` requests through: if they all
+    succeed it closes, if one fails it opens again. Probes that have not reported back after another
+    ``reset_timeout`` seconds are replaced by new ones.
+
+    :param failure_threshold: Share of failed calls that opens the circuit
+    :param slow_call_duration: Seconds after which a call counts as slow, or None to ignore latency. The long
+                               polling time of ``getUpdates`` is not counted
+    :param slow_call_threshold: Share of slow calls that opens the circuit
+    :param min_calls: The number of calls in the window needed before the circuit can open
+    :param window: Seconds of calls the thresholds are applied to
+    :param reset_timeout: Seconds an open circuit waits before letting probes through
+    :param probes: The number of probe calls let through while half-open
+
+    :type failure_threshold: float
+    :type slow_call_duration: float
+    :type slow_call_threshold: float
+    :type min_calls: int
+    :type window: float
+    :type reset_timeout: float
+    :type probes: int
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=0.5, slow_call_duration=None, slow_call_threshold=0.5, min_calls=10,
+                 window=30, reset_timeout=30, probes=1):
+        self.failure_threshold = failure_threshold
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_threshold = slow_call_threshold
+        self.min_calls = min_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+
+        self._circuits = {}
+        self._lock = Lock()
+
+    def method_class(self, api_method):
+        """The circuit calls to ``api_method`` are tracked in: ``'updates'`` for ``getUpdates``, ``'message'`` for
+        methods posting messages and ``'default'`` for all others"""
+        if api_method == 'getUpdates':
+            return 'updates'
+        if api_method == 'forwardMessage' or api_method.startswith('send') and api_method != 'sendChatAction':
+            return 'message'
+        return 'default'
 
-    """
-    GET = 'GET'
-    POST = 'POST'
+    @staticmethod
+    def is_failure(error):
+        """Whether ``error`` (the error of a finished call, or None) counts as a failure of the API"""
+        if error is None or isinstance(error, (RequestCancelled, CircuitOpen)):
+            return False
+        if isinstance(error, Error):
+            return error.error_code is None or error.error_code >= 500
+        return True
+
+    def _circuit(self, method_class, now):
+        circuit = self._circuits.get(method_class)
+        if circuit is None:
+            circuit = self._circuits[method_class] = _Circuit()
+        elif circuit.state == self.OPEN and now >= circuit.opened_at + self.reset_timeout:
+            circuit.state = self.HALF_OPEN
+            circuit.probes = circuit.probe_successes = 0
+        elif (circuit.state == self.HALF_OPEN and circuit.probes >= self.probes and
+              now >= circuit.probed_at + self.reset_timeout):
+            circuit.probes = circuit.probe_successes = 0  # The probes never reported back, send new ones
+        return circuit
+
+    def state(self, api_method):
+        """The state of the circuit of ``api_method``: :attr:`CLOSED`, :attr:`OPEN` or :attr:`HALF_OPEN`"""
+        with self._lock:
+            return self._circuit(self.method_class(api_method), _monotonic()).state
+
+    def retry_after(self, api_method):
+        """Seconds until a call to ``api_method`` may be attempted, 0 if it may be attempted now"""
+        with self._lock:
+            now = _monotonic()
+            circuit = self._circuit(self.method_class(api_method), now)
+            if circuit.state == self.OPEN:
+                return circuit.opened_at + self.reset_timeout - now
+            if circuit.state == self.HALF_OPEN and circuit.probes >= self.probes:
+                return circuit.probed_at + self.reset_timeout - now  # Waiting for the probes
+            return 0
+
+    def acquire(self, api_method):
+        """Ask to send a call to ``api_method``. While half-open, this takes one of the probes
+
+        :returns: True if the call may be sent
+        :rtype: bool
+        """
+        with self._lock:
+            now = _monotonic()
+            circuit = self._circuit(self.method_class(api_method), now)
+            if circuit.state == self.CLOSED:
+                return True
+            if circuit.state == self.HALF_OPEN and circuit.probes < self.probes:
+                circuit.probes += 1
+                circuit.probed_at = now
+                return True
+            return False
+
+    def release(self, api_method):
+        """Give back what :meth:`acquire` took for a call to ``api_method`` that ended without an outcome, e.g.
+        because it was cancelled while being sent. While half-open, this frees its probe for another call"""
+        with self._lock:
+            circuit = self._circuit(self.method_class(api_method), _monotonic())
+            if circuit.state == self.HALF_OPEN and circuit.probes > 0:
+                circuit.probes -= 1
+
+    def record(self, api_method, error, duration):
+        """Record the outcome of a call that was let through by :meth:`acquire`
+
+        :param api_method: The API method called
+        :param error: The error of the call, or None if it succeeded
+        :param duration: Seconds the call took
+        """
+        failed = self.is_failure(error)
+        slow = self.slow_call_duration is not None and duration > self.slow_call_duration
+        method_class = self.method_class(api_method)
+
+        with self._lock:
+            now = _monotonic()
+            circuit = self._circuit(method_class, now)
+
+            if circuit.state == self.HALF_OPEN:
+                if failed or slow:
+                    self._open(method_class, circuit, now)
+                else:
+                    circuit.probe_successes += 1
+                    if circuit.probe_successes >= self.probes:
+                        circuit.state = self.CLOSED
+                        logging.getLogger('twx.botapi').info('Circuit for %s calls closed', method_class)
+                return
+
+            if circuit.state == self.OPEN:
+                return  # Sent before the circuit opened
+
+            circuit.calls.append((now, failed, slow))
+            circuit.failures += failed
+            circuit.slow_calls += slow
+            while circuit.calls[0][0] < now - self.window:
+                _, old_failed, old_slow = circuit.calls.popleft()
+                circuit.failures -= old_failed
+                circuit.slow_calls -= old_slow
+
+            count = len(circuit.calls)
+            if count >= self.min_calls and (circuit.failures >= self.failure_threshold * count or
+                                            circuit.slow_calls >= self.slow_call_threshold * count):
+                self._open(method_class, circuit, now)
+
+    def _open(self, method_class, circuit, now):
+        circuit.state = self.OPEN
+        circuit.opened_at = now
+        circuit.calls.clear()
+        circuit.failures = circuit.slow_calls = 0
+        logging.getLogger('twx.botapi').warning('Circuit for %s calls opened for %s seconds', method_class,
+                                                self.reset_timeout)
+
+
+_lazy_parsers = {
+    Update.from_result: LazyUpdate.from_result,
+    Message.from_result: LazyMessage.from_result,
+    Message.from_array_result: _parse_list(LazyMessage.from_result),
+    Update.from_dict: LazyUpdate.from_dict,
+}
+
+
+class _JSONArrayStream(object):
+    """Decodes a JSON object fed in chunks, yielding the elements of its array member ``key`` one by one as soon
+    as each is complete. The other members are collected in :attr:`members`.
+
+    Values are decoded with :meth:`json.JSONDecoder.raw_decode`, so only the element being received is buffered.
+    """
+    _whitespace = re.compile(r'[ \t\n\r]*')
+
+    def __init__(self, key):
+        self.key = key
+        self.members = {}
+        self._decode = json.JSONDecoder().raw_decode
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._state = 'start'
+        self._member = None
+
+    def feed(self, data, final=False):
+        """Add the next chunk of the document
+
+        :param data: The chunk
+        :param final: True for the last chunk
+        :type data: bytes
+        :type final: bool
+        :returns: An iterator over the elements completed by this chunk
+        :raises ValueError: If the document is not a JSON object, or ``final`` is given and it is incomplete
+        """
+        buf = self._buffer + self._utf8.decode(data, final)
+        pos = 0
+        while True:
+            pos = self._whitespace.match(buf, pos).end()
+            if pos == len(buf):
+                break
+
+            state, char = self._state, buf[pos]
+            if state in ('start', 'next_member', 'next_element', 'colon'):
+                expected = {'start': '{', 'next_member': ',}', 'next_element': ',]', 'colon': ':'}[state]
+                if char not in expected:
+                    raise ValueError('Expected {!r} at {}'.format(expected, pos))
+                pos += 1
+                self._state = {'{': 'first_member', ',': state[5:], '}': 'end', ']': 'next_member', ':': 'value'}[char]
+            elif state == 'first_member' and char == '}':
+                pos += 1
+                self._state = 'end'
+            elif state == 'first_element' and char == ']':
+                pos += 1
+                self._state = 'next_member'
+            elif state == 'value' and self._member == self.key and char == '[':
+                pos += 1
+                self._state = 'first_element'
+            elif state == 'end':
+                raise ValueError('Extra data at {}'.format(pos))
+            else:  # A member name, member value or array element
+                try:
+                    value, end = self._decode(buf, pos)
+                except ValueError:
+                    if final:
+                        raise
+                    break  # Wait for the rest of it
+                if end == len(buf) and not final:
+                    break  # A number may continue in the next chunk
+                pos = end
+                if state in ('first_member', 'member'):
+                    self._member = value
+                    self._state = 'colon'
+                elif state == 'value':
+                    self.members[self._member] = value
+                    self._state = 'next_member'
+                else:
+                    self._state = 'next_element'
+                    yield value
+
+        self._buffer = buf[pos:]
+        if final and self._state != 'end':
+            raise ValueError('Incomplete JSON document')
 
 
 class TelegramBotRPCRequest:
@@ -2093,6 +3652,37 @@ class TelegramBotRPCRequest:
     :param on_error: called when an error occurs
     :param files: a list of :class:`InputFile`s to be sent to the server`
     :param request_method: ``RequestMethod.POST`` or ``RequestMethod.GET``
+    :param session: a :class:`requests.Session` used to send the request. When omitted a new session is created for
+                    this request only. See :func:`create_session`
+    :param executor: a :class:`concurrent.futures.Executor` the request is submitted to by :meth:`run`. When omitted
+                     the request runs on its own thread
+    :param transport: the :class:`Transport` used to send the request. When omitted a :class:`RequestsTransport` over
+                      ``session`` is used
+    :param api_url_base: the URL the token and method name are appended to, e.g. to use a local Bot API server.
+                         Defaults to :attr:`TelegramBotRPCRequest.api_url_base`
+    :param rate_limiter: a :class:`RateLimiter` that :meth:`run` reserves a slot with before sending the request
+    :param retry_policy: a :class:`RetryPolicy` deciding whether failed attempts are repeated. ``on_error`` is only
+                         called once the request has finally failed
+    :param priority: the :class:`Priority` the request is queued with. Defaults to ``Priority.INTERACTIVE`` for
+                     ``answerCallbackQuery`` and ``answerInlineQuery`` and to ``Priority.NORMAL`` otherwise
+    :param callback_executor: where ``on_success`` and ``on_error`` are called: a
+                              :class:`concurrent.futures.Executor` or an asyncio event loop. When omitted they are
+                              called on the thread that sent the request, which is blocked until they return
+    :param request_timeout: seconds to wait for the connection and for each read of the response, as one number or
+                            a ``(connect, read)`` tuple. For ``getUpdates`` the long polling ``timeout`` is added
+                            to the read timeout. A request that times out fails with :class:`RequestTimeout`
+    :param deadline: seconds after :meth:`run` by which the request must have finished, including the time spent
+                     queued and retrying. Retries that would end after the deadline are not made, and timeouts are
+                     shortened to the time left
+    :param circuit_breaker: a :class:`CircuitBreaker` that makes the request fail with :class:`CircuitOpen`
+                            instead of being sent while the API is failing
+    :param result_mode: how the result is decoded, see :class:`ResultMode`
+    :param json_codec: the :class:`JSONCodec` decoding the response and encoding ``reply_markup``. When omitted
+                       :mod:`json` is used
+    :param intern_table: an :class:`InternTable` the users and chats of the result are shared through
+    :param projection: a :class:`Projection` limiting the fields of the result that are decoded
+    :param prefilter: an :class:`UpdatePrefilter` (or any callable) rejecting the updates returned by
+                      ``getUpdates`` before they are decoded
 
     :type api_method: str
     :type token: str
@@ -2102,20 +3692,50 @@ class TelegramBotRPCRequest:
     :type on_error: callable
     :type files: `list` of :class:`InputFile`
     :type request_method: RequestMethod
+    :type session: requests.Session
+    :type executor: concurrent.futures.Executor
+    :type transport: Transport
+    :type api_url_base: str
+    :type rate_limiter: RateLimiter
+    :type retry_policy: RetryPolicy
+    :type priority: Priority
+    :type callback_executor: concurrent.futures.Executor or asyncio.AbstractEventLoop
+    :type request_timeout: float or tuple
+    :type deadline: float
+    :type circuit_breaker: CircuitBreaker
+    :type result_mode: ResultMode
+    :type json_codec: JSONCodec
+    :type intern_table: InternTable
+    :type projection: Projection
+    :type prefilter: callable
 
     .. note::
 
         Typically you do not have to interact with this class directly. However, you may override any of these
         arguments by specifiying it in the the `kwargs` of any api method.
+
+    .. note::
+
+        Every request has a :class:`concurrent.futures.Future` as its :attr:`future`, which completes with the
+        result, or fails with a :class:`TelegramError` (or the exception raised while sending), once the request
+        has finished. Use it with :func:`concurrent.futures.as_completed` or :func:`concurrent.futures.wait`, or
+        ``await`` the request from a coroutine. Cancelling the future cancels the request, see :meth:`cancel`.
     """
 
     api_url_base = 'https://api.telegram.org/bot'
 
     def __init__(self, api_method, token, params=None, on_result=None, on_success=None, callback=None,
-                 on_error=None, files=None, request_method=RequestMethod.POST):
+                 on_error=None, files=None, request_method=RequestMethod.POST, session=None, executor=None,
+                 transport=None, api_url_base=None, rate_limiter=None, retry_policy=None, priority=None,
+                 callback_executor=None, request_timeout=None, deadline=None, circuit_breaker=None,
+                 result_mode=ResultMode.TYPED, json_codec=None, intern_table=None, projection=None,
+                 prefilter=None):
+        if json_codec is None:
+            json_codec = _default_json_codec
+
         reply_markup = params.get('reply_markup') if params else None
         if reply_markup is not None:
-            params['reply_markup'] = reply_markup.serialize()
+            params['reply_markup'] = reply_markup.serialize(json_codec)
 
         if callback is not None:
             print('WARNING: callback is deprecated in favor of on_success')
@@ -2132,67 +3752,344 @@ class TelegramBotRPCRequest:
         self.on_error = on_error
         self.files = files
         self.request_method = RequestMethod(request_method)
+        self.session = session
+        self.executor = executor
+        self.transport = transport
+        if api_url_base is not None:
+            self.api_url_base = api_url_base
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        if priority is None:
+            priority = Priority.INTERACTIVE if api_method in _interactive_methods else Priority.NORMAL
+        self.priority = Priority(priority)
+        self.callback_executor = callback_executor
+        self.request_timeout = request_timeout
+        self.deadline = deadline
+        self.circuit_breaker = circuit_breaker
+        self.result_mode = ResultMode(result_mode)
+        self.json_codec = json_codec
+        self.intern_table = intern_table
+        self.projection = projection
+        self.prefilter = prefilter
 
         self.result = None
         self.error = None
 
-        self.thread = Thread(target=self._async_call)
+        self._attempts = 0
+        self._started = None
+        self._deadline = None
+        self._done = Event()
+        self.future = Future()
+        self.future.add_done_callback(self._on_cancel)
+        self._claimed = None
+        self._queued = None
+        self._timer_entry = None
+        self._response = None
+        self.thread = None
 
     def _get_url(self):
-        return '{base_url}{token}/{method}'.format(base_url=TelegramBotRPCRequest.api_url_base,
+        return '{base_url}{token}/{method}'.format(base_url=self.api_url_base,
                                                    token=self.token,
                                                    method=self.api_method)
 
-    def _get_request(self):
-        data, files = None, None
-        if self.params is not None:
-            data = self.params
-        if self.files is not None:
-            files = self.files
+    def _get_transport(self):
+        if self.transport is not None:
+            return self.transport
+        return RequestsTransport(self.session)
+
+    def _get_timeout(self):
+        """The ``(connect, read)`` timeout of the next attempt, shortened to the time left until the deadline"""
+        timeout = self.request_timeout
+        if timeout is not None and not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        if timeout is not None and self.params and self.api_method == 'getUpdates':
+            timeout = (timeout[0], timeout[1] + (self.params.get('timeout') or 0))
+
+        if self._deadline is not None:
+            remaining = max(self._deadline - _monotonic(), 0.001)
+            if timeout is None:
+                timeout = (remaining, remaining)
+            else:
+                timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+        return timeout
+
+    def _circuit_error(self):
+        return CircuitOpen(self.circuit_breaker.method_class(self.api_method),
+                           self.circuit_breaker.retry_after(self.api_method))
+
+    def _acquire_circuit(self):
+        """Ask the circuit breaker to let the next attempt through, failing the request if it does not
 
-        return Request(self.request_method, self._get_url(), data=data, files=files).prepare()
+        :returns: True if the attempt may be sent
+        """
+        if self.circuit_breaker is None or self.circuit_breaker.acquire(self.api_method):
+            return True
+        self.error = self._circuit_error()
+        return False
+
+    def _record_circuit(self, sent):
+        """Report the outcome of the attempt sent at ``sent`` to the circuit breaker"""
+        if self.circuit_breaker is None:
+            return
+        duration = _monotonic() - sent
+        if self.params and self.api_method == 'getUpdates':
+            duration -= self.params.get('timeout') or 0
+        self.circuit_breaker.record(self.api_method, self.error, duration)
+
+    def _release_circuit(self):
+        """Tell the circuit breaker the attempt let through ended without an outcome"""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.release(self.api_method)
+
+    def _start(self):
+        self._started = _monotonic()
+        if self.deadline is not None:
+            self._deadline = self._started + self.deadline
+
+    def _check_deadline(self):
+        """Fail the request with :class:`RequestTimeout` if its deadline has passed
+
+        :returns: True if the deadline has passed
+        """
+        if self._deadline is not None and _monotonic() >= self._deadline:
+            self.error = RequestTimeout('Deadline of {0} seconds exceeded'.format(self.deadline))
+            return True
+        return False
 
     def _async_call(self):
+        if self.future.cancelled():
+            return None  # Dropped from the queue
+
         self.error = None
         self.response = None
 
-        s = Session()
-        if 'http_proxy' in os.environ and 'https_proxy' in os.environ:
-            s.proxies = {'http': os.environ['http_proxy'], 'https': os.environ['https_proxy']}  # Respect env proxy settings in new sessions.
-        request = self._get_request()
-        resp = s.send(request)
+        if not self._check_deadline() and self._acquire_circuit():
+            sent = _monotonic()
+            try:
+                transport = self._get_transport()
+                request = transport.prepare(self.request_method, self._get_url(), data=self.params, files=self.files)
+                self._send(transport, request)
+            except Exception as e:
+                self.error = e
+            except BaseException:
+                self._release_circuit()
+                raise
+            self._record_circuit(sent)
+
+            if self.future.cancelled():
+                return None  # Nobody is interested in the response anymore
+
+        delay = self._retry_delay()
+        if delay is not None:
+            self._timer_entry = _timer.call_later(delay, self._schedule, self.cancel)
+            return None
+
+        self._finish()
+        return None
+
+    def _send(self, transport, request):
+        """Send the prepared request and handle the response"""
+        try:
+            resp = transport.send(request, self._get_timeout())
+        except Exception as e:
+            self.error = e
+        else:
+            self._handle_response(resp.status_code, resp.content)
+
+    def _handle_response(self, status_code, content):
+        """Decode the body of an API response into the result (or error)"""
+        if status_code == 200 and self.result_mode == ResultMode.BYTES:
+            self.error = None
+            self.result = content  # Telegram answers every failed call with an error status
+            return
 
-        if resp.status_code == 200:
+        if status_code == 200 and self.prefilter is not None and self.api_method == 'getUpdates':
             try:
-                api_response = resp.json()
+                updates = _prefilter_updates(content, self.prefilter, self.json_codec)
             except ValueError:
+                updates = None  # Decoded as a whole below
+            if updates is not None:
+                self.error = None
+                self.result = self._parse_result(updates)
+                return
+            logging.getLogger('twx.botapi').debug('getUpdates response is not laid out compactly, the prefilter '
+                                                  'is skipped and all updates are decoded')
+
+        try:
+            api_response = self.json_codec.loads(content)
+        except ValueError:
+            api_response = None
+
+        self._handle_api_response(status_code, api_response)
+
+    def _handle_api_response(self, status_code, api_response):
+        if not isinstance(api_response, dict) or 'ok' not in api_response:
+            if status_code == 200:
                 api_response = {'ok': False, 'description': 'Invalid Value in JSON response', 'error_code': None}
-        else:
-            api_response = {'ok': False, 'description': 'API doesn\'t answer', 'error_code': resp.status_code}
-
-        if api_response.get('ok'):
-            result = api_response['result']
-            if self.on_result is None:
-                self.result = result
             else:
-                self.result = self.on_result(result)
+                api_response = {'ok': False, 'description': 'API doesn\'t answer', 'error_code': status_code}
 
-            if self.on_success is not None:
-                self.on_success(self.result)
+        if api_response.get('ok'):
+            self.error = None
+            self.result = self._parse_result(api_response['result'])
         else:
             self.error = Error.from_result(api_response)
-            if self.on_error:
+
+    def _parse_result(self, result):
+        if self.on_result is None or self.result_mode == ResultMode.RAW:
+            return result
+        if self.result_mode == ResultMode.LAZY:
+            return _lazy_parsers.get(self.on_result, self.on_result)(result)
+        if self.result_mode == ResultMode.COMPACT:
+            return _compact_parsers.get(self.on_result, self.on_result)(result)
+        if self.projection is not None:
+            return self.projection._get_parser(self.on_result, self.intern_table)(result)
+        if self.intern_table is not None:
+            return self.intern_table._get_parser(self.on_result)(result)
+        return self.on_result(result)
+
+    def _retry_delay(self):
+        """Count the attempt that just finished and return how long to wait before the next one, or None if done"""
+        self._attempts += 1
+        if self.error is None or self.retry_policy is None or self.future.cancelled():
+            return None
+
+        delay = self.retry_policy.get_delay(self._attempts, self.error, _monotonic() - self._started,
+                                            self.api_method)
+        if delay is not None and self._deadline is not None and _monotonic() + delay >= self._deadline:
+            return None
+        if delay is not None and isinstance(self.error, Error) and self.error.migrate_to_chat_id is not None:
+            self.params['chat_id'] = self.error.migrate_to_chat_id
+        return delay
+
+    def _finish(self):
+        """Hand the finished request to the callbacks, on the callback executor if there is one"""
+        if not self._claim():
+            return  # Cancelled, so the callbacks are not called
+
+        if self.callback_executor is None:
+            self._dispatch()
+        else:
+            _call_soon(self.callback_executor, self._dispatch)
+
+    def _dispatch(self):
+        """Dispatch the result (or error) to the callbacks and wake up anyone waiting for the request"""
+        try:
+            if self.error is None:
+                if self.on_success is not None:
+                    self.on_success(self.result)
+            elif self.on_error:
                 self.on_error(self.error)
+        finally:
+            self._resolve()
+
+    def _resolve(self):
+        """Wake up anyone waiting for the request and complete its future"""
+        self._done.set()
+        if self.future.done():
+            return
+
+        if self.error is None:
+            self.future.set_result(self.result)
+        elif isinstance(self.error, Error):
+            self.future.set_exception(TelegramError(self.error))
+        else:
+            self.future.set_exception(self.error)
+
+    def _claim(self):
+        """Move the future out of pending, once. Returns False if the request was cancelled"""
+        with _claim_lock:
+            if self._claimed is None:
+                self._claimed = self.future.set_running_or_notify_cancel()
+            return self._claimed
+
+    def _on_cancel(self, future):
+        if future.cancelled():
+            self.error = RequestCancelled('The request was cancelled')
+            self._claim()  # Wakes up as_completed() and wait() on the future
+            self._done.set()
+            if self._timer_entry is not None:
+                _timer.cancel(self._timer_entry)  # Do not keep it, or its parameters, until it is due
+            with _claim_lock:  # Not once it is closed, when its connection may already be sending another request
+                if self._response is not None:
+                    _abort_response(self._response)  # Break off the transfer instead of reading the rest for nothing
+
+    def cancel(self):
+        """Cancel the request.
+
+        A request that is still queued, waiting for the rate limiter or waiting to be retried is dropped. A request
+        that is being sent is abandoned: it finishes right away, and the response is discarded when it arrives.
+        Downloads and streamed updates whose body is being received are broken off by shutting down their
+        connection (if the transport supports it, see :class:`Transport`). Neither ``on_success`` nor
+        ``on_error`` are called, and :meth:`wait` returns a :class:`RequestCancelled` error.
+
+        :returns: False if the request had already finished, True otherwise
+        :rtype: bool
+        """
+        return self.future.cancel()
 
-        return None
+    def _execute(self):
+        try:
+            self._async_call()
+        except BaseException as e:
+            if not self._done.is_set():
+                self.error = e
+                self._resolve()
+            raise
+
+    def _reserve(self):
+        """Reserve a slot with the rate limiter and return how many seconds to wait for it"""
+        if self.rate_limiter is None:
+            return 0
+        return self.rate_limiter.reserve(self.api_method, self.params, self.priority)
+
+    def _submit(self):
+        if self.future.cancelled():
+            return
+
+        if self.executor is None:
+            self.thread = Thread(target=self._execute)
+            self.thread.start()
+        elif hasattr(self.executor, 'submit_with_priority'):
+            self._queued = self.executor.submit_with_priority(self.priority, self._execute)
+        else:
+            self._queued = self.executor.submit(self._execute)
 
     def run(self):
-        self.thread.start()
+        self._start()
+        if self.circuit_breaker is not None and self.circuit_breaker.state(self.api_method) == CircuitBreaker.OPEN:
+            self.error = self._circuit_error()  # Fail fast, without queueing
+            self._finish()
+            return self
 
+        self._schedule()
         return self
 
+    def _schedule(self):
+        """Submit the attempt once the rate limiter has a slot for it, charged to the current ``chat_id``"""
+        if self.future.cancelled():
+            return
+
+        delay = self._reserve()
+        if delay > 0:
+            self._timer_entry = _timer.call_later(delay, self._submit, self.cancel)
+        else:
+            self._submit()
+
+    def _wait_done(self, timeout):
+        """Wait for the request to finish. On a worker of the :class:`BoundedExecutor` the request is queued on, it
+        would wait for itself once all workers do the same: the request is run right here if it is still queued,
+        and otherwise another worker is started while this one waits"""
+        executor = getattr(self.executor, 'executor', self.executor)  # The executor of a lane
+        if not isinstance(executor, BoundedExecutor) or not executor._is_worker():
+            return self._done.wait(timeout)
+
+        if self._queued is not None and self._queued.cancel():  # Taken out of the queue
+            self._execute()
+        return executor._wait(self._done, timeout)
+
     def join(self, timeout=None):
-        self.thread.join(timeout)
+        self._wait_done(timeout)
         return self
 
     def wait(self, timeout=None):
@@ -2202,11 +4099,24 @@ class TelegramBotRPCRequest:
         :returns: result or error
         :type: result tyoe or Error
         """
-        self.thread.join(timeout)
+        self._wait_done(timeout)
+        if self.future.cancelled() and not isinstance(self.error, RequestCancelled):
+            self.error = RequestCancelled('The request was cancelled')  # A worker finishing late overwrote it
         if self.error is not None:
             return self.error
         return self.result
 
+    def asyncio_future(self, loop=None):
+        """Wrap :attr:`future` so it can be awaited from a coroutine running on ``loop``
+
+        :rtype: asyncio.Future
+        """
+        import asyncio
+        return asyncio.wrap_future(self.future, loop=loop)
+
+    def __await__(self):
+        return self.asyncio_future().__await__()
+
 
 class TelegramDownloadRequest(TelegramBotRPCRequest):
     """Class that handles downloading files from telegram.
@@ -2217,12 +4127,36 @@ class TelegramDownloadRequest(TelegramBotRPCRequest):
     :param on_success: a callback function that gets called when the api call was successful, gets passed
                        the return value from on_result
     :param on_error: called when an error occurs
+    :param session: a :class:`requests.Session` used to download the file. When omitted a new session is created for
+                    this request only. See :func:`create_session`
+    :param executor: a :class:`concurrent.futures.Executor` the download is submitted to by :meth:`run`. When omitted
+                     the download runs on its own thread
+    :param transport: the :class:`Transport` used to download the file. When omitted a :class:`RequestsTransport`
+                      over ``session`` is used
+    :param download_url_base: the URL the token and file path are appended to, e.g. to use a local Bot API server.
+                              Defaults to :attr:`TelegramDownloadRequest.download_url_base`
+    :param local_files: If True, absolute file paths (returned by a Bot API server running in ``--local`` mode)
+                        are copied from the local file system instead of being downloaded
+    :param priority: the :class:`Priority` the download is queued with
+    :param callback_executor: where ``on_success`` and ``on_error`` are called. See :class:`TelegramBotRPCRequest`
+    :param request_timeout: connect and read timeout. See :class:`TelegramBotRPCRequest`
+    :param deadline: seconds after :meth:`run` by which the download must have started. See
+                     :class:`TelegramBotRPCRequest`
 
     :type file_path: str
     :type out_file: str
     :type token: str
     :type on_success: callable
     :type on_error: callable
+    :type session: requests.Session
+    :type executor: concurrent.futures.Executor
+    :type transport: Transport
+    :type download_url_base: str
+    :type local_files: bool
+    :type priority: Priority
+    :type callback_executor: concurrent.futures.Executor or asyncio.AbstractEventLoop
+    :type request_timeout: float or tuple
+    :type deadline: float
 
     .. note::
 
@@ -2231,13 +4165,30 @@ class TelegramDownloadRequest(TelegramBotRPCRequest):
     download_url_base = 'https://api.telegram.org/file/bot'
 
     def __init__(self, file_path, out_file, token, on_success=None,
-                 on_error=None, request_method=None):  # request_method eats the kwarg from TelegramBot.request_args
+                 on_error=None, request_method=None, session=None, executor=None, transport=None,
+                 api_url_base=None, download_url_base=None, local_files=False,
+                 rate_limiter=None, retry_policy=None,  # request_method, api_url_base, rate_limiter and retry_policy eat the kwargs from TelegramBot.request_args
+                 priority=Priority.NORMAL, callback_executor=None, request_timeout=None, deadline=None,
+                 circuit_breaker=None, result_mode=None, json_codec=None, intern_table=None, projection=None,
+                 prefilter=None):
         self.file_path = file_path
         self.out_file = out_file
         self.token = token
         self.on_success = on_success
         self.on_error = on_error
         self.request_method = RequestMethod.GET  # Others are not allowed
+        self.session = session
+        self.executor = executor
+        self.transport = transport
+        if download_url_base is not None:
+            self.download_url_base = download_url_base
+        self.local_files = local_files
+        self.rate_limiter = None  # Downloads are not rate limited
+        self.circuit_breaker = None  # nor guarded by the circuit breaker
+        self.priority = Priority(priority)
+        self.callback_executor = callback_executor
+        self.request_timeout = request_timeout
+        self.deadline = deadline
 
         self.params = None
         self.files = None
@@ -2245,7 +4196,16 @@ class TelegramDownloadRequest(TelegramBotRPCRequest):
         self.result = None
         self.error = None
 
-        self.thread = Thread(target=self._async_call)
+        self._started = None
+        self._deadline = None
+        self._done = Event()
+        self.future = Future()
+        self.future.add_done_callback(self._on_cancel)
+        self._claimed = None
+        self._queued = None
+        self._timer_entry = None
+        self._response = None
+        self.thread = None
 
     def _get_url(self):
         return '{base_url}{token}/{path}'.format(base_url=self.download_url_base,
@@ -2254,34 +4214,204 @@ class TelegramDownloadRequest(TelegramBotRPCRequest):
 
     def _do_download(self, resp, f):
         for chunk in resp.iter_content(chunk_size=1024):
+            if self.future.cancelled():
+                break  # Closing the response aborts the transfer
             if chunk:  # filter out keep-alive chunks
                 f.write(chunk)
 
+    def _open_local(self):
+        f = open(self.file_path, 'rb')
+        return TransportResponse(200, chunks=iter(lambda: f.read(64 * 1024), b''), close=f.close)
+
     def _async_call(self):
-        s = Session()
-        request = self._get_request()
-        resp = s.send(request)
+        if self.future.cancelled():
+            return
+
+        if self._check_deadline():
+            self._finish()
+            return
 
-        if not resp.status_code == 200:
-            self.error = RuntimeError("Bad HTTP Status Code", resp, resp.status_code)
+        if self.local_files and os.path.isabs(self.file_path):
+            try:
+                resp = self._open_local()
+            except (IOError, OSError) as e:
+                self.error = e
+                self._finish()
+                return
         else:
             try:
-                if isinstance(self.out_file, str):
-                    with open(self.out_file, 'w+b') as f:
-                        self._do_download(resp, f)
+                transport = self._get_transport()
+                request = transport.prepare(self.request_method, self._get_url())
+                resp = transport.stream(request, self._get_timeout())
+            except Exception as e:  # Including RequestTimeout
+                self.error = e
+                self._finish()
+                return
+
+        with _claim_lock:
+            self._response = resp
+        try:
+            if self.future.cancelled():
+                pass  # Cancelled while waiting for the headers
+            elif not resp.status_code == 200:
+                self.error = RuntimeError("Bad HTTP Status Code", resp, resp.status_code)
+            else:
+                try:
+                    if isinstance(self.out_file, str):
+                        with open(self.out_file, 'w+b') as f:
+                            self._do_download(resp, f)
+
+                    elif hasattr(self.out_file, 'write'):
+                        self._do_download(resp, self.out_file)
+                except Exception as e:  # Writing failed, or the connection while reading
+                    if not self.future.cancelled():  # Otherwise it was aborted
+                        self.error = e
+        finally:
+            with _claim_lock:
+                self._response = None
+            resp.close()  # Hand the connection back to the pool
+
+        self._finish()
+
+    def _dispatch(self):
+        try:
+            if self.error:
+                if self.on_error:
+                    self.on_error(self.error)
+            else:
+                self.result = self.out_file
+                if self.on_success:
+                    self.on_success(self.out_file)
+        finally:
+            self._resolve()
+
+
+class TelegramUpdateStreamRequest(TelegramBotRPCRequest):
+    """A ``getUpdates`` request that decodes the response while it is being received and hands every update to
+    ``on_update`` as soon as it is complete, instead of building the whole list first. The first update of a batch
+    is handled before the rest has been read, and only one update is held in memory at a time.
+
+    ``on_update`` is called on the thread reading the response, in the order of the updates; exceptions it raises
+    are logged. After each update the ``offset`` of the request is moved past it, so a retry after a broken
+    response does not deliver any update twice. When the request succeeds, its result (passed to ``on_success``)
+    is the last update received, or None if there was none.
 
-                elif hasattr(self.out_file, 'write'):
-                    self._do_download(resp, self.out_file)
-            except OSError as e:
+    Streamed responses are always decoded with :mod:`json`, as the other :class:`JSONCodec` libraries cannot decode
+    an incomplete document.
+
+    :param on_update: called with every :class:`Update` (or :class:`LazyUpdate`, or the decoded dict, see
+                      ``result_mode``)
+    :param chunk_size: the number of bytes read from the connection at a time
+    :param kwargs: see :class:`TelegramBotRPCRequest`. ``on_result`` builds a single update
+
+    :type on_update: callable
+    :type chunk_size: int
+
+    .. note::
+
+        Typically you do not have to interact with this class directly, :func:`get_updates` creates one when
+        given ``on_update``.
+    """
+
+    def __init__(self, api_method, token, on_update=None, chunk_size=16 * 1024, **kwargs):
+        TelegramBotRPCRequest.__init__(self, api_method, token, **kwargs)
+        if self.result_mode == ResultMode.BYTES:
+            raise ValueError('Updates cannot be streamed with ResultMode.BYTES')
+        if self.prefilter is not None:
+            raise ValueError('Updates cannot be streamed with a prefilter')
+        if self.params is None:
+            self.params = {}
+        self.on_update = on_update
+        self.chunk_size = chunk_size
+
+    def _send(self, transport, request):
+        try:
+            resp = transport.stream(request, self._get_timeout())
+        except Exception as e:
+            self.error = e
+            return
+
+        with _claim_lock:
+            self._response = resp
+        try:
+            if not self.future.cancelled():  # Otherwise it was cancelled while waiting for the headers
+                self._handle_chunks(resp.status_code, resp.iter_content(self.chunk_size))
+        except Exception as e:  # The connection failed while reading
+            if not self.future.cancelled():  # Otherwise it was aborted
                 self.error = e
+        finally:
+            with _claim_lock:
+                self._response = None
+            resp.close()  # Hand the connection back to the pool
 
-        if self.error:
-            if self.on_error:
-                self.on_error(self.error)
+    def _handle_response(self, status_code, content):
+        self._handle_chunks(status_code, [content])
+
+    def _handle_chunks(self, status_code, chunks):
+        stream = _JSONArrayStream('result')
+        self.result = None
+        try:
+            for chunk in chunks:
+                if self.future.cancelled():
+                    return
+                for update in stream.feed(chunk):
+                    self._handle_update(update)
+            for update in stream.feed(b'', final=True):
+                self._handle_update(update)
+            api_response = stream.members
+        except ValueError:
+            api_response = None
+
+        if isinstance(api_response, dict) and api_response.get('ok'):
+            self.error = None
         else:
-            self.result = self.out_file
-            if self.on_success:
-                self.on_success(self.out_file)
+            self._handle_api_response(status_code, api_response)
+
+    def _handle_update(self, result):
+        update = self._parse_result(result)
+        if isinstance(result, dict) and isinstance(result.get('update_id'), int):
+            self.params['offset'] = result['update_id'] + 1
+        self.result = update
+        if self.on_update is not None:
+            try:
+                self.on_update(update)
+            except Exception:
+                logging.getLogger('twx.botapi').exception('on_update failed')
+
+
+def _new_session():
+    s = Session()
+    if 'http_proxy' in os.environ and 'https_proxy' in os.environ:
+        s.proxies = {'http': os.environ['http_proxy'], 'https': os.environ['https_proxy']}  # Respect env proxy settings in new sessions.
+    return s
+
+
+def create_session(pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+    """
+    Create a :class:`requests.Session` backed by a connection pool, suitable for sharing between many requests
+    (and between several :class:`TelegramBot` instances).
+
+    :param pool_connections: The number of hosts to keep connection pools for
+    :param pool_maxsize: The maximum number of connections kept open per host
+    :param pool_block: If True, requests wait for a free connection instead of opening a connection beyond
+                       ``pool_maxsize`` that is discarded afterwards
+    :param keep_alive: If False, every request asks the server to close the connection once it is done
+
+    :type pool_connections: int
+    :type pool_maxsize: int
+    :type pool_block: bool
+    :type keep_alive: bool
+
+    :returns: A session that reuses its connections across requests
+    :rtype: requests.Session
+    """
+    s = _new_session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
+    if not keep_alive:
+        s.headers['Connection'] = 'close'
+    return s
 
 
 def _clean_params(**params):
@@ -2981,7 +5111,7 @@ def send_media_group(chat_id, media,
     # required args
     params = dict(
         chat_id=chat_id,
-        media=json.dumps(media)
+        media=(kwargs.get('json_codec') or _default_json_codec).dumps(media)
     )
 
     # optional args
@@ -2992,7 +5122,7 @@ def send_media_group(chat_id, media,
         )
     )
 
-    return TelegramBotRPCRequest('sendMediaGroup', params=params, files=files, on_result=lambda result: [Message.from_result(message) for message in result], **kwargs)
+    return TelegramBotRPCRequest('sendMediaGroup', params=params, files=files, on_result=Message.from_array_result, **kwargs)
 
 
 def send_location(chat_id, latitude, longitude,
@@ -3484,7 +5614,7 @@ def get_chat(chat_id, **kwargs):
         chat_id=chat_id,
     )
 
-    return TelegramBotRPCRequest('getChat', params=params, on_result=lambda result: Chat.from_result(result), **kwargs)
+    return TelegramBotRPCRequest('getChat', params=params, on_result=Chat.from_result, **kwargs)
 
 
 def leave_chat(chat_id, **kwargs):
@@ -3529,7 +5659,7 @@ def get_chat_administrators(chat_id, **kwargs):
         chat_id=chat_id,
     )
 
-    return TelegramBotRPCRequest('getChatAdministrators', params=params, on_result=lambda result: ChatMember.from_result_list(result), **kwargs)
+    return TelegramBotRPCRequest('getChatAdministrators', params=params, on_result=ChatMember.from_array_result, **kwargs)
 
 
 def get_chat_member(chat_id, user_id, **kwargs):
@@ -3553,7 +5683,7 @@ def get_chat_member(chat_id, user_id, **kwargs):
         user_id=user_id,
     )
 
-    return TelegramBotRPCRequest('getChatMember', params=params, on_result=lambda result: ChatMember.from_result(result), **kwargs)
+    return TelegramBotRPCRequest('getChatMember', params=params, on_result=ChatMember.from_result, **kwargs)
 
 
 def get_chat_members_count(chat_id, **kwargs):
@@ -3888,7 +6018,7 @@ def answer_inline_query(inline_query_id, results, cache_time=None, is_personal=N
     # required args
     params = dict(
         inline_query_id=inline_query_id,
-        results=json.dumps(json_results)
+        results=(kwargs.get('json_codec') or _default_json_codec).dumps(json_results)
     )
 
     # optional args
@@ -4094,7 +6224,7 @@ def get_game_high_scores(user_id,
                                  on_result=GameHighScore.from_array_result, **kwargs)
 
 
-def get_updates(offset=None, limit=None, timeout=None, allowed_updates=None,
+def get_updates(offset=None, limit=None, timeout=None, allowed_updates=None, on_update=None,
                 **kwargs):
     """
     Use this method to receive incoming updates using long polling.
@@ -4122,13 +6252,16 @@ def get_updates(offset=None, limit=None, timeout=None, allowed_updates=None,
                   1—100 are accepted. Defaults to 100
     :param timeout: Timeout in seconds for long polling. Defaults to 0, i.e.
                     usual short polling
+    :param on_update: If given, the response is decoded while it is received and every update is passed to
+                      ``on_update`` as soon as it is complete, see :class:`TelegramUpdateStreamRequest`
     :param kwargs: Args that get passed down to :class:`TelegramBotRPCRequest`
 
     :type offset: int
     :type limit: int
     :type timeout: int
+    :type on_update: callable
 
-    :returns: An Array of Update objects is returned.
+    :returns: An Array of Update objects is returned. With ``on_update``, the last Update is returned instead.
     :rtype: TelegramBotRPCRequest
     """
     # optional parameters
@@ -4139,6 +6272,9 @@ def get_updates(offset=None, limit=None, timeout=None, allowed_updates=None,
         allowed_updates=allowed_updates,
     )
 
+    if on_update is not None:
+        return TelegramUpdateStreamRequest('getUpdates', params=params, on_result=Update.from_dict,
+                                           on_update=on_update, **kwargs)
     return TelegramBotRPCRequest('getUpdates', params=params, on_result=Update.from_result, **kwargs)
 
 
@@ -4217,6 +6353,123 @@ def download_file(file_path, out_file, **kwargs):
     return TelegramDownloadRequest(file_path, out_file, **kwargs)
 
 
+# The API functions that can be called on a Batch
+_batch_methods = dict((fn.__name__, fn) for fn in (
+    export_chat_invite_link, set_chat_photo, delete_chat_photo, set_chat_title, set_chat_description, pin_chat_message,
+    unpin_chat_message, get_me, send_message, forward_message, send_photo, send_audio, send_document, send_sticker,
+    send_video, send_video_note, send_voice, send_media_group, send_location, edit_message_live_location,
+    stop_message_live_location, send_venue, send_contact, send_chat_action, kick_chat_member, restrict_chat_member,
+    promote_chat_member, unban_chat_member, get_chat, leave_chat, get_chat_administrators, get_chat_member,
+    get_chat_members_count, set_chat_sticker_set, delete_chat_sticker_set, answer_callback_query, delete_message,
+    edit_message_text, edit_message_caption, edit_message_reply_markup, answer_inline_query, get_user_profile_photos,
+    get_file, send_game, set_game_score, get_game_high_scores, get_updates, set_webhook, get_webhook_info,
+    download_file,
+))
+
+
+class Batch(object):
+    """Runs many API calls of one bot concurrently and collects their results in order.
+
+    Every API method (e.g. ``send_message``, ``get_chat`` or ``download_file``) is available on the batch. Instead
+    of returning a running request, calling it adds the request, made with the settings of the bot, to the batch. Requests start as soon as they are added and are queued on the bot's
+    executor and rate limiter like any other call, so a batch of thousands of calls does not need a thread
+    per call. Leaving the ``with`` block waits for all of them, or cancels them if the block raised.
+
+    Usage::
+
+        with bot.batch() as batch:
+            for chat_id in chat_ids:
+                batch.get_chat_member(chat_id, user_id)
+
+        for chat_id, member in zip(chat_ids, batch.results):
+            if isinstance(member, Error):
+                ...
+
+    :param bot: The bot the calls are made with
+    :type bot: TelegramBot
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.requests = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.wait()
+        else:
+            self.cancel()
+
+    def __len__(self):
+        return len(self.requests)
+
+    def __getattr__(self, name):
+        fn = _batch_methods.get(name)
+        if fn is None:
+            raise AttributeError(name)
+
+        def add_call(*args, **kwargs):
+            if name == 'download_file':
+                kwargs = self.bot._merge_download_overrides(**kwargs)
+            return self.add(fn(*args, **self.bot._merge_overrides(**kwargs)))
+        add_call.__name__ = name
+        return add_call
+
+    def add(self, request):
+        """Add a request to the batch and run it
+
+        :param request: A request built with one of the unbound API methods
+        :type request: TelegramBotRPCRequest
+
+        :returns: The running request
+        :rtype: TelegramBotRPCRequest
+        """
+        self.requests.append(request)
+        return request.run()
+
+    def wait(self, timeout=None):
+        """Wait for every request of the batch to finish
+
+        :param timeout: Seconds to wait for the whole batch
+        :type timeout: float
+
+        :returns: The result of every request, or its error, in the order the requests were added
+        :rtype: list
+        """
+        deadline = None if timeout is None else _monotonic() + timeout
+        for request in self.requests:
+            request.join(None if deadline is None else max(0, deadline - _monotonic()))
+        return self.results
+
+    def cancel(self):
+        """Cancel every request of the batch that has not finished yet, see :meth:`TelegramBotRPCRequest.cancel`
+
+        :returns: The number of requests cancelled
+        :rtype: int
+        """
+        return sum(1 for request in self.requests if request.cancel())
+
+    def as_completed(self, timeout=None):
+        """Iterate over the requests of the batch as they finish
+
+        :param timeout: Seconds to wait for the whole batch
+        :type timeout: float
+
+        :rtype: iterator of TelegramBotRPCRequest
+        """
+        requests = dict((request.future, request) for request in self.requests)
+        for future in as_completed(requests, timeout):
+            yield requests[future]
+
+    @property
+    def results(self):
+        """The result or error of every request, in the order the requests were added. ``None`` for requests
+        that have not finished yet."""
+        return [request.wait(0) if request._done.is_set() else None for request in self.requests]
+
+
 class TelegramBot(object):
     """A `TelegramBot` object represents a specific regisitered bot user as identified by its token. The bot
     object also helps try to maintain state and simplify interaction for library users.
@@ -4225,30 +6478,134 @@ class TelegramBot(object):
         token (str) :The api token generated by BotFather
         request_method (`RequestMethod` or `str`) :*Optional.* The http method to use
                                                     (e.g. 'POST' or RequestMethod.POST')
+        session (`requests.Session`) :*Optional.* The session every request of this bot is sent through. Pass the
+                                      same session to several bots to share one connection pool. When omitted, a
+                                      pooled session is created with :func:`create_session`
+        pool_connections (int) :*Optional.* See :func:`create_session`. Ignored if ``session`` is given
+        pool_maxsize (int) :*Optional.* See :func:`create_session`. Ignored if ``session`` is given
+        pool_block (bool) :*Optional.* See :func:`create_session`. Ignored if ``session`` is given
+        keep_alive (bool) :*Optional.* See :func:`create_session`. Ignored if ``session`` is given
+        transport (`Transport`) :*Optional.* The HTTP layer every request of this bot is sent through. When omitted,
+                                 a :class:`RequestsTransport` over ``session`` is used
+        api_url_base (str) :*Optional.* The API URL of this bot (e.g. ``'http://localhost:8081/bot'`` for a local
+                            Bot API server). Defaults to :attr:`TelegramBotRPCRequest.api_url_base`
+        download_url_base (str) :*Optional.* The file download URL of this bot. Defaults to
+                                 :attr:`TelegramDownloadRequest.download_url_base`
+        local_files (bool) :*Optional.* Set if the Bot API server runs in ``--local`` mode on this machine, so files
+                            whose :func:`get_file` path is absolute are read from disk by :meth:`download_file`
+        rate_limiter (`RateLimiter`) :*Optional.* Delays outgoing messages to stay within Telegram's flood limits
+        retry_policy (`RetryPolicy`) :*Optional.* Repeats requests that failed for transient reasons
+        callback_executor (`concurrent.futures.Executor`) :*Optional.* Runs ``on_success`` and ``on_error``
+                                                           callbacks, so slow callbacks do not hold up the
+                                                           workers sending requests. Can also be an asyncio event
+                                                           loop. When omitted, callbacks run on the workers
+        request_timeout (float or tuple) :*Optional.* Connect and read timeout of every request, see
+                                          :class:`TelegramBotRPCRequest`. When omitted, requests wait forever
+        deadline (float) :*Optional.* Seconds every request has to finish in, including queueing and retries
+        circuit_breaker (`CircuitBreaker`) :*Optional.* Fails requests fast while the API is failing
+        result_mode (`ResultMode`) :*Optional.* How the results of API calls are decoded
+        json_codec (`JSONCodec`) :*Optional.* The JSON library used for responses and JSON serialized parameters,
+                                  see :func:`create_json_codec`. When omitted, :mod:`json` is used
+        intern_table (`InternTable`) :*Optional.* Shares the users and chats of results between messages
+        projection (`Projection`) :*Optional.* Limits the fields of results that are decoded
+        prefilter (`UpdatePrefilter`) :*Optional.* Rejects updates before they are decoded
+        executor (`concurrent.futures.Executor`) :*Optional.* The executor every request of this bot runs on. When
+                                                  omitted, a :class:`BoundedExecutor` is created
+        max_workers (int) :*Optional.* See :class:`BoundedExecutor`. Ignored if ``executor`` is given
+        queue_size (int) :*Optional.* See :class:`BoundedExecutor`. Ignored if ``executor`` is given
 
     .. note::
 
         Unlike the unbound API methods, when the bot executes an API call, ``run()`` is immediately called
         on the request object.
 
+    .. note::
+
+        Any API call can be given a ``priority`` (see :class:`Priority`). With the default executor, queued
+        interactive calls are sent before normal ones, and normal ones before bulk traffic.
+
+    .. note::
+
+        A bot that is no longer needed can be closed with :meth:`close`, or used as a context manager, to stop the
+        worker threads and connections it created. Idle workers also exit on their own after a minute.
+
     """
 
-    def __init__(self, token, request_method=RequestMethod.POST):
+    def __init__(self, token, request_method=RequestMethod.POST, session=None,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True,
+                 executor=None, max_workers=16, queue_size=1000, transport=None,
+                 api_url_base=None, download_url_base=None, local_files=False, rate_limiter=None,
+                 retry_policy=None, callback_executor=None, request_timeout=None, deadline=None,
+                 circuit_breaker=None, result_mode=ResultMode.TYPED, json_codec=None, intern_table=None,
+                 projection=None, prefilter=None):
         self._bot_user = None
+        self.download_url_base = download_url_base
+        self.local_files = local_files
+
+        self._own_session = None
+        self._own_executor = None
+
+        if transport is None:
+            if session is None:
+                session = self._own_session = create_session(pool_connections=pool_connections,
+                                                             pool_maxsize=pool_maxsize, pool_block=pool_block,
+                                                             keep_alive=keep_alive)
+            transport = RequestsTransport(session)
+
+        if executor is None:
+            executor = self._own_executor = BoundedExecutor(max_workers=max_workers, queue_size=queue_size)
 
         self.request_args = dict(
             token=token,
-            request_method=request_method
+            request_method=request_method,
+            transport=transport,
+            executor=executor,
+            api_url_base=api_url_base,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            callback_executor=callback_executor,
+            request_timeout=request_timeout,
+            deadline=deadline,
+            circuit_breaker=circuit_breaker,
+            result_mode=result_mode,
+            json_codec=json_codec,
+            intern_table=intern_table,
+            projection=projection,
+            prefilter=prefilter,
         )
 
     def __str__(self):
         return self.token
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self, wait=True):
+        """Shut down the executor and close the session, if they were created by this bot
+
+        :param wait: If True, wait for the queued requests to finish first
+        :type wait: bool
+        """
+        if self._own_executor is not None:
+            self._own_executor.shutdown(wait=wait)
+            self._own_executor = None
+        if self._own_session is not None:
+            self._own_session.close()
+            self._own_session = None
+
     def _merge_overrides(self, **kwargs):
         ra = self.request_args.copy()
         ra.update(kwargs)
         return ra
 
+    def _merge_download_overrides(self, **kwargs):
+        kwargs.setdefault('download_url_base', self.download_url_base)
+        kwargs.setdefault('local_files', self.local_files)
+        return kwargs
+
     def get_me(self, *args, **kwargs):
         """See :func:`get_me`"""
         return get_me(*args, **self._merge_overrides(**kwargs)).run()
@@ -4436,8 +6793,38 @@ class TelegramBot(object):
 
     def download_file(self, *args, **kwargs):
         """See :func:`download_file`"""
+        kwargs = self._merge_download_overrides(**kwargs)
         return download_file(*args, **self._merge_overrides(**kwargs)).run()
 
+    def batch(self):
+        """Start a :class:`Batch` of API calls made with this bot
+
+        :rtype: Batch
+        """
+        return Batch(self)
+
+    def call_many(self, calls, timeout=None, **kwargs):
+        """Run many API calls concurrently and wait for all of them.
+
+        :param calls: ``(method_name, args)`` or ``(method_name, args, kwargs)`` tuples, e.g.
+                      ``('send_message', (chat_id, 'Hello'))``
+        :param timeout: Seconds to wait for all calls
+        :param kwargs: Passed to every call, e.g. ``priority=Priority.BULK``
+
+        :type calls: iterable
+        :type timeout: float
+
+        :returns: The result of every call, or its error, in the order of ``calls``
+        :rtype: list
+        """
+        batch = self.batch()
+        for call in calls:
+            call_kwargs = dict(kwargs)
+            if len(call) > 2:
+                call_kwargs.update(call[2])
+            getattr(batch, call[0])(*call[1], **call_kwargs)
+        return batch.wait(timeout)
+
     @property
     def token(self):
         return self.request_args['token']
@@ -4454,6 +6841,126 @@ class TelegramBot(object):
     def request_method(self, val):
         self.request_args['request_method'] = val
 
+    @property
+    def session(self):
+        return getattr(self.transport, 'session', None)
+
+    @session.setter
+    def session(self, val):
+        self.transport = RequestsTransport(val)
+
+    @property
+    def transport(self):
+        return self.request_args['transport']
+
+    @transport.setter
+    def transport(self, val):
+        self.request_args['transport'] = val
+
+    @property
+    def api_url_base(self):
+        return self.request_args['api_url_base']
+
+    @api_url_base.setter
+    def api_url_base(self, val):
+        self.request_args['api_url_base'] = val
+
+    @property
+    def rate_limiter(self):
+        return self.request_args['rate_limiter']
+
+    @rate_limiter.setter
+    def rate_limiter(self, val):
+        self.request_args['rate_limiter'] = val
+
+    @property
+    def retry_policy(self):
+        return self.request_args['retry_policy']
+
+    @retry_policy.setter
+    def retry_policy(self, val):
+        self.request_args['retry_policy'] = val
+
+    @property
+    def callback_executor(self):
+        return self.request_args['callback_executor']
+
+    @callback_executor.setter
+    def callback_executor(self, val):
+        self.request_args['callback_executor'] = val
+
+    @property
+    def request_timeout(self):
+        return self.request_args['request_timeout']
+
+    @request_timeout.setter
+    def request_timeout(self, val):
+        self.request_args['request_timeout'] = val
+
+    @property
+    def deadline(self):
+        return self.request_args['deadline']
+
+    @deadline.setter
+    def deadline(self, val):
+        self.request_args['deadline'] = val
+
+    @property
+    def circuit_breaker(self):
+        return self.request_args['circuit_breaker']
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, val):
+        self.request_args['circuit_breaker'] = val
+
+    @property
+    def result_mode(self):
+        return self.request_args['result_mode']
+
+    @result_mode.setter
+    def result_mode(self, val):
+        self.request_args['result_mode'] = val
+
+    @property
+    def json_codec(self):
+        return self.request_args['json_codec']
+
+    @json_codec.setter
+    def json_codec(self, val):
+        self.request_args['json_codec'] = val
+
+    @property
+    def intern_table(self):
+        return self.request_args['intern_table']
+
+    @intern_table.setter
+    def intern_table(self, val):
+        self.request_args['intern_table'] = val
+
+    @property
+    def projection(self):
+        return self.request_args['projection']
+
+    @projection.setter
+    def projection(self, val):
+        self.request_args['projection'] = val
+
+    @property
+    def prefilter(self):
+        return self.request_args['prefilter']
+
+    @prefilter.setter
+    def prefilter(self, val):
+        self.request_args['prefilter'] = val
+
+    @property
+    def executor(self):
+        return self.request_args['executor']
+
+    @executor.setter
+    def executor(self, val):
+        self.request_args['executor'] = val
+
     @property
     def id(self):
         if self._bot_user is not None:
@@ -4473,3 +6980,100 @@ class TelegramBot(object):
     def username(self):
         if self._bot_user is not None:
             return self._bot_user.username
+
+
+class BotFarm(object):
+    """Hosts many bots on one connection pool and one executor.
+
+    Every bot added with :meth:`add_bot` is a regular :class:`TelegramBot`, sending through the shared transport
+    and running its requests on its own lane of the shared :class:`BoundedExecutor` (see
+    :meth:`BoundedExecutor.lane`). Lanes with requests waiting take turns, so a bot with a large backlog cannot
+    starve the others. Telegram's flood limits apply per bot, so each bot gets a rate limiter of its own.
+
+    :param max_workers: The number of threads shared by all bots, see :class:`BoundedExecutor`
+    :param queue_size: The number of requests of one bot and priority that may wait for a worker
+    :param pool_connections: See :func:`create_session`. Ignored if ``transport`` is given
+    :param pool_maxsize: See :func:`create_session`. Ignored if ``transport`` is given
+    :param pool_block: See :func:`create_session`. Ignored if ``transport`` is given
+    :param transport: The transport shared by all bots. When omitted, a :class:`RequestsTransport` over a pooled
+                      session is created
+    :param rate_limiter_factory: Called without arguments to create the rate limiter of each bot, or None to not
+                                 rate limit
+    :param bot_args: Passed to every :class:`TelegramBot`, e.g. ``retry_policy`` or ``circuit_breaker``
+
+    :type max_workers: int
+    :type queue_size: int
+    :type pool_connections: int
+    :type pool_maxsize: int
+    :type pool_block: bool
+    :type transport: Transport
+    :type rate_limiter_factory: callable
+
+    :example:
+
+    ::
+
+        farm = BotFarm(max_workers=64)
+        for token in tokens:
+            farm.add_bot(token)
+
+        farm[token].send_message(chat_id, 'Hello')
+    """
+
+    def __init__(self, max_workers=32, queue_size=1000, pool_connections=10, pool_maxsize=32, pool_block=False,
+                 transport=None, rate_limiter_factory=RateLimiter, **bot_args):
+        if transport is None:
+            transport = RequestsTransport(create_session(pool_connections=pool_connections,
+                                                         pool_maxsize=pool_maxsize, pool_block=pool_block))
+        self.transport = transport
+        self.executor = BoundedExecutor(max_workers=max_workers, queue_size=queue_size)
+        self.rate_limiter_factory = rate_limiter_factory
+        self.bot_args = bot_args
+
+        self._bots = OrderedDict()
+        self._lock = Lock()
+
+    def add_bot(self, token, **kwargs):
+        """Create a bot in the farm
+
+        :param token: The api token of the bot
+        :param kwargs: Passed to :class:`TelegramBot`, overriding ``bot_args``
+
+        :rtype: TelegramBot
+        """
+        bot_args = dict(self.bot_args)
+        bot_args.update(kwargs)
+        if 'rate_limiter' not in bot_args and self.rate_limiter_factory is not None:
+            bot_args['rate_limiter'] = self.rate_limiter_factory()
+
+        with self._lock:
+            if token in self._bots:
+                raise ValueError('A bot with this token is already in the farm')
+            bot = self._bots[token] = TelegramBot(token, transport=self.transport,
+                                                  executor=self.executor.lane(token), **bot_args)
+        return bot
+
+    def remove_bot(self, token):
+        """Remove a bot from the farm. Its requests already queued are still sent
+
+        :rtype: TelegramBot
+        """
+        with self._lock:
+            return self._bots.pop(token)
+
+    def __getitem__(self, token):
+        return self._bots[token]
+
+    def __contains__(self, token):
+        return token in self._bots
+
+    def __len__(self):
+        return len(self._bots)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._bots.values()))
+
+    def shutdown(self, wait=True):
+        """Stop the shared executor, see :meth:`concurrent.futures.Executor.shutdown`"""
+        self.executor.shutdown(wait)
@@ -17,8 +17,23 @@ class UpdateLoop:
     """
     Super Simple loop and handler helper. Runs until exit.
 
+    Handlers can declare the fields they read as ``fields``, mapping type names to field names, e.g.
+    ``dict(Message=('text', 'entities'), User=('username',))``. With ``run(project=True)``, and as long as every
+    registered handler declares its fields, only those (and the ones the loop itself needs) are decoded, see
+    :class:`twx.botapi.Projection`. Nested types a handler reads must be declared as well: a field that is left
+    out is None. The projection is ignored when the bot decodes results with ``ResultMode.COMPACT`` or
+    ``ResultMode.LAZY``.
+
     TODO: Implement decorators. Split loop from handler code.
     """
+    # The fields process_update reads
+    loop_fields = dict(
+        Update=('update_id', 'message', 'callback_query', 'inline_query'),
+        Message=('message_id', 'text', 'chat', 'sender', 'reply_to_message'),
+        Chat=('id',),
+        User=('id',),
+        CallbackQuery=('id', 'sender', 'message', 'data'),
+    )
 
     def __init__(self, bot, handler, prefix="/"):
         self.bot = bot
@@ -30,31 +45,69 @@ class UpdateLoop:
         self.reply_registry = dict()
         self.inline_registry = dict()
         self.inline_query_handler = None
+        self.handler_fields = dict()
+        self.undeclared_handlers = False
+        self._projection = None
 
-    def register_command(self, name, function, permission=Permission.User, scope=Scope.Group):
+    def register_command(self, name, function, permission=Permission.User, scope=Scope.Group, fields=None):
+        self.declare_fields(fields)
         self.command_registry[name.lower()] = {
             'func': function,
             'permission': permission,
             'scope': scope
         }
 
-    def register_reply_watch(self, message, function):
+    def register_reply_watch(self, message, function, fields=None):
+        self.declare_fields(fields)
         self.reply_registry[message.message_id] = function
 
-    def register_inline_reply(self, message, srcmsg, function, permission=Permission.User):
+    def register_inline_reply(self, message, srcmsg, function, permission=Permission.User, fields=None):
+        self.declare_fields(fields)
         self.inline_registry[message.message_id] = {
             'func': function,
             'permission': permission,
             'srcmsg': srcmsg
         }
 
-    def register_inline_query_handler(self, function):
+    def register_inline_query_handler(self, function, fields=None):
+        self.declare_fields(fields)
         self.inline_query_handler = function
 
-    def run(self):
+    def declare_fields(self, fields):
+        """Add the fields a handler reads, or note that it did not declare them (``fields`` is None)"""
+        if fields is None:
+            self.undeclared_handlers = True
+            return
+
+        for name, names in fields.items():
+            self.handler_fields[name] = self.handler_fields.get(name, frozenset()) | frozenset(names)
+        self._projection = None
+
+    def projection(self):
+        """The :class:`twx.botapi.Projection` of the fields read by the loop and its handlers, or None if a handler
+        did not declare them"""
+        if self.undeclared_handlers:
+            return None
+
+        if self._projection is None:
+            fields = dict((name, frozenset(names)) for name, names in self.loop_fields.items())
+            for name, names in self.handler_fields.items():
+                fields[name] = fields.get(name, frozenset()) | names
+            self._projection = twx.botapi.Projection(**fields)
+        return self._projection
+
+    def run(self, project=False):
+        """
+        :param project: If True, only decode the fields the loop and its handlers declared, see :meth:`projection`.
+                        A ``projection`` set on the bot is used either way
+        :type project: bool
+        """
         while True:
+            request_args = dict(self.bot.request_args)
+            if project and request_args.get('projection') is None:
+                request_args['projection'] = self.projection()
             twx.botapi.get_updates(offset=self.update_offset, timeout=300,
-                                   on_success=self.new_updates, **self.bot.request_args).run().wait()
+                                   on_success=self.new_updates, **request_args).run().wait()
 
     def new_updates(self, updates):
         for update in updates: